@@ -0,0 +1,3 @@
+Added the ``FINALIZE_PUSHES_ASYNC`` setting. When enabled, pushing a tagged manifest returns right
+away and a background task adds all the tags pushed to a repository in the meantime in a single
+repository version.
@@ -0,0 +1,2 @@
+The token server now resolves all repositories requested within a single token, together with the
+user's role assignments, in a constant number of queries.
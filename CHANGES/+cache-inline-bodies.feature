@@ -0,0 +1,4 @@
+Added the ``CACHE_INLINE_MAX_SIZE`` setting. Manifests and blobs smaller than the configured size
+are stored directly in the content app's Redis cache entries, so that cache hits for them are served
+from memory without accessing the storage backend. Hit, miss, and byte counters are available via
+``RegistryContentCache.stats()``.
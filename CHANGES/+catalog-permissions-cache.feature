@@ -0,0 +1,2 @@
+The ``/v2/_catalog`` endpoint lists repositories with a single query on the distributions and keeps
+the private distributions accessible by a user for ``CATALOG_CACHE_TTL`` seconds.
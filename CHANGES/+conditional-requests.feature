@@ -0,0 +1,2 @@
+Blobs and manifests served by the content app now carry their digest as the ETag and honor the
+If-None-Match, If-Match, and If-Range headers alongside Range requests.
@@ -0,0 +1,3 @@
+Cached the resolution of distributions, their repositories, and served repository versions by base
+path for the registry API. The cache is invalidated on distribution updates and new repository
+versions.
@@ -0,0 +1,2 @@
+Reduced the number of database queries issued by the content app when serving blobs and manifests
+by their digest.
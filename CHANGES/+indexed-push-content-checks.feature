@@ -0,0 +1,2 @@
+The blobs and manifests referenced by a pushed manifest are looked up in the repository with indexed
+membership checks, so validating a push no longer scans all the content of the repository.
@@ -0,0 +1,2 @@
+Pushed manifests are validated from the received data instead of being read back from the storage,
+which saves a request to the object storage per push.
@@ -0,0 +1,3 @@
+The registry now caches "not found" responses for unknown tags, digests, and repositories for
+``CACHE_NOT_FOUND_TTL`` seconds. The entries are invalidated whenever content is pushed or synced
+to the repository.
@@ -0,0 +1,2 @@
+Pull-through manifests fetched for the first time are returned to clients without waiting for the
+config blob download and the initialization of their metadata.
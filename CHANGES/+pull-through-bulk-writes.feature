@@ -0,0 +1,2 @@
+Reduced the number of database queries needed to register the content of manifests pulled through
+the cache for the first time.
@@ -0,0 +1,2 @@
+Pull-through distributions are matched by an indexed lookup of the requested path's prefixes instead
+of scanning all pull-through distributions.
@@ -0,0 +1,3 @@
+Concurrent pull-through requests for the same manifest are now coalesced into a single upstream
+request, saved artifact, and dispatched task. Content app workers coordinate through Redis locks
+when the cache is enabled; the wait time is configurable via ``PULL_THROUGH_LOCK_TIMEOUT``.
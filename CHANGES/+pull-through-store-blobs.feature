@@ -0,0 +1,2 @@
+Blobs streamed by pull-through distributions are now stored locally even when the client
+disconnects before the download finishes.
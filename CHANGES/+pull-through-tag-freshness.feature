@@ -0,0 +1,3 @@
+Added the ``tag_freshness_ttl`` field to pull-through distributions. Within this period, cached
+tags are served without contacting the remote; expired tags are served while a single request
+refreshes them in the background.
@@ -0,0 +1,3 @@
+Added the ``push_commit_window`` and ``push_commit_size`` fields to push repositories. Tags pushed
+within the window are added to a single repository version; in the meantime, they are served and
+listed by the registry.
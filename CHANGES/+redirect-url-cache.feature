@@ -0,0 +1,2 @@
+Signed object storage URLs of redirects to manifests and blobs are reused for a configurable
+fraction of their validity, see ``REDIRECT_URL_CACHE_SIZE`` and ``REDIRECT_URL_CACHE_TTL_FRACTION``.
@@ -0,0 +1,2 @@
+Chunked blob uploads are appended to a staging file and hashed while being received, so completing
+an upload no longer reassembles and re-reads the chunks when the filesystem storage is used.
@@ -0,0 +1,2 @@
+Blobs uploaded within a single request are streamed to the upload temporary directory and hashed
+while being received instead of being read into memory and hashed again.
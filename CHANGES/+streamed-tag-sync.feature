@@ -0,0 +1,2 @@
+Syncing processes the tags of a repository as the pages of its tag list are downloaded and fetches
+the tagged manifests with a fixed number of workers instead of scheduling every tag at once.
@@ -0,0 +1,3 @@
+Materialized the sorted tag names of the latest repository versions, so that ``/v2/<name>/tags/list``
+pages through the tags using an index range scan. The names are materialized for the existing
+repositories by a migration.
@@ -0,0 +1,3 @@
+Added a per-worker cache of resolved tags to the content app so that repeated pulls of the same tag
+skip the repository content lookups. The size of the cache is configurable via the
+``TAG_RESOLUTION_CACHE_SIZE`` setting.
@@ -0,0 +1,2 @@
+The token server and the token verification no longer read and parse the signing keys on every
+request. The keys are reloaded when their files change.
@@ -0,0 +1,3 @@
+Bearer tokens are verified only once per API worker until they expire or for ``TOKEN_CACHE_TTL``
+seconds at most. Repeated requests with the same token skip the signature verification and the
+user lookup.
@@ -13,8 +13,14 @@ class RegistryAccessPolicy(AccessPolicy):
     """
     An AccessPolicy that loads statements from the ContainerDistribution, ContainerNamespace,
     and ContainerPushRepository viewsets.
+
+    The statements are loaded once per instance of the policy.
     """
 
+    def __init__(self):
+        """Initialize the loaded statements."""
+        self.loaded_statements = {}
+
     def get_policy_statements(self, request, view):
         """
         Return the policy statements for the container distribution and namespace viewsets.
@@ -28,11 +34,10 @@ class RegistryAccessPolicy(AccessPolicy):
 
         """
         if isinstance(view.get_object(), models.ContainerDistribution):
-            access_policy_obj = AccessPolicyModel.objects.get(
-                viewset_name="distributions/container/container"
-            )
+            viewset_name = "distributions/container/container"
         else:
-            access_policy_obj = AccessPolicyModel.objects.get(
-                viewset_name="pulp_container/namespaces"
-            )
-        return access_policy_obj.statements
+            viewset_name = "pulp_container/namespaces"
+        if viewset_name not in self.loaded_statements:
+            access_policy_obj = AccessPolicyModel.objects.get(viewset_name=viewset_name)
+            self.loaded_statements[viewset_name] = access_policy_obj.statements
+        return self.loaded_statements[viewset_name]
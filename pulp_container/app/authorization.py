@@ -1,4 +1,7 @@
+from gettext import gettext as _
+
 import base64
+import copy
 import hashlib
 import random
 import uuid
@@ -10,14 +13,21 @@ from datetime import datetime
 from functools import partial
 
 from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
 from django.http import HttpRequest
 from rest_framework.request import Request
 
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
 
+from pulpcore.plugin.models import Domain, Group
+
 from pulp_container.app.models import ContainerDistribution, ContainerNamespace
 from pulp_container.app.access_policy import RegistryAccessPolicy
+from pulp_container.app.utils import load_key_file, load_private_key
 
 TOKEN_EXPIRATION_TIME = settings.get("TOKEN_EXPIRATION_TIME", 300)
 
@@ -40,6 +50,123 @@ def get_serializer(*args, **kwargs):
 
 FakeViewWithSerializer = partial(FakeView, get_serializer=get_serializer)
 
+# the authentication backends whose permission checks are evaluated by PrefetchedPermissions
+PREFETCHED_BACKENDS = {
+    "django.contrib.auth.backends.ModelBackend",
+    "pulpcore.backends.ObjectRolePermissionBackend",
+}
+
+
+class PrefetchedPermissions:
+    """
+    Permissions of a user evaluated in memory for a set of objects fetched in advance.
+
+    The user's role assignments are loaded with a constant number of queries and checked the same
+    way as the ObjectRolePermissionBackend does, together with the permissions granted by the
+    ModelBackend. Permissions on other objects are checked by the configured authentication
+    backends. Only use it when the configured backends are the ``PREFETCHED_BACKENDS``.
+    """
+
+    @staticmethod
+    def is_supported():
+        """Check whether the configured backends are the ones evaluated in memory."""
+        return set(settings.AUTHENTICATION_BACKENDS) == PREFETCHED_BACKENDS
+
+    def __init__(self, user, objects):
+        """
+        Load the model-level role assignments of the user and the ones for the objects.
+
+        Args:
+            user (django.contrib.auth.models.User): The user whose permissions are checked.
+            objects (list): Objects to load the object-level role assignments for.
+
+        """
+        self.user = user
+        self.object_ids = {str(obj.pk) for obj in objects}
+        self.global_permissions = set()
+        self.object_permissions = set()
+        # "app_label.codename" -> the content type of the permission, None if it does not exist
+        self.permission_content_types = {}
+
+        if user.is_authenticated:
+            self._load_role_assignments()
+            self.global_permissions.update(ModelBackend().get_all_permissions(user))
+
+    def _load_role_assignments(self):
+        assignments = Q(object_roles__object_id=None, object_roles__domain=None) | Q(
+            object_roles__object_id__in=self.object_ids
+        )
+        fields = (
+            "object_roles__object_id",
+            "object_roles__role__permissions__content_type_id",
+            "object_roles__role__permissions__content_type__app_label",
+            "object_roles__role__permissions__codename",
+        )
+        user_roles = (
+            type(self.user)
+            .objects.filter(assignments, pk=self.user.pk)
+            .values_list(*fields)
+            .distinct()
+        )
+        group_roles = (
+            Group.objects.filter(assignments, user=self.user).values_list(*fields).distinct()
+        )
+        for roles in (user_roles, group_roles):
+            for object_id, content_type_id, app_label, codename in roles:
+                if codename is None:
+                    # a role without permissions
+                    continue
+                if object_id is None:
+                    self.global_permissions.add(f"{app_label}.{codename}")
+                else:
+                    self.object_permissions.add((object_id, content_type_id, codename, app_label))
+
+    def has_perm(self, perm, obj=None):
+        """
+        Check if the user has the permission, globally or for the object.
+        """
+        if self.user.is_active and self.user.is_superuser:
+            return True
+        if obj is None:
+            return perm in self.global_permissions
+        if isinstance(obj, Domain) or str(obj.pk) not in self.object_ids:
+            return type(self.user).has_perm(self.user, perm, obj)
+
+        if not self.user.is_authenticated:
+            return False
+        permission_content_type = self._get_permission_content_type(perm)
+        if permission_content_type is None:
+            # cannot have a permission that does not exist
+            return False
+        content_type = ContentType.objects.get_for_model(obj, for_concrete_model=False)
+        if permission_content_type != content_type.pk:
+            raise RuntimeError(
+                _("Permission {} is not suitable for objects of class {}.").format(
+                    perm, obj.__class__
+                )
+            )
+
+        app_label, codename = perm.split(".", maxsplit=1)
+        return (str(obj.pk), content_type.pk, codename, app_label) in self.object_permissions
+
+    def _get_permission_content_type(self, perm):
+        if perm not in self.permission_content_types:
+            app_label, codename = perm.split(".", maxsplit=1)
+            self.permission_content_types[perm] = (
+                Permission.objects.filter(content_type__app_label=app_label, codename=codename)
+                .values_list("content_type_id", flat=True)
+                .first()
+            )
+        return self.permission_content_types[perm]
+
+    def bind(self):
+        """
+        Return a copy of the user whose permissions are checked against the loaded assignments.
+        """
+        user = copy.copy(self.user)
+        user.has_perm = self.has_perm
+        return user
+
 
 class AuthorizationService:
     """
@@ -63,6 +190,10 @@ class AuthorizationService:
         self.service = service
         self.scopes = scopes
         self.access_policy = RegistryAccessPolicy()
+        # the requesting user as seen by the access policy
+        self.request_user = user
+        self.distributions = {}
+        self.namespaces = {}
 
         self.actions_permissions = defaultdict(
             lambda: lambda *args: False,
@@ -84,8 +215,7 @@ class AuthorizationService:
             dict: A newly generated Bearer token.
 
         """
-        with open(settings.PUBLIC_KEY_PATH, "rb") as public_key:
-            kid = self.generate_kid_header(public_key.read())
+        kid = load_key_file(settings.PUBLIC_KEY_PATH, AuthorizationService.generate_kid_header)
 
         current_datetime = datetime.now()
 
@@ -99,13 +229,12 @@ class AuthorizationService:
             subject=self.user.username,
         )
 
-        with open(settings.PRIVATE_KEY_PATH, "rb") as private_key:
-            token = jwt.encode(
-                claim_set,
-                private_key.read(),
-                algorithm=settings.TOKEN_SIGNATURE_ALGORITHM,
-                headers={"kid": kid},
-            )
+        token = jwt.encode(
+            claim_set,
+            load_key_file(settings.PRIVATE_KEY_PATH, load_private_key),
+            algorithm=settings.TOKEN_SIGNATURE_ALGORITHM,
+            headers={"kid": kid},
+        )
         current_datetime_utc = current_datetime.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
         return {
             "expires_in": TOKEN_EXPIRATION_TIME,
@@ -114,21 +243,24 @@ class AuthorizationService:
             "access_token": token,
         }
 
-    def generate_kid_header(self, public_key):
+    @staticmethod
+    def generate_kid_header(public_key):
         """Generate kid header in a libtrust compatible format."""
-        decoded_key = self._convert_key_format_from_pem_to_der(public_key)
+        decoded_key = AuthorizationService._convert_key_format_from_pem_to_der(public_key)
         truncated_sha256 = hashlib.sha256(decoded_key).hexdigest()[:30].encode("utf8")
         encoded_base32 = base64.b32encode(truncated_sha256).decode("utf8")
-        return self._split_into_encoded_groups(encoded_base32)
+        return AuthorizationService._split_into_encoded_groups(encoded_base32)
 
-    def _convert_key_format_from_pem_to_der(self, public_key):
+    @staticmethod
+    def _convert_key_format_from_pem_to_der(public_key):
         key_in_pem_format = serialization.load_pem_public_key(public_key, default_backend())
         key_in_der_format = key_in_pem_format.public_bytes(
             serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
         )
         return key_in_der_format
 
-    def _split_into_encoded_groups(self, encoded_base32):
+    @staticmethod
+    def _split_into_encoded_groups(encoded_base32):
         """Split encoded and truncated base32 into 12 groups separated by ':'."""
         kid = encoded_base32[:4]
         for index, char in enumerate(encoded_base32[4:], start=0):
@@ -157,6 +289,10 @@ class AuthorizationService:
         if any(scope.count(":") != 2 for scope in self.scopes):
             return []
 
+        self.resolve_paths(
+            {scope.split(":")[1] for scope in self.scopes if scope.startswith("repository:")}
+        )
+
         permitted_scopes = []
         for scope in self.scopes:
             permitted_scopes.extend(self.permit_scope(scope))
@@ -184,13 +320,63 @@ class AuthorizationService:
 
         return [{"type": typ, "name": name, "actions": list(permitted_actions)}]
 
+    def resolve_paths(self, paths):
+        """
+        Fetch the distributions and namespaces of the paths together with the user's permissions.
+
+        All repository paths requested within a token are resolved with a constant number of
+        queries, so that the permissions for every scope are then evaluated in memory.
+        """
+        self.distributions.update({path: None for path in paths})
+        self.distributions.update(
+            (distribution.base_path, distribution)
+            for distribution in ContainerDistribution.objects.filter(
+                base_path__in=paths
+            ).select_related("namespace")
+        )
+
+        namespace_names = {
+            path.split("/")[0]
+            for path, distribution in self.distributions.items()
+            if not distribution
+        }
+        self.namespaces.update({name: None for name in namespace_names})
+        self.namespaces.update(
+            (namespace.name, namespace)
+            for namespace in ContainerNamespace.objects.filter(name__in=namespace_names)
+        )
+
+        objects = [obj for obj in self.namespaces.values() if obj]
+        for distribution in filter(None, self.distributions.values()):
+            objects.append(distribution)
+            if distribution.namespace:
+                objects.append(distribution.namespace)
+        if PrefetchedPermissions.is_supported():
+            self.request_user = PrefetchedPermissions(self.user, objects).bind()
+
+    def get_distribution(self, path):
+        """Return the distribution serving the path, or None if there is no such distribution."""
+        if path not in self.distributions:
+            self.distributions[path] = (
+                ContainerDistribution.objects.filter(base_path=path)
+                .select_related("namespace")
+                .first()
+            )
+        return self.distributions[path]
+
+    def get_namespace(self, name):
+        """Return the namespace with the name, or None if there is no such namespace."""
+        if name not in self.namespaces:
+            self.namespaces[name] = ContainerNamespace.objects.filter(name=name).first()
+        return self.namespaces[name]
+
     def has_permission(self, obj, method, action, data):
         """Check if user has permission to perform action."""
 
         # Fake the request
         request = Request(HttpRequest())
         request.method = method
-        request.user = self.user
+        request.user = self.request_user
         request._full_data = data
         # Fake the corresponding view
         view = FakeViewWithSerializer(action, lambda: obj)
@@ -200,13 +386,11 @@ class AuthorizationService:
         """
         Check if the user has permissions to pull from the repository specified by the path.
         """
-        try:
-            distribution = ContainerDistribution.objects.get(base_path=path)
-        except ContainerDistribution.DoesNotExist:
+        distribution = self.get_distribution(path)
+        if distribution is None:
             namespace_name = path.split("/")[0]
-            try:
-                namespace = ContainerNamespace.objects.get(name=namespace_name)
-            except ContainerNamespace.DoesNotExist:
+            namespace = self.get_namespace(namespace_name)
+            if namespace is None:
                 # Check if user is allowed to create a new namespace
                 return self.has_permission(None, "POST", "create", {"name": namespace_name})
             # Check if user is allowed to view distributions in the namespace
@@ -220,13 +404,11 @@ class AuthorizationService:
         """
         Check if the user has permissions to push to the repository specified by the path.
         """
-        try:
-            distribution = ContainerDistribution.objects.get(base_path=path)
-        except ContainerDistribution.DoesNotExist:
+        distribution = self.get_distribution(path)
+        if distribution is None:
             namespace_name = path.split("/")[0]
-            try:
-                namespace = ContainerNamespace.objects.get(name=namespace_name)
-            except ContainerNamespace.DoesNotExist:
+            namespace = self.get_namespace(namespace_name)
+            if namespace is None:
                 # Check if user is allowed to create a new namespace
                 return self.has_permission(None, "POST", "create", {"name": namespace_name})
             # Check if user is allowed to create a new distribution in the namespace
@@ -244,7 +426,7 @@ class AuthorizationService:
         # Fake the request
         request = Request(HttpRequest())
         request.method = "GET"
-        request.user = self.user
+        request.user = self.request_user
         # Fake the view
         view = FakeViewWithSerializer("catalog", lambda: ContainerDistribution())
         return self.access_policy.has_permission(request, view)
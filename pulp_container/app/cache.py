@@ -1,13 +1,284 @@
-from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import F, Value
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+from collections import OrderedDict
+from contextlib import suppress
+
+from aiohttp.web import FileResponse, HTTPNotFound, Response
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from redis.exceptions import RedisError
+from rest_framework.exceptions import NotFound
 
 from pulpcore.plugin.cache import CacheKeys, AsyncContentCache, SyncContentCache
+from pulpcore.plugin.models import Repository, RepositoryVersion
+from pulpcore.plugin.responses import ArtifactResponse
 
 from pulp_container.app.models import ContainerDistribution, ContainerPullThroughDistribution
 from pulp_container.app.exceptions import RepositoryNotFound
+from pulp_container.app.responses import (
+    RegistryArtifactResponse,
+    RegistryFileResponse,
+    RegistryResponse,
+)
+from pulp_container.app.utils import get_path_prefixes
+
+log = logging.getLogger(__name__)
 
 ACCEPT_HEADER_KEY = "accept_header"
 QUERY_KEY = "query"
+RESOLVED_DISTRIBUTION_KEY = "resolved_distribution"
+# the prefix of the Redis sets tracking the cached "not found" responses of the base paths
+NOT_FOUND_KEYS_PREFIX = "not_found_keys"
+
+# the fields cached for the distributions resolved by their base paths; other fields are deferred
+RESOLVED_FIELDS = {
+    ContainerDistribution: (
+        "pulp_id",
+        "distribution_ptr_id",
+        "pulp_type",
+        "pulp_domain_id",
+        "name",
+        "base_path",
+        "content_guard_id",
+        "remote_id",
+        "repository_id",
+        "repository_version_id",
+        "namespace_id",
+        "private",
+        "pull_through_distribution_id",
+    ),
+    ContainerPullThroughDistribution: (
+        "pulp_id",
+        "distribution_ptr_id",
+        "pulp_type",
+        "pulp_domain_id",
+        "tag_freshness_ttl",
+    ),
+    Repository: ("pulp_id", "pulp_type", "pulp_domain_id", "name"),
+    RepositoryVersion: ("pulp_id", "repository_id", "number", "complete"),
+}
+
+# the number of seconds the result of a coalesced call is kept for the workers waiting on it
+SINGLE_FLIGHT_RESULT_TTL = 5
+
+
+class LocalCache:
+    """
+    A bounded, per-process cache that evicts the least recently used entries first.
+
+    Unlike the Redis backed caches, this cache lives in the memory of a single worker and
+    therefore does not require any external service. Entries can optionally expire after
+    a number of seconds.
+    """
+
+    def __init__(self, max_size, ttl=None):
+        """
+        Args:
+            max_size (int): The maximum number of stored entries; 0 disables the cache.
+            ttl (float): The default number of seconds after which entries expire.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the value stored under the key or the default one if missing or expired."""
+        with self._lock:
+            try:
+                value, expires_at = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store the value under the key and evict the oldest entries if the cache is full."""
+        if not self.max_size:
+            return
+
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Remove the entry stored under the key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return the hit and miss counters and the number of stored entries."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedCache:
+    """
+    A cache of JSON serializable values shared by all the workers of the content app.
+
+    The values are stored in Redis when the Redis cache is enabled. Otherwise, every worker keeps
+    its own values in a :class:`LocalCache`. Redis errors are logged and treated as misses.
+    """
+
+    def __init__(self, namespace, max_size, ttl):
+        """
+        Args:
+            namespace (str): A prefix of the Redis keys the values are stored under.
+            max_size (int): The maximum number of values kept by a worker without Redis.
+            ttl (int): The number of seconds after which the values expire.
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self._local = LocalCache(max_size=max_size, ttl=ttl)
+        self._redis = None
+
+    def _get_redis(self):
+        if not settings.CACHE_ENABLED:
+            return None
+        if self._redis is None:
+            self._redis = AsyncContentCache().redis
+        return self._redis
+
+    async def get(self, key, default=None):
+        """Return the value stored under the key or the default one if missing or expired."""
+        redis = self._get_redis()
+        if redis is None:
+            return self._local.get(key, default)
+        try:
+            value = await redis.get(f"{self.namespace}:{key}")
+        except RedisError as exc:
+            log.warning("Failed to read {} from Redis: {}".format(key, exc))
+            return default
+        return default if value is None else json.loads(value)
+
+    async def set(self, key, value):
+        """Store the value under the key."""
+        redis = self._get_redis()
+        if redis is None:
+            self._local.set(key, value)
+            return
+        try:
+            await redis.set(f"{self.namespace}:{key}", json.dumps(value), ex=self.ttl)
+        except RedisError as exc:
+            log.warning("Failed to store {} in Redis: {}".format(key, exc))
+
+    async def delete(self, key):
+        """Remove the value stored under the key."""
+        redis = self._get_redis()
+        if redis is None:
+            self._local.delete(key)
+            return
+        try:
+            await redis.delete(f"{self.namespace}:{key}")
+        except RedisError as exc:
+            log.warning("Failed to delete {} from Redis: {}".format(key, exc))
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls sharing the same key into a single execution.
+
+    Calls made within a single process await the very same task. When the Redis cache is enabled,
+    the calls are also serialized across processes with a Redis lock; the result of the call is
+    shortly kept in Redis so that the workers waiting on the lock do not repeat the call. The
+    results must be JSON serializable.
+    """
+
+    def __init__(self, namespace):
+        """
+        Args:
+            namespace (str): A prefix of the Redis keys used for the locks and results.
+        """
+        self.namespace = namespace
+        self._calls = {}
+        self._redis = None
+
+    async def run(self, key, function):
+        """
+        Run the coroutine function unless a call with the same key is already in progress.
+
+        Args:
+            key (str): The key identifying the call.
+            function: A coroutine function without arguments.
+
+        Returns:
+            The result of the call shared by all the callers.
+
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(key, function))
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # a cancelled caller must not cancel the call the others are waiting for
+        return await asyncio.shield(task)
+
+    def _get_redis(self):
+        if not (settings.CACHE_ENABLED and settings.PULL_THROUGH_LOCK_TIMEOUT):
+            return None
+        if self._redis is None:
+            # the plugin API exposes the connection to Redis only through the caches
+            self._redis = AsyncContentCache().redis
+        return self._redis
+
+    async def _call(self, key, function):
+        redis = self._get_redis()
+        if redis is None:
+            return await function()
+
+        result_key = f"{self.namespace}:{key}:result"
+        lock = redis.lock(
+            f"{self.namespace}:{key}:lock",
+            timeout=settings.PULL_THROUGH_LOCK_TIMEOUT,
+            blocking_timeout=settings.PULL_THROUGH_LOCK_TIMEOUT,
+        )
+        acquired, result = False, None
+        try:
+            if acquired := await lock.acquire():
+                result = await redis.get(result_key)
+        except RedisError as exc:
+            log.warning("Failed to coordinate the call {} in Redis: {}".format(key, exc))
+
+        try:
+            if result is not None:
+                return json.loads(result)
+
+            result = await function()
+            if acquired:
+                with suppress(RedisError):
+                    await redis.set(result_key, json.dumps(result), ex=SINGLE_FLIGHT_RESULT_TTL)
+            return result
+        finally:
+            if acquired:
+                with suppress(RedisError):
+                    await lock.release()
 
 
 class RegistryCache:
@@ -20,10 +291,105 @@ class RegistryCache:
 
 
 class RegistryContentCache(RegistryCache, AsyncContentCache):
-    """A wrapper around the Redis content cache handler tailored for the content application."""
+    """
+    A wrapper around the Redis content cache handler tailored for the content application.
+
+    Bodies of files smaller than ``CACHE_INLINE_MAX_SIZE`` are stored directly in the cache
+    entries. Hits for such entries are then answered from memory without touching the storage.
+    """
 
     ADD_TRAILING_SLASH = False
 
+    # responses answering conditional requests with the content digest as the ETag
+    RESPONSE_TYPES = {
+        **AsyncContentCache.RESPONSE_TYPES,
+        "FileResponse": RegistryFileResponse,
+        "ArtifactResponse": RegistryArtifactResponse,
+        "Response": RegistryResponse,
+    }
+
+    # per-process statistics shared by all the decorated handlers
+    hits = 0
+    misses = 0
+    inlined_bytes = 0
+    served_inline_bytes = 0
+
+    @classmethod
+    def stats(cls):
+        """Return the hit, miss, and byte counters of this worker."""
+        return {
+            "hits": cls.hits,
+            "misses": cls.misses,
+            "inlined_bytes": cls.inlined_bytes,
+            "served_inline_bytes": cls.served_inline_bytes,
+        }
+
+    async def make_response(self, key, base_key):
+        """Count hits and misses, including the bytes served from inlined bodies."""
+        response = await super().make_response(key, base_key)
+        if response is None:
+            RegistryContentCache.misses += 1
+        else:
+            RegistryContentCache.hits += 1
+            if isinstance(response, Response) and isinstance(response.body, bytes):
+                RegistryContentCache.served_inline_bytes += len(response.body)
+        return response
+
+    async def make_entry(
+        self, key, base_key, handler, args, kwargs, expires=settings.CACHE_SETTINGS["EXPIRES_TTL"]
+    ):
+        """
+        Replace responses for small files with in-memory responses before caching them.
+
+        "Not found" errors are cached for ``CACHE_NOT_FOUND_TTL`` seconds.
+        """
+        if settings.CACHE_INLINE_MAX_SIZE:
+
+            async def inlining_handler(*args, **kwargs):
+                return await self.inline_body(await handler(*args, **kwargs))
+
+        else:
+            inlining_handler = handler
+
+        try:
+            return await super().make_entry(key, base_key, inlining_handler, args, kwargs, expires)
+        except HTTPNotFound as exc:
+            if settings.CACHE_NOT_FOUND_TTL:
+                headers = {
+                    name: value for name, value in exc.headers.items() if name != "Content-Length"
+                }
+                entry = not_found_entry(exc.status, headers, text=exc.text)
+                with suppress(RedisError):
+                    await self.set(key, json.dumps(entry), base_key=base_key)
+                    await self.redis.sadd(not_found_keys(base_key), key)
+                    await self.redis.expire(not_found_keys(base_key), settings.CACHE_NOT_FOUND_TTL)
+                    if expires and await self.redis.ttl(base_key) < 0:
+                        await self.redis.expire(base_key, expires)
+            raise
+
+    @staticmethod
+    async def inline_body(response):
+        """Read the file of a file response into memory if it does not exceed the limit."""
+        if isinstance(response, FileResponse):
+            path = response._path
+            if os.path.getsize(path) > settings.CACHE_INLINE_MAX_SIZE:
+                return response
+            with open(path, "rb") as file:
+                body = file.read()
+        elif isinstance(response, ArtifactResponse) and response._artifact is not None:
+            artifact = response._artifact
+            if artifact.size > settings.CACHE_INLINE_MAX_SIZE:
+                return response
+            body = await sync_to_async(read_artifact_file)(artifact)
+        else:
+            return response
+
+        RegistryContentCache.inlined_bytes += len(body)
+        headers = {
+            name: value for name, value in response.headers.items() if name != "Content-Length"
+        }
+        return RegistryResponse(body=body, status=response.status, headers=headers)
+
     def make_key(self, request):
         """Make a key composed of the request's path, method, host, and accept header."""
         accept_header = ",".join(sorted(request.headers.getall("accept", [])))
@@ -40,6 +406,24 @@ class RegistryContentCache(RegistryCache, AsyncContentCache):
 class RegistryApiCache(RegistryCache, SyncContentCache):
     """A wrapper around the Redis content cache handler tailored for the registry API."""
 
+    def make_entry(
+        self, key, base_key, handler, args, kwargs, expires=settings.CACHE_SETTINGS["EXPIRES_TTL"]
+    ):
+        """Cache "not found" errors for ``CACHE_NOT_FOUND_TTL`` seconds."""
+        try:
+            return super().make_entry(key, base_key, handler, args, kwargs, expires)
+        except NotFound as exc:
+            if settings.CACHE_NOT_FOUND_TTL:
+                headers = {"Content-Type": "application/json"}
+                entry = not_found_entry(exc.status_code, headers, content=json.dumps(exc.detail))
+                with suppress(RedisError):
+                    self.set(key, json.dumps(entry), base_key=base_key)
+                    self.redis.sadd(not_found_keys(base_key), key)
+                    self.redis.expire(not_found_keys(base_key), settings.CACHE_NOT_FOUND_TTL)
+                    if expires and self.redis.ttl(base_key) < 0:
+                        self.redis.expire(base_key, expires)
+            raise
+
     def make_key(self, request):
         """Make a key composed of the request's path, method, host, and accept header."""
         all_keys = {
@@ -52,6 +436,160 @@ class RegistryApiCache(RegistryCache, SyncContentCache):
         return key
 
 
+def not_found_entry(status, headers, **body):
+    """
+    Create a cache entry for a "not found" response which expires after a short time.
+
+    The entry is stored under the base path of the distribution next to the other entries, which
+    may live longer; its key is tracked in a separate set so that it can be invalidated alone.
+    """
+    return {
+        "headers": headers,
+        "status": status,
+        "type": "Response",
+        "expires": time.time() + settings.CACHE_NOT_FOUND_TTL,
+        **body,
+    }
+
+
+def not_found_keys(base_key):
+    """Return the key of the Redis set tracking the "not found" entries of the base path."""
+    return f"{NOT_FOUND_KEYS_PREFIX}:{base_key}"
+
+
+def invalidate_not_found_entries(repository):
+    """
+    Invalidate the cached "not found" responses of the distributions serving the repository.
+
+    This needs to be called after adding pending content, which does not create a new repository
+    version, so that no cached "not found" response hides the added content. The other cached
+    responses are kept. The entries are deleted once the current transaction is committed.
+    """
+    if settings.CACHE_ENABLED and settings.CACHE_NOT_FOUND_TTL:
+        transaction.on_commit(lambda: _delete_not_found_entries(repository))
+
+
+def _delete_not_found_entries(repository):
+    base_paths = list(repository.distributions.values_list("base_path", flat=True))
+    if not base_paths:
+        return
+
+    redis = SyncContentCache().redis
+    with suppress(RedisError):
+        with redis.pipeline() as pipeline:
+            for base_path in base_paths:
+                pipeline.smembers(not_found_keys(base_path))
+                pipeline.delete(not_found_keys(base_path))
+            # the keys of the entries cached in the meantime are tracked in new sets
+            results = pipeline.execute()
+
+        with redis.pipeline(transaction=False) as pipeline:
+            for base_path, keys in zip(base_paths, results[::2]):
+                if keys:
+                    pipeline.hdel(base_path, *keys)
+            pipeline.execute()
+
+
+def _dump_instance(instance):
+    """Serialize the cached fields of a model instance to a JSON compatible dictionary."""
+    if instance is None:
+        return None
+    values = {}
+    for attname in RESOLVED_FIELDS[type(instance)]:
+        value = getattr(instance, attname)
+        values[attname] = value if value is None or isinstance(value, (bool, int)) else str(value)
+    return values
+
+
+def _load_instance(model, values):
+    """Create a model instance from the cached fields as if it was loaded from the database."""
+    if values is None:
+        return None
+    fields = [field for field in model._meta.concrete_fields if field.attname in values]
+    return model.from_db(
+        DEFAULT_DB_ALIAS,
+        [field.attname for field in fields],
+        [field.to_python(values[field.attname]) for field in fields],
+    )
+
+
+def resolve_distribution(path, cache=None):
+    """
+    Resolve the distribution with the base path, its repository, and the served repository version.
+
+    The result is stored in the Redis hash of the base path. The hash is deleted whenever the
+    distribution or its pull-through distribution changes or a new version of its repository is
+    created, so the cached result is never outdated. Instances created from the cached result
+    defer the loading of other fields.
+
+    Args:
+        path (str): The base path of the distribution.
+        cache (:class:`pulpcore.plugin.cache.SyncContentCache`): The cache to use, if any.
+
+    Returns:
+        tuple: The distribution, its repository, and the served repository version, which are None
+            when the distribution has no repository or repository version; None when there is no
+            distribution with the base path.
+
+    """
+    if cache is None and settings.CACHE_ENABLED:
+        cache = SyncContentCache()
+
+    cached = cache.get(RESOLVED_DISTRIBUTION_KEY, base_key=path) if cache is not None else None
+    resolved = json.loads(cached) if cached else {}
+    # the results cached by older releases do not carry the pull-through distribution
+    if "pull_through_distribution" in resolved:
+        repository = _load_instance(Repository, resolved["repository"])
+        repository_version = _load_instance(RepositoryVersion, resolved["repository_version"])
+        distribution = _load_instance(ContainerDistribution, resolved["distribution"])
+        if distribution.pull_through_distribution_id is not None:
+            distribution.pull_through_distribution = _load_instance(
+                ContainerPullThroughDistribution, resolved["pull_through_distribution"]
+            )
+        if repository is not None:
+            distribution.repository = repository
+            if repository_version is not None:
+                repository_version.repository = repository
+        return distribution, repository, repository_version
+
+    distribution = (
+        ContainerDistribution.objects.select_related(
+            "repository", "repository_version", "pull_through_distribution"
+        )
+        .filter(base_path=path)
+        .first()
+    )
+    if distribution is None:
+        return None
+    repository = distribution.repository
+    repository_version = distribution.get_repository_version()
+
+    if cache is not None:
+        resolved = {
+            "distribution": _dump_instance(distribution),
+            "repository": _dump_instance(repository),
+            "repository_version": _dump_instance(repository_version),
+            "pull_through_distribution": _dump_instance(distribution.pull_through_distribution),
+        }
+        with suppress(RedisError):
+            cache.set(RESOLVED_DISTRIBUTION_KEY, json.dumps(resolved), base_key=path)
+            if cache.redis.ttl(path) < 0:
+                cache.redis.expire(path, settings.CACHE_SETTINGS["EXPIRES_TTL"])
+    return distribution, repository, repository_version
+
+
+def invalidate_resolved_distribution(base_path):
+    """Invalidate the cached resolution of the distribution with the base path."""
+    if settings.CACHE_ENABLED:
+        SyncContentCache().delete(RESOLVED_DISTRIBUTION_KEY, base_key=base_path)
+
+
+def read_artifact_file(artifact):
+    """Read the whole file of the passed artifact from the storage."""
+    with artifact.file.open("rb") as file:
+        return file.read()
+
+
 def find_base_path_cached(request, cached):
     """
     Returns the base-path to use for the base-key in the cache
@@ -65,23 +603,22 @@ def find_base_path_cached(request, cached):
 
     """
     path = request.resolver_match.kwargs["path"]
-    path_exists = cached.exists(base_key=path)
-    if path_exists:
+    if cached.exists(base_key=path) or resolve_distribution(path, cached):
         return path
-    else:
-        try:
-            distro = ContainerDistribution.objects.get(base_path=path)
-        except ObjectDoesNotExist:
-            distro = (
-                ContainerPullThroughDistribution.objects.annotate(path=Value(path))
-                .filter(path__startswith=F("base_path"))
-                .order_by("-base_path")
-                .first()
-            )
-            if not distro:
-                raise RepositoryNotFound(name=path)
 
-        return distro.base_path
+    distro = (
+        ContainerPullThroughDistribution.objects.filter(base_path__in=get_path_prefixes(path))
+        .order_by("-base_path")
+        .first()
+    )
+    if not distro:
+        if settings.CACHE_NOT_FOUND_TTL:
+            # cache the "not found" response under the requested path; the entry is
+            # invalidated once a distribution with this base path is created
+            return path
+        raise RepositoryNotFound(name=path)
+
+    return distro.base_path
 
 
 class FlatpakIndexStaticCache(SyncContentCache):
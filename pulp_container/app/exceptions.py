@@ -1,4 +1,5 @@
-from rest_framework.exceptions import NotFound, ParseError
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ParseError
 
 
 class RepositoryNotFound(NotFound):
@@ -104,6 +105,26 @@ class ManifestInvalid(ParseError):
         )
 
 
+class ManifestTooLarge(APIException):
+    """Exception to render a 413 with the code 'MANIFEST_INVALID'"""
+
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    def __init__(self, max_size):
+        """Initialize the exception with the maximum allowed size of a manifest."""
+        super().__init__(
+            detail={
+                "errors": [
+                    {
+                        "code": "MANIFEST_INVALID",
+                        "message": "manifest exceeds the maximum allowed size",
+                        "detail": {"max_size": max_size},
+                    }
+                ]
+            }
+        )
+
+
 class ManifestSignatureInvalid(ParseError):
     """An exception to render an HTTP 400 response with the code 'SIGNATURE_INVALID'."""
 
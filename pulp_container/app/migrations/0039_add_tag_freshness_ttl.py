@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("container", "0038_add_manifest_metadata_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="containerpullthroughdistribution",
+            name="tag_freshness_ttl",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="The number of seconds a cached tag is served without checking the remote for a newer manifest. Expired tags are served while being refreshed in the background. Defaults to 0, checking the remote on every request.",
+            ),
+        ),
+    ]
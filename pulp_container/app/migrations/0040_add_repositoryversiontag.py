@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0116_alter_remoteartifact_md5_alter_remoteartifact_sha1_and_more"),
+        ("container", "0039_add_tag_freshness_ttl"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RepositoryVersionTag",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("name", models.TextField()),
+                (
+                    "repository_version",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="container_tags",
+                        to="core.repositoryversion",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("repository_version", "name")},
+            },
+        ),
+    ]
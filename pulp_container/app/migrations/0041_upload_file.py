@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:44
+
+from django.db import migrations, models
+import pulp_container.app.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("container", "0040_add_repositoryversiontag"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="upload",
+            name="file",
+            field=models.FileField(
+                max_length=255, null=True, upload_to=pulp_container.app.models.generate_filename
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("container", "0041_upload_file"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PendingTag",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "repository",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pending_tags",
+                        to="container.containerpushrepository",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pending_pushes",
+                        to="container.tag",
+                    ),
+                ),
+            ],
+        ),
+    ]
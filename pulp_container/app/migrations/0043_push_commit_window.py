@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:55
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("container", "0042_pendingtag"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="containerpushrepository",
+            name="push_commit_size",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="The number of pushed tags which closes the commit window early. Defaults to 0, collecting the tags for the whole window.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="containerpushrepository",
+            name="push_commit_window",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="The number of milliseconds tags pushed to the repository are collected for before they are added to a single repository version. Pushed tags are served in the meantime. Defaults to 0, creating a repository version for every push.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="pendingtag",
+            name="pushed_at",
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0116_alter_remoteartifact_md5_alter_remoteartifact_sha1_and_more"),
+        ("container", "0043_push_commit_window"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RepositoryVersionTagIndex",
+            fields=[
+                (
+                    "repository_version",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="container_tag_index",
+                        serialize=False,
+                        to="core.repositoryversion",
+                    ),
+                ),
+            ],
+        ),
+    ]
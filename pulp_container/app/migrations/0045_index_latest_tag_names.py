@@ -0,0 +1,53 @@
+from django.db import migrations
+from django.db.models import Q
+
+
+def index_latest_tag_names(apps, schema_editor):
+    RepositoryVersion = apps.get_model("core", "RepositoryVersion")
+    RepositoryContent = apps.get_model("core", "RepositoryContent")
+    Tag = apps.get_model("container", "Tag")
+    RepositoryVersionTag = apps.get_model("container", "RepositoryVersionTag")
+    RepositoryVersionTagIndex = apps.get_model("container", "RepositoryVersionTagIndex")
+
+    latest_versions = (
+        RepositoryVersion.objects.filter(
+            repository__pulp_type__in=["container.container", "container.container-push"],
+            complete=True,
+        )
+        .order_by("repository_id", "-number")
+        .distinct("repository_id")
+    )
+    for repository_version in latest_versions.iterator():
+        if RepositoryVersionTagIndex.objects.filter(repository_version=repository_version).exists():
+            continue
+        content = RepositoryContent.objects.filter(
+            Q(version_removed=None) | Q(version_removed__number__gt=repository_version.number),
+            repository_id=repository_version.repository_id,
+            version_added__number__lte=repository_version.number,
+        ).values("content_id")
+        tag_names = Tag.objects.filter(pk__in=content).values_list("name", flat=True).distinct()
+        RepositoryVersionTag.objects.bulk_create(
+            (
+                RepositoryVersionTag(repository_version=repository_version, name=name)
+                for name in tag_names.iterator()
+            ),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        RepositoryVersionTagIndex.objects.bulk_create(
+            [RepositoryVersionTagIndex(repository_version=repository_version)],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("container", "0044_repositoryversiontagindex")]
+
+    operations = [
+        migrations.RunPython(
+            code=index_latest_tag_names,
+            reverse_code=migrations.RunPython.noop,
+            elidable=True,
+        ),
+    ]
@@ -6,8 +6,12 @@ import re
 import tempfile
 import time
 from logging import getLogger
+from contextlib import suppress
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.conf import settings
 from django.contrib.postgres import fields
 from django.shortcuts import redirect
@@ -22,6 +26,8 @@ from pulpcore.plugin.models import (
     Content,
     Remote,
     Repository,
+    RepositoryContent,
+    RepositoryVersion,
     Distribution,
     SigningService,
     Upload as CoreUpload,
@@ -264,6 +270,111 @@ class Tag(Content):
         unique_together = (("name", "tagged_manifest"),)
 
 
+class RepositoryVersionTag(models.Model):
+    """
+    The name of a tag contained in a repository version.
+
+    The names are materialized when a repository version is created so that the tags of the
+    version can be listed page by page in order of their names using an index.
+
+    Fields:
+        name (models.TextField): The tag name.
+
+    Relations:
+        repository_version (models.ForeignKey): The repository version containing the tag.
+    """
+
+    name = models.TextField()
+
+    repository_version = models.ForeignKey(
+        RepositoryVersion, related_name="container_tags", on_delete=models.CASCADE
+    )
+
+    class Meta:
+        unique_together = ("repository_version", "name")
+
+
+class RepositoryVersionTagIndex(models.Model):
+    """
+    A marker of a repository version whose tag names are materialized.
+
+    Versions without tags are indexed once too; the marker tells them apart from the versions
+    which were not indexed yet.
+
+    Relations:
+        repository_version (models.OneToOneField): The indexed repository version.
+    """
+
+    repository_version = models.OneToOneField(
+        RepositoryVersion,
+        primary_key=True,
+        related_name="container_tag_index",
+        on_delete=models.CASCADE,
+    )
+
+
+def has_indexed_tag_names(repository_version):
+    """Check whether the tag names of the passed repository version are materialized."""
+    return RepositoryVersionTagIndex.objects.filter(repository_version=repository_version).exists()
+
+
+def index_tag_names(repository_version, replace=False):
+    """
+    Materialize the names of the tags contained in the passed repository version.
+
+    When the tag names of the previous version are materialized and are to be replaced, they are
+    moved to the new version and only the names of the added and removed tags are applied.
+
+    Args:
+        repository_version (pulpcore.app.models.RepositoryVersion): The version to index.
+        replace (bool): Whether to drop the tag names of the other versions of the repository;
+            their tags are listed from the content of the versions instead.
+
+    """
+    previous_version = None
+    if replace:
+        with suppress(RepositoryVersion.DoesNotExist):
+            previous_version = repository_version.previous()
+
+    with transaction.atomic():
+        if previous_version is not None and has_indexed_tag_names(previous_version):
+            tag_names = (
+                Tag.objects.filter(pk__in=repository_version.added())
+                .values_list("name", flat=True)
+                .distinct()
+            )
+            removed_names = Tag.objects.filter(pk__in=repository_version.removed()).values("name")
+            previous_tags = RepositoryVersionTag.objects.filter(repository_version=previous_version)
+            previous_tags.filter(name__in=removed_names).delete()
+            previous_tags.update(repository_version=repository_version)
+        else:
+            tag_names = (
+                Tag.objects.filter(pk__in=repository_version.content)
+                .values_list("name", flat=True)
+                .distinct()
+            )
+
+        if replace:
+            RepositoryVersionTag.objects.filter(
+                repository_version__repository=repository_version.repository
+            ).exclude(repository_version=repository_version).delete()
+            RepositoryVersionTagIndex.objects.filter(
+                repository_version__repository=repository_version.repository
+            ).exclude(repository_version=repository_version).delete()
+        RepositoryVersionTag.objects.bulk_create(
+            (
+                RepositoryVersionTag(repository_version=repository_version, name=name)
+                for name in tag_names.iterator()
+            ),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        RepositoryVersionTagIndex.objects.bulk_create(
+            [RepositoryVersionTagIndex(repository_version=repository_version)],
+            ignore_conflicts=True,
+        )
+
+
 class ManifestSignature(Content):
     """
     A signature for a manifest.
@@ -610,6 +721,7 @@ class ContainerRepository(
         remove_duplicates(new_version)
         validate_repo_version(new_version)
         self.remove_pending_content(new_version)
+        index_tag_names(new_version, replace=True)
 
     def remove_pending_content(self, repository_version):
         """Remove pending blobs and manifests when committing the content to the repository."""
@@ -619,6 +731,16 @@ class ContainerRepository(
         self.pending_blobs.remove(*Blob.objects.filter(pk__in=added_content))
         self.pending_manifests.remove(*Manifest.objects.filter(pk__in=added_content))
 
+    def on_new_version(self, version):
+        """
+        Invalidate the cache once the new version is complete.
+
+        The cache is invalidated when the version is created as well, but responses and resolved
+        distributions cached before the version was completed still refer to the previous one.
+        """
+        super().on_new_version(version)
+        self.invalidate_cache()
+
 
 class ContainerPushRepository(Repository, AutoAddObjPermsMixin):
     """
@@ -643,6 +765,21 @@ class ContainerPushRepository(Repository, AutoAddObjPermsMixin):
     )
     pending_blobs = models.ManyToManyField(Blob)
     pending_manifests = models.ManyToManyField(Manifest)
+    push_commit_window = models.PositiveIntegerField(
+        default=0,
+        help_text=_(
+            "The number of milliseconds tags pushed to the repository are collected for before "
+            "they are added to a single repository version. Pushed tags are served in the "
+            "meantime. Defaults to 0, creating a repository version for every push."
+        ),
+    )
+    push_commit_size = models.PositiveIntegerField(
+        default=0,
+        help_text=_(
+            "The number of pushed tags which closes the commit window early. "
+            "Defaults to 0, collecting the tags for the whole window."
+        ),
+    )
 
     class Meta:
         default_related_name = "%(app_label)s_%(model_name)s"
@@ -664,6 +801,7 @@ class ContainerPushRepository(Repository, AutoAddObjPermsMixin):
         remove_duplicates(new_version)
         validate_repo_version(new_version)
         self.remove_pending_content(new_version)
+        index_tag_names(new_version, replace=True)
 
     def remove_pending_content(self, repository_version):
         """Remove pending blobs and manifests when committing the content to the repository."""
@@ -673,6 +811,147 @@ class ContainerPushRepository(Repository, AutoAddObjPermsMixin):
         self.pending_blobs.remove(*Blob.objects.filter(pk__in=added_content))
         self.pending_manifests.remove(*Manifest.objects.filter(pk__in=added_content))
 
+    def on_new_version(self, version):
+        """
+        Invalidate the cache once the new version is complete.
+
+        The cache is invalidated when the version is created as well, but responses and resolved
+        distributions cached before the version was completed still refer to the previous one.
+        """
+        super().on_new_version(version)
+        self.invalidate_cache()
+
+
+class PendingTag(models.Model):
+    """
+    A tag pushed to a repository which has not been added to a repository version yet.
+
+    The tags are recorded in the order they were pushed, so that the last push of a tag name wins
+    once the pending tags are added to the repository in a batch.
+
+    Fields:
+        pushed_at (models.DateTimeField): The time the tag was pushed at.
+
+    Relations:
+        repository (models.ForeignKey): The repository the tag was pushed to.
+        tag (models.ForeignKey): The pushed tag.
+    """
+
+    pushed_at = models.DateTimeField(auto_now_add=True)
+
+    repository = models.ForeignKey(
+        ContainerPushRepository, related_name="pending_tags", on_delete=models.CASCADE
+    )
+    tag = models.ForeignKey(Tag, related_name="pending_pushes", on_delete=models.CASCADE)
+
+
+def get_pending_tag(repository, name):
+    """
+    Return the tag of the name last pushed to the repository that is not in a version yet.
+
+    Args:
+        repository (pulpcore.plugin.models.Repository): The repository the tag was pushed to;
+            None for distributions serving a fixed repository version.
+        name (str): The name of the tag.
+
+    Returns:
+        The pending :class:`Tag` with its tagged manifest, or None if there is no such tag.
+
+    """
+    if not is_push_repository(repository):
+        return None
+    pending_tag = (
+        PendingTag.objects.select_related("tag__tagged_manifest")
+        .filter(repository_id=repository.pk, tag__name=name)
+        .order_by("-pk")
+        .first()
+    )
+    return pending_tag and pending_tag.tag
+
+
+def get_pending_tags(repository):
+    """
+    Return the tags pushed to the repository that are not in a version yet.
+
+    Args:
+        repository (pulpcore.plugin.models.Repository): The repository the tags were pushed to;
+            None for distributions serving a fixed repository version.
+
+    Returns:
+        django.db.models.QuerySet: The pending tags; a tag name can be pushed more than once.
+
+    """
+    if not is_push_repository(repository):
+        return Tag.objects.none()
+    return Tag.objects.filter(pending_pushes__repository_id=repository.pk)
+
+
+def is_push_repository(repository):
+    """Check whether tags can be pending in the repository."""
+    return (
+        repository is not None and repository.pulp_type == ContainerPushRepository.get_pulp_type()
+    )
+
+
+def filter_pushed_content(queryset, repository_version, pending=None):
+    """
+    Filter the content present in the repository version or pending in the repository.
+
+    The membership of every content unit is checked with an indexed lookup instead of
+    comparing the queryset with all the content of the repository, so the cost of the query
+    grows with the number of referenced content units and not with the size of the repository.
+
+    Args:
+        queryset (django.db.models.QuerySet): The content units to filter, e.g. the ones
+            referenced by a pushed manifest.
+        repository_version (pulpcore.plugin.models.RepositoryVersion): The version of the
+            repository the content is looked up in.
+        pending (django.db.models.Manager): The related manager of the pending content.
+
+    """
+    memberships = RepositoryContent.objects.filter(
+        Q(version_removed=None) | Q(version_removed__number__gt=repository_version.number),
+        repository_id=repository_version.repository_id,
+        content_id=OuterRef("pk"),
+        version_added__number__lte=repository_version.number,
+    )
+    is_present = Exists(memberships)
+    if pending is not None:
+        pending_content = pending.through.objects.filter(
+            **{
+                pending.source_field_name: pending.instance.pk,
+                pending.target_field_name: OuterRef("pk"),
+            }
+        )
+        is_present |= Exists(pending_content)
+    return queryset.filter(is_present)
+
+
+@receiver(post_delete, sender=RepositoryVersion)
+def invalidate_deleted_version_cache(sender, instance, **kwargs):
+    """
+    Invalidate the cache of the distributions serving the latest version of the repository.
+
+    The resolved distributions cached under their base paths refer to the served repository
+    version, which may be the deleted one. pulpcore invalidates only the distributions serving
+    the deleted version explicitly.
+    """
+    if settings.CACHE_ENABLED:
+        repository_pk = instance.repository_id
+        transaction.on_commit(lambda: _invalidate_repository_cache(repository_pk))
+
+
+def _invalidate_repository_cache(repository_pk):
+    repository = Repository.objects.filter(
+        pk=repository_pk,
+        pulp_type__in=[
+            ContainerRepository.get_pulp_type(),
+            ContainerPushRepository.get_pulp_type(),
+        ],
+    ).first()
+    if repository is not None:
+        repository.invalidate_cache()
+
 
 class ContainerPullThroughDistribution(Distribution, AutoAddObjPermsMixin):
     """
@@ -696,6 +975,22 @@ class ContainerPullThroughDistribution(Distribution, AutoAddObjPermsMixin):
         ),
     )
     description = models.TextField(null=True)
+    tag_freshness_ttl = models.PositiveIntegerField(
+        default=0,
+        help_text=_(
+            "The number of seconds a cached tag is served without checking the remote for "
+            "a newer manifest. Expired tags are served while being refreshed in the background. "
+            "Defaults to 0, checking the remote on every request."
+        ),
+    )
+
+    @hook(AFTER_UPDATE, when="tag_freshness_ttl", has_changed=True)
+    def invalidate_resolved_distributions(self):
+        """Invalidates the cache of the distributions carrying the freshness of their tags."""
+        if settings.CACHE_ENABLED:
+            base_paths = list(self.distributions.values_list("base_path", flat=True))
+            if base_paths:
+                SyncContentCache().delete(base_key=base_paths)
 
     class Meta:
         default_related_name = "%(app_label)s_%(model_name)s"
@@ -780,6 +1075,22 @@ class ContainerDistribution(Distribution, AutoAddObjPermsMixin):
         if settings.CACHE_ENABLED:
             SyncContentCache().delete(base_key="/index/static")
 
+    @hook(
+        AFTER_UPDATE,
+        when_any=["base_path", "namespace", "private", "pull_through_distribution"],
+        has_changed=True,
+    )
+    def invalidate_resolved_distribution(self):
+        """Invalidates the cache stored under the previous and the current base path."""
+        if settings.CACHE_ENABLED:
+            SyncContentCache().delete(base_key=[self.initial_value("base_path"), self.base_path])
+
+    @hook(AFTER_CREATE)
+    def invalidate_not_found_cache(self):
+        """Invalidates the "not found" responses cached for the base path before it existed."""
+        if settings.CACHE_ENABLED:
+            SyncContentCache().delete(base_key=self.base_path)
+
     class Meta:
         default_related_name = "%(app_label)s_%(model_name)s"
         permissions = [
@@ -804,9 +1115,22 @@ def generate_filename(instance, filename):
 class Upload(CoreUpload):
     """
     Model for tracking Blob uploads.
+
+    Fields:
+        file (models.FileField): The staging file the chunks are appended to when the uploads are
+            stored on the local filesystem.
     """
 
+    upload_dir = "upload"
+
     repository = models.ForeignKey(Repository, related_name="uploads", on_delete=models.CASCADE)
     artifact = models.ForeignKey(
         Artifact, related_name="uploads", null=True, on_delete=models.SET_NULL
     )
+    file = models.FileField(upload_to=generate_filename, null=True, max_length=255)
+
+    @hook(AFTER_DELETE)
+    def delete_staging_file(self):
+        """Remove the staging file unless it was promoted to an artifact."""
+        if self.file:
+            self.file.delete(save=False)
@@ -3,10 +3,14 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.http import Http404
 from django.shortcuts import redirect
 
+from pulp_container.app.cache import LocalCache
 from pulp_container.app.exceptions import ManifestNotFound
 from pulp_container.app.utils import get_accepted_media_types
 from pulp_container.constants import BLOB_CONTENT_TYPE, MEDIA_TYPE
 
+# (content pk, media type, HTTP method) -> the signed URL of the content's artifact
+signed_urls = LocalCache(max_size=settings.REDIRECT_URL_CACHE_SIZE)
+
 
 class CommonRedirects:
     """
@@ -29,6 +33,12 @@ class CommonRedirects:
             f"{settings.CONTENT_ORIGIN}/pulp/container/{self.path}/{content_type}/{content_id}"
         )
 
+    def issue_pending_tag_redirect(self, tag):
+        """
+        Issue a redirect for a pushed tag which has not been added to a repository version yet.
+        """
+        return self.issue_tag_redirect(tag)
+
 
 class FileStorageRedirects(CommonRedirects):
     """
@@ -39,6 +49,23 @@ class FileStorageRedirects(CommonRedirects):
         """
         Issue a redirect for the passed tag.
         """
+        self.validate_tag_media_type(tag)
+        return self.redirect_to_content_app("manifests", tag.name)
+
+    def issue_pending_tag_redirect(self, tag):
+        """
+        Issue a redirect for a pushed tag which has not been added to a repository version yet.
+
+        The content app looks tags up in repository versions only, so the tagged manifest is
+        referenced by its digest, which is looked up in the pending content as well.
+        """
+        self.validate_tag_media_type(tag)
+        return self.issue_manifest_redirect(tag.tagged_manifest)
+
+    def validate_tag_media_type(self, tag):
+        """
+        Check if the client accepts the media type of the tagged manifest.
+        """
         manifest_media_type = tag.tagged_manifest.media_type
         if (
             manifest_media_type not in get_accepted_media_types(self.request.headers)
@@ -46,8 +73,6 @@ class FileStorageRedirects(CommonRedirects):
         ):
             raise ManifestNotFound(reference=tag.name)
 
-        return self.redirect_to_content_app("manifests", tag.name)
-
     def issue_manifest_redirect(self, manifest):
         """
         Issue a redirect for the passed manifest.
@@ -92,36 +117,58 @@ class S3StorageRedirects(CommonRedirects):
         Search for the passed manifest's artifact and issue a redirect.
         """
         try:
-            artifact = manifest._artifacts.get()
+            return self.redirect_to_signed_url(manifest, manifest_media_type)
         except ObjectDoesNotExist:
             raise Http404(f"An artifact for '{content_name}' was not found")
 
-        return self.redirect_to_object_storage(artifact, manifest_media_type)
-
     def issue_blob_redirect(self, blob):
         """
         Redirect to the passed blob or stream content when an associated artifact is not present.
         """
         try:
-            artifact = blob._artifacts.get()
+            return self.redirect_to_signed_url(blob, BLOB_CONTENT_TYPE)
         except ObjectDoesNotExist:
             return self.redirect_to_content_app("blobs", blob.digest)
 
-        return self.redirect_to_object_storage(artifact, BLOB_CONTENT_TYPE)
+    def redirect_to_signed_url(self, content, return_media_type):
+        """
+        Redirect to the signed URL of the passed content's artifact.
+
+        Signed URLs are reused for a fraction of their validity, which spares both the query for
+        the artifact and the signing.
+
+        Raises:
+            django.core.exceptions.ObjectDoesNotExist: When the content has no artifact.
+
+        """
+        key = (content.pk, return_media_type, self.request.method)
+        content_url = signed_urls.get(key)
+        if content_url is None:
+            artifact = content._artifacts.get()
+            content_url = self.get_signed_url(artifact, return_media_type)
+            expiration = self.get_url_expiration()
+            if expiration is not None:
+                expiration *= settings.REDIRECT_URL_CACHE_TTL_FRACTION
+            signed_urls.set(key, content_url, expiration)
+        return redirect(content_url)
 
-    def redirect_to_object_storage(self, artifact, return_media_type):
+    def get_signed_url(self, artifact, return_media_type):
         """
-        Redirect to the passed artifact's file stored in the S3 storage.
+        Sign a URL of the passed artifact's file stored in the S3 storage.
         """
         filename = f"sha256:{artifact.sha256}"
         parameters = {
             "ResponseContentType": return_media_type,
             "ResponseContentDisposition": f"attachment;filename={filename}",
         }
-        content_url = artifact.file.storage.url(
+        return artifact.file.storage.url(
             artifact.file.name, parameters=parameters, http_method=self.request.method
         )
-        return redirect(content_url)
+
+    @staticmethod
+    def get_url_expiration():
+        """Return the number of seconds the signed URLs are valid for."""
+        return getattr(settings, "AWS_QUERYSTRING_EXPIRE", 3600)
 
 
 class AzureStorageRedirects(S3StorageRedirects):
@@ -129,14 +176,18 @@ class AzureStorageRedirects(S3StorageRedirects):
     A class that implements methods for the direct retrieval of manifest objects.
     """
 
-    def redirect_to_object_storage(self, artifact, return_media_type):
+    def get_signed_url(self, artifact, return_media_type):
         """
-        Redirect to the passed artifact's file stored in the Azure storage.
+        Sign a URL of the passed artifact's file stored in the Azure storage.
         """
         filename = f"sha256:{artifact.sha256}"
         parameters = {
             "content_type": return_media_type,
             "content_disposition": f"attachment;filename={filename}",
         }
-        content_url = artifact.file.storage.url(artifact.file.name, parameters=parameters)
-        return redirect(content_url)
+        return artifact.file.storage.url(artifact.file.name, parameters=parameters)
+
+    @staticmethod
+    def get_url_expiration():
+        """Return the number of seconds the signed URLs are valid for, if they expire at all."""
+        return getattr(settings, "AZURE_URL_EXPIRATION_SECS", None)
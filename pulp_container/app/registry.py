@@ -1,10 +1,12 @@
+import asyncio
 import json
 import logging
 import os
+import time
 
 from asgiref.sync import sync_to_async
 
-from contextlib import suppress
+from collections import namedtuple
 from urllib.parse import urljoin
 
 from aiohttp import web
@@ -14,16 +16,37 @@ from django_guid import set_guid
 from django_guid.utils import generate_guid
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import IntegrityError
+from django.db import transaction
+from django.db.models import F, Q
 from multidict import MultiDict
 
 from pulpcore.plugin.content import Handler, PathNotResolved
-from pulpcore.plugin.models import RemoteArtifact, Content, ContentArtifact
-from pulpcore.plugin.content import ArtifactResponse
+from pulpcore.plugin.models import RemoteArtifact, ContentArtifact
 from pulpcore.plugin.tasking import dispatch
 
-from pulp_container.app.cache import RegistryContentCache
-from pulp_container.app.models import ContainerDistribution, Tag, Blob, Manifest, BlobManifest
+from pulp_container.app.cache import (
+    LocalCache,
+    RegistryContentCache,
+    SharedCache,
+    SingleFlight,
+    invalidate_not_found_entries,
+    resolve_distribution,
+)
+from pulp_container.app.models import (
+    ContainerDistribution,
+    Tag,
+    Blob,
+    Manifest,
+    BlobManifest,
+    get_pending_tag,
+)
+from pulp_container.app.responses import (
+    RegistryArtifactResponse,
+    RegistryFileResponse,
+    RegistryResponse,
+    StoringStreamResponse,
+    evaluate_conditional_request,
+)
 from pulp_container.app.tasks import download_image_data
 from pulp_container.app.utils import (
     calculate_digest,
@@ -35,6 +58,37 @@ from pulp_container.constants import BLOB_CONTENT_TYPE, EMPTY_BLOB, MEDIA_TYPE,
 
 log = logging.getLogger(__name__)
 
+ResolvedTag = namedtuple("ResolvedTag", "digest, media_type, artifact")
+
+# (distribution base_path, repository version pk, tag name) -> ResolvedTag; a new repository
+# version always gets a new pk, so publishing content makes the stale entries unreachable
+resolved_tags = LocalCache(max_size=settings.TAG_RESOLUTION_CACHE_SIZE)
+
+# (remote pk, tag name or digest) -> the manifest being downloaded by a pull-through distribution
+manifest_downloads = SingleFlight(namespace="pull_through_manifests")
+
+# the number of seconds the time of the last validation of a pull-through tag is remembered
+VALIDATED_TAG_TTL = 24 * 60 * 60
+
+# "distribution pk:tag name" -> the time when the tag was last validated against the remote;
+# the times are shared by all workers, tags without a remembered time are validated before serving
+validated_tags = SharedCache(
+    namespace="pull_through_validated_tags",
+    max_size=settings.TAG_RESOLUTION_CACHE_SIZE,
+    ttl=VALIDATED_TAG_TTL,
+)
+tag_revalidations = SingleFlight(namespace="pull_through_tags")
+# references to the running background tasks preventing them from being garbage collected
+background_tasks = set()
+
+
+def run_in_background(coroutine):
+    """Schedule the coroutine without waiting for its result."""
+    task = asyncio.ensure_future(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
 
 class Registry(Handler):
     """
@@ -87,9 +141,9 @@ class Registry(Handler):
             path = os.path.join(settings.MEDIA_ROOT, file.name)
             if not os.path.exists(path):
                 raise Exception("Expected path '{}' is not found".format(path))
-            return web.FileResponse(path, headers=full_headers)
+            return RegistryFileResponse(path, headers=full_headers)
         elif not settings.REDIRECT_TO_OBJECT_STORAGE:
-            return ArtifactResponse(artifact=artifact, headers=headers)
+            return RegistryArtifactResponse(artifact=artifact, headers=headers)
         else:
             raise NotImplementedError("Redirecting to this storage is not implemented.")
 
@@ -116,19 +170,36 @@ class Registry(Handler):
 
         path = request.match_info["path"]
         tag_name = request.match_info["tag_name"]
-        distribution = await sync_to_async(self._match_distribution)(path, add_trailing_slash=False)
-        await sync_to_async(self._permit)(request, distribution)
-        repository_version = await sync_to_async(distribution.get_repository_version)()
+        distribution, repository, repository_version = await self._match_tag_distribution(
+            request, path
+        )
         if not repository_version:
             raise PathNotResolved(tag_name)
 
-        distribution = await distribution.acast()
+        # a pushed tag is served before the task adding it to a repository version finishes
+        if pending_tag := await sync_to_async(get_pending_tag)(repository, tag_name):
+            response_headers = self._get_tag_response_headers(
+                request,
+                tag_name,
+                pending_tag.tagged_manifest.media_type,
+                pending_tag.tagged_manifest.digest,
+            )
+            return await self.dispatch_tag(request, pending_tag, response_headers)
+
+        is_pull_through = distribution.remote_id and distribution.pull_through_distribution_id
+        cache_key = (distribution.base_path, repository_version.pk, tag_name)
+        if not is_pull_through and (resolved_tag := resolved_tags.get(cache_key)):
+            response_headers = self._get_tag_response_headers(
+                request, tag_name, resolved_tag.media_type, resolved_tag.digest
+            )
+            return await Registry._dispatch(resolved_tag.artifact, response_headers)
+
         try:
             tag = await Tag.objects.select_related("tagged_manifest").aget(
                 pk__in=await sync_to_async(repository_version.get_content)(), name=tag_name
             )
         except ObjectDoesNotExist:
-            if distribution.remote_id and distribution.pull_through_distribution_id:
+            if is_pull_through:
                 pull_downloader = await PullThroughDownloader.create(
                     distribution, repository_version, path, tag_name
                 )
@@ -140,16 +211,92 @@ class Registry(Handler):
                     "Docker-Content-Digest": digest,
                     "Docker-Distribution-API-Version": "registry/2.0",
                 }
-                return web.Response(text=raw_manifest, headers=headers)
+                return RegistryResponse(text=raw_manifest, headers=headers)
             else:
                 raise PathNotResolved(tag_name)
 
         # check if the content is pulled via the pull-through caching distribution;
         # if yes, update the respective manifest from the remote when its digest changed
-        if distribution.remote_id and distribution.pull_through_distribution_id:
+        if is_pull_through:
+            validated_at = await validated_tags.get(f"{distribution.pk}:{tag_name}")
+            freshness_ttl = distribution.pull_through_distribution.tag_freshness_ttl
+
+            if validated_at is None or not freshness_ttl:
+                updated_manifest = await self._revalidate_tag(
+                    distribution, repository_version, path, tag
+                )
+                if updated_manifest is not None:
+                    raw_manifest, digest, media_type = updated_manifest
+                    headers = {
+                        "Content-Type": media_type,
+                        "Docker-Content-Digest": digest,
+                        "Docker-Distribution-API-Version": "registry/2.0",
+                    }
+                    return RegistryResponse(text=raw_manifest, headers=headers)
+            elif time.time() - validated_at > freshness_ttl:
+                # serve the stale tag while a single request refreshes it in the background; the
+                # tag is considered fresh until the refresh finds a different manifest
+                await validated_tags.set(f"{distribution.pk}:{tag_name}", time.time())
+                run_in_background(
+                    self._revalidate_tag_in_background(distribution, repository_version, path, tag)
+                )
+
+        response_headers = self._get_tag_response_headers(
+            request, tag_name, tag.tagged_manifest.media_type, tag.tagged_manifest.digest
+        )
+        return await self.dispatch_tag(
+            request, tag, response_headers, cache_key=None if is_pull_through else cache_key
+        )
+
+    async def _match_tag_distribution(self, request, path):
+        """
+        Match the distribution, permit the request, and get the served repository version.
+
+        The distribution is resolved from the cache shared with the registry API, so that a tag
+        resolved by this worker before is served without querying the database; the cached
+        resolution is invalidated whenever the served repository version changes. Pull-through
+        distributions are loaded from the database since their remotes are needed as well.
+
+        Returns:
+            tuple: The distribution, its repository, and the served repository version.
+
+        """
+        resolved = await sync_to_async(resolve_distribution)(path)
+        if resolved is not None and not (
+            resolved[0].remote_id and resolved[0].pull_through_distribution_id
+        ):
+            distribution, repository, repository_version = resolved
+        else:
+            distribution = await sync_to_async(self._match_distribution)(
+                path, add_trailing_slash=False
+            )
+            repository = distribution.repository
+            repository_version = await sync_to_async(distribution.get_repository_version)()
+            distribution = await distribution.acast()
+            if resolved is not None:
+                # the freshness of the tags is configured on the pull-through distribution
+                distribution.pull_through_distribution = resolved[0].pull_through_distribution
+        await sync_to_async(self._permit)(request, distribution)
+        return distribution, repository, repository_version
+
+    @staticmethod
+    async def _revalidate_tag(distribution, repository_version, path, tag):
+        """
+        Check if the tag still references the same manifest on the remote.
+
+        Concurrent checks of the same tag are coalesced. When the digest of the manifest changed,
+        the new manifest is downloaded.
+
+        Returns:
+            tuple: The raw manifest, its digest, and its media type if the manifest changed or
+                None otherwise.
+
+        """
+
+        async def revalidate():
             remote = await distribution.remote.acast()
             relative_url = "/v2/{name}/manifests/{tag}".format(
-                name=remote.namespaced_upstream_name, tag=tag_name
+                name=remote.namespaced_upstream_name, tag=tag.name
             )
             tag_url = urljoin(remote.url, relative_url)
             downloader = remote.get_downloader(url=tag_url)
@@ -160,32 +307,53 @@ class Registry(Handler):
             except ClientResponseError:
                 # the manifest is not available on the remote anymore
                 # but the old one is still stored in the database
-                pass
-            else:
-                digest = response.headers.get("docker-content-digest")
-                if tag.tagged_manifest.digest != digest:
-                    pull_downloader = await PullThroughDownloader.create(
-                        distribution, repository_version, path, tag_name
-                    )
-                    pull_downloader.downloader = downloader
-                    raw_manifest, digest, media_type = await pull_downloader.download_manifest(
-                        run_pipeline=True
-                    )
-                    headers = {
-                        "Content-Type": media_type,
-                        "Docker-Content-Digest": digest,
-                        "Docker-Distribution-API-Version": "registry/2.0",
-                    }
-                    return web.Response(text=raw_manifest, headers=headers)
+                return None
+
+            digest = response.headers.get("docker-content-digest")
+            if tag.tagged_manifest.digest == digest:
+                await validated_tags.set(f"{distribution.pk}:{tag.name}", time.time())
+                return None
 
+            await validated_tags.delete(f"{distribution.pk}:{tag.name}")
+            pull_downloader = await PullThroughDownloader.create(
+                distribution, repository_version, path, tag.name
+            )
+            pull_downloader.downloader = downloader
+            return await pull_downloader.download_manifest(run_pipeline=True)
+
+        key = f"{distribution.remote_id}:{tag.name}"
+        return await tag_revalidations.run(key, revalidate)
+
+    @staticmethod
+    async def _revalidate_tag_in_background(distribution, repository_version, path, tag):
+        try:
+            await Registry._revalidate_tag(distribution, repository_version, path, tag)
+        except Exception as exc:
+            log.warning("Failed to refresh the tag {}: {}".format(tag.name, exc))
+
+    @staticmethod
+    def _get_tag_response_headers(request, tag_name, media_type, digest):
+        """
+        Negotiate the media type of a tagged manifest with the client.
+
+        Args:
+            request(:class:`~aiohttp.web.Request`): The request to prepare a response for.
+            tag_name (str): The name of the requested tag.
+            media_type (str): The media type of the tagged manifest.
+            digest (str): The digest of the tagged manifest.
+
+        Raises:
+            PathNotResolved: The client does not accept the manifest's media type.
+
+        Returns:
+            dict: The 'Content-Type' and 'Docker-Content-Digest' headers to send with the response.
+
+        """
         accepted_media_types = get_accepted_media_types(request.headers)
 
         # we do not convert OCI to docker
         oci_mediatypes = [MEDIA_TYPE.MANIFEST_OCI, MEDIA_TYPE.INDEX_OCI]
-        if (
-            tag.tagged_manifest.media_type in oci_mediatypes
-            and tag.tagged_manifest.media_type not in accepted_media_types
-        ):
+        if media_type in oci_mediatypes and media_type not in accepted_media_types:
             log.warn(
                 "OCI format found, but the client only accepts {accepted_media_types}.".format(
                     accepted_media_types=accepted_media_types
@@ -194,27 +362,23 @@ class Registry(Handler):
             raise PathNotResolved(tag_name)
 
         # return schema1 (even in case only oci is requested)
-        if tag.tagged_manifest.media_type == MEDIA_TYPE.MANIFEST_V1:
-            return_media_type = MEDIA_TYPE.MANIFEST_V1_SIGNED
-            response_headers = {
-                "Content-Type": return_media_type,
-                "Docker-Content-Digest": tag.tagged_manifest.digest,
+        if media_type == MEDIA_TYPE.MANIFEST_V1:
+            return {
+                "Content-Type": MEDIA_TYPE.MANIFEST_V1_SIGNED,
+                "Docker-Content-Digest": digest,
             }
-            return await self.dispatch_tag(request, tag, response_headers)
 
         # return what was found in case media_type is accepted header (docker, oci)
-        if tag.tagged_manifest.media_type in accepted_media_types:
-            return_media_type = tag.tagged_manifest.media_type
-            response_headers = {
-                "Content-Type": return_media_type,
-                "Docker-Content-Digest": tag.tagged_manifest.digest,
+        if media_type in accepted_media_types:
+            return {
+                "Content-Type": media_type,
+                "Docker-Content-Digest": digest,
             }
-            return await self.dispatch_tag(request, tag, response_headers)
 
         # return 404 in case the client is requesting docker manifest v2 schema 1
         raise PathNotResolved(tag_name)
 
-    async def dispatch_tag(self, request, tag, response_headers):
+    async def dispatch_tag(self, request, tag, response_headers, cache_key=None):
         """
         Finds an artifact associated with a Tag and sends it to the client, otherwise tries
         to stream it.
@@ -224,6 +388,7 @@ class Registry(Handler):
             tag: Tag
             response_headers (dict): dictionary that contains the 'Content-Type' header to send
                 with the response
+            cache_key (tuple): A key under which the resolved tag is remembered by this worker
 
         Returns:
             :class:`aiohttp.web.StreamResponse` or :class:`aiohttp.web.FileResponse`: The response
@@ -234,8 +399,14 @@ class Registry(Handler):
             artifact = await tag.tagged_manifest._artifacts.aget()
         except ObjectDoesNotExist:
             ca = await sync_to_async(lambda x: x[0])(tag.tagged_manifest.contentartifact_set.all())
+            request = evaluate_conditional_request(request, tag.tagged_manifest.digest)
             return await self._stream_content_artifact(request, web.StreamResponse(), ca)
         else:
+            if cache_key is not None:
+                resolved_tag = ResolvedTag(
+                    tag.tagged_manifest.digest, tag.tagged_manifest.media_type, artifact
+                )
+                resolved_tags.set(cache_key, resolved_tag)
             return await Registry._dispatch(artifact, response_headers)
 
     @RegistryContentCache(
@@ -256,25 +427,8 @@ class Registry(Handler):
         if digest == EMPTY_BLOB:
             return await Registry._empty_blob()
 
-        repository = await repository_version.repository.acast()
-        pending_blobs = repository.pending_blobs.values_list("pk")
-        pending_manifests = repository.pending_manifests.values_list("pk")
-        pending_content = pending_blobs.union(pending_manifests)
-        content = repository_version.content | Content.objects.filter(pk__in=pending_content)
-
         try:
-            ca = await ContentArtifact.objects.select_related("artifact", "content").aget(
-                content__in=content, relative_path=digest
-            )
-            ca_content = await sync_to_async(ca.content.cast)()
-            if isinstance(ca_content, Blob):
-                media_type = BLOB_CONTENT_TYPE
-            else:
-                media_type = ca_content.media_type
-            headers = {
-                "Content-Type": media_type,
-                "Docker-Content-Digest": ca_content.digest,
-            }
+            ca = await Registry._get_content_artifact_by_digest(repository_version, digest)
         except ObjectDoesNotExist:
             distribution = await distribution.acast()
             if distribution.remote_id and distribution.pull_through_distribution_id:
@@ -291,14 +445,15 @@ class Registry(Handler):
                         "Docker-Content-Digest": digest,
                         "Docker-Distribution-API-Version": "registry/2.0",
                     }
-                    return web.Response(text=raw_manifest, headers=headers)
+                    return RegistryResponse(text=raw_manifest, headers=headers)
                 elif content_type == "blobs":
                     # there might be a case where the client has all the manifest data in place
                     # and tries to download only missing blobs; because of that, only the reference
                     # to a remote blob is returned (i.e., RemoteArtifact)
                     blob = await pull_downloader.init_remote_blob()
                     ca = await blob.contentartifact_set.afirst()
-                    return await self._stream_content_artifact(request, web.StreamResponse(), ca)
+                    request = evaluate_conditional_request(request, digest)
+                    return await self._stream_and_store(request, ca)
                 else:
                     raise RuntimeError("Only blobs or manifests are supported by the parser.")
             else:
@@ -306,10 +461,68 @@ class Registry(Handler):
         else:
             artifact = ca.artifact
             if artifact:
+                headers = {
+                    "Content-Type": ca.manifest_media_type or BLOB_CONTENT_TYPE,
+                    "Docker-Content-Digest": digest,
+                }
                 return await Registry._dispatch(artifact, headers)
             else:
+                request = evaluate_conditional_request(request, digest)
+                distribution = await distribution.acast()
+                if distribution.remote_id and distribution.pull_through_distribution_id:
+                    return await self._stream_and_store(request, ca)
                 return await self._stream_content_artifact(request, web.StreamResponse(), ca)
 
+    async def _stream_and_store(self, request, ca):
+        """
+        Stream the content from the remote of a pull-through distribution and store it locally.
+
+        The downloaded data is written to the storage while being sent to the client and its
+        sha256 digest is verified on the fly. Once the download finishes, the data is saved as
+        an artifact and attached to the content artifact, so the next requests are served
+        locally. The download runs to completion even if the client disconnects.
+
+        Args:
+            request(:class:`~aiohttp.web.Request`): The request to prepare a response for.
+            ca (:class:`~pulpcore.plugin.models.ContentArtifact`): The content artifact to stream.
+
+        Returns:
+            :class:`~pulp_container.app.responses.StoringStreamResponse`: The streamed response.
+
+        """
+        response = StoringStreamResponse()
+        return await asyncio.shield(self._stream_content_artifact(request, response, ca))
+
+    @staticmethod
+    async def _get_content_artifact_by_digest(repository_version, digest):
+        """
+        Find the content artifact of a blob or manifest by its digest with a single query.
+
+        Both the content of the repository version and the pending content of its repository are
+        considered. The returned content artifact carries the related artifact and the attribute
+        `manifest_media_type` which is None for blobs.
+
+        Raises:
+            ObjectDoesNotExist: When no such blob or manifest is available.
+
+        """
+        repository = repository_version.repository
+        # the pending content is referenced by the detail repository; reference it by the primary
+        # key instead of casting the repository to save a query
+        detail_repository = repository.detail_model(pk=repository.pk)
+        pending_content = detail_repository.pending_blobs.values_list("pk").union(
+            detail_repository.pending_manifests.values_list("pk")
+        )
+
+        return await (
+            ContentArtifact.objects.select_related("artifact")
+            .annotate(manifest_media_type=F("content__container_manifest__media_type"))
+            .aget(
+                Q(content__in=repository_version.content) | Q(content__in=pending_content),
+                relative_path=digest,
+            )
+        )
+
     @staticmethod
     async def _empty_blob():
         # fmt: off
@@ -324,7 +537,7 @@ class Registry(Handler):
             "Content-Type": BLOB_CONTENT_TYPE,
             "Docker-Distribution-API-Version": "registry/2.0",
         }
-        return web.Response(body=body, headers=response_headers)
+        return RegistryResponse(body=body, headers=response_headers)
 
 
 class PullThroughDownloader:
@@ -344,9 +557,27 @@ class PullThroughDownloader:
         return cls(distribution, remote, repository, repository_version, path, identifier)
 
     async def init_remote_blob(self):
-        return await self.save_blob(self.identifier, None)
+        blobs = await sync_to_async(self.save_remote_blobs)([self.identifier])
+        return blobs[self.identifier]
 
     async def download_manifest(self, run_pipeline=False):
+        """
+        Download the manifest from the remote and store it as pending content of the repository.
+
+        Concurrent downloads of the same manifest from the same remote are coalesced into one
+        upstream request, one saved artifact, and at most one dispatched task.
+
+        Returns:
+            tuple: The raw manifest, its digest, and its media type.
+
+        """
+        key = f"{self.remote.pk}:{self.identifier}"
+        raw_data, digest, media_type = await manifest_downloads.run(
+            key, lambda: self._download_manifest(run_pipeline)
+        )
+        return raw_data, digest, media_type
+
+    async def _download_manifest(self, run_pipeline):
         response = await self.run_manifest_downloader()
 
         with open(response.path) as f:
@@ -411,103 +642,175 @@ class PullThroughDownloader:
 
     async def init_pending_content(self, digest, manifest_data, media_type, artifact):
         if config := manifest_data.get("config", None):
-            config_digest = config["digest"]
-            config_blob = await self.save_config_blob(config_digest)
-            await sync_to_async(self.repository.pending_blobs.add)(config_blob)
+            # download the config blob while the rest of the content is being stored
+            config_download = run_in_background(self.download_config_blob(config["digest"]))
         else:
-            config_blob = None
-
-        manifest = Manifest(
-            digest=digest,
-            schema_version=(
-                2
-                if manifest_data["mediaType"] in (MEDIA_TYPE.MANIFEST_V2, MEDIA_TYPE.MANIFEST_OCI)
-                else 1
-            ),
-            media_type=media_type,
-            config_blob=config_blob,
-        )
-
-        # skip if media_type of schema1
-        if media_type in (MEDIA_TYPE.MANIFEST_V2, MEDIA_TYPE.MANIFEST_OCI):
-            await sync_to_async(manifest.init_metadata)(manifest_data=manifest_data)
+            config_download = None
 
         try:
-            await manifest.asave()
-        except IntegrityError:
-            manifest = await Manifest.objects.aget(digest=manifest.digest)
-            await sync_to_async(manifest.touch)()
-        await sync_to_async(self.repository.pending_manifests.add)(manifest)
-
-        for layer in manifest_data["layers"]:
-            blob = await self.save_blob(layer["digest"], manifest)
-            await sync_to_async(self.repository.pending_blobs.add)(blob)
-
-        content_artifact = ContentArtifact(
-            artifact=artifact, content=manifest, relative_path=manifest.digest
-        )
-        with suppress(IntegrityError):
-            await content_artifact.asave()
+            manifest = await sync_to_async(self.save_pending_content)(
+                digest, manifest_data, media_type, artifact
+            )
+        except Exception:
+            if config_download is not None:
+                config_download.cancel()
+            raise
+
+        # the config blob can be streamed from the remote in the meantime, so the manifest is
+        # returned to the client without waiting for the download and the metadata
+        run_in_background(self.init_manifest_metadata(manifest, manifest_data, config_download))
+
+    def save_pending_content(self, digest, manifest_data, media_type, artifact):
+        """
+        Store the manifest and its blobs as pending content of the repository.
+
+        All the records are created in bulk within a single transaction; records created by
+        concurrent requests are looked up and reused. The metadata of the manifest are
+        initialized separately once the config blob is downloaded.
+
+        Returns:
+            :class:`~pulp_container.app.models.Manifest`: The stored manifest.
 
-    async def save_blob(self, digest, manifest):
-        blob = Blob(digest=digest)
+        """
+        with transaction.atomic():
+            if config := manifest_data.get("config", None):
+                config_blob = self.save_remote_blobs([config["digest"]])[config["digest"]]
+            else:
+                config_blob = None
+
+            manifest = Manifest(
+                digest=digest,
+                schema_version=(
+                    2
+                    if manifest_data["mediaType"]
+                    in (MEDIA_TYPE.MANIFEST_V2, MEDIA_TYPE.MANIFEST_OCI)
+                    else 1
+                ),
+                media_type=media_type,
+                config_blob=config_blob,
+            )
+            Manifest.objects.bulk_create([manifest], ignore_conflicts=True)
+            manifests = Manifest.objects.filter(digest=digest)
+            manifests.touch()
+            manifest = manifests.get()
+            ContentArtifact.objects.bulk_create(
+                [ContentArtifact(artifact=artifact, content=manifest, relative_path=digest)],
+                ignore_conflicts=True,
+            )
+
+            layer_digests = [layer["digest"] for layer in manifest_data["layers"]]
+            blobs = self.save_remote_blobs(layer_digests, manifest)
+
+            self.repository.pending_manifests.add(manifest)
+            if config_blob is not None:
+                self.repository.pending_blobs.add(config_blob, *blobs.values())
+            else:
+                self.repository.pending_blobs.add(*blobs.values())
+            invalidate_not_found_entries(self.repository)
+
+        return manifest
+
+    async def init_manifest_metadata(self, manifest, manifest_data, config_download):
+        """
+        Attach the downloaded config blob and initialize the metadata of the manifest.
+
+        Args:
+            manifest (:class:`~pulp_container.app.models.Manifest`): The stored manifest.
+            manifest_data (dict): The parsed manifest.
+            config_download (:class:`asyncio.Task`): The download of the config blob, if any.
+
+        """
         try:
-            await blob.asave()
-        except IntegrityError:
-            blob = await Blob.objects.aget(digest=digest)
-            await sync_to_async(blob.touch)()
-
-        bm_rel = BlobManifest(manifest=manifest, manifest_blob=blob)
-        with suppress(IntegrityError):
-            await bm_rel.asave()
-
-        ca = ContentArtifact(
-            content=blob,
-            artifact=None,
-            relative_path=digest,
-        )
-        with suppress(IntegrityError):
-            await ca.asave()
+            if config_download is not None:
+                config_artifact = await config_download
+                await ContentArtifact.objects.filter(
+                    content_id=manifest.config_blob_id,
+                    relative_path=manifest_data["config"]["digest"],
+                    artifact__isnull=True,
+                ).aupdate(artifact=config_artifact)
+
+            # skip if media_type of schema1
+            if manifest.media_type in (MEDIA_TYPE.MANIFEST_V2, MEDIA_TYPE.MANIFEST_OCI):
+                await sync_to_async(self.save_manifest_metadata)(manifest, manifest_data)
+        except Exception as exc:
+            log.warning(
+                "Failed to initialize the metadata of the manifest {}: {}".format(
+                    manifest.digest, exc
+                )
+            )
+
+    @staticmethod
+    def save_manifest_metadata(manifest, manifest_data):
+        if manifest.init_metadata(manifest_data=manifest_data):
+            manifest.save(update_fields=["annotations", "labels", "is_bootable", "is_flatpak"])
+
+    @staticmethod
+    def get_or_create_blobs(digests):
+        """Create the missing blobs and return all of them mapped by their digests."""
+        Blob.objects.bulk_create([Blob(digest=digest) for digest in digests], ignore_conflicts=True)
+        blobs = Blob.objects.filter(digest__in=digests)
+        blobs.touch()
+        return {blob.digest: blob for blob in blobs}
+
+    def save_remote_blobs(self, digests, manifest=None):
+        """
+        Store the blobs together with the remote artifacts referencing the remote.
 
+        Args:
+            digests (list): The digests of the blobs.
+            manifest (:class:`~pulp_container.app.models.Manifest`): The manifest referencing the
+                blobs, if any.
+
+        Returns:
+            dict: The stored blobs mapped by their digests.
+
+        """
+        with transaction.atomic():
+            blobs = self.get_or_create_blobs(digests)
+
+            if manifest is not None:
+                BlobManifest.objects.bulk_create(
+                    [
+                        BlobManifest(manifest=manifest, manifest_blob=blob)
+                        for blob in blobs.values()
+                    ],
+                    ignore_conflicts=True,
+                )
+
+            ContentArtifact.objects.bulk_create(
+                [
+                    ContentArtifact(content=blob, artifact=None, relative_path=digest)
+                    for digest, blob in blobs.items()
+                ],
+                ignore_conflicts=True,
+            )
+            content_artifacts = ContentArtifact.objects.filter(
+                content__in=blobs.values(), relative_path__in=digests
+            )
+            RemoteArtifact.objects.bulk_create(
+                [
+                    RemoteArtifact(
+                        url=self.get_blob_url(ca.relative_path),
+                        sha256=ca.relative_path[len("sha256:") :],
+                        content_artifact=ca,
+                        remote=self.remote,
+                    )
+                    for ca in content_artifacts
+                ],
+                ignore_conflicts=True,
+            )
+
+        return blobs
+
+    def get_blob_url(self, digest):
         relative_url = "/v2/{name}/blobs/{digest}".format(
             name=self.remote.namespaced_upstream_name, digest=digest
         )
-        blob_url = urljoin(self.remote.url, relative_url)
-        ra = RemoteArtifact(
-            url=blob_url,
-            sha256=digest[len("sha256:") :],
-            content_artifact=ca,
-            remote=self.remote,
-        )
-        with suppress(IntegrityError):
-            await ra.asave()
+        return urljoin(self.remote.url, relative_url)
 
-        return blob
-
-    async def save_config_blob(self, config_digest):
-        blob_relative_url = "/v2/{name}/blobs/{digest}".format(
-            name=self.remote.namespaced_upstream_name, digest=config_digest
-        )
-        blob_url = urljoin(self.remote.url, blob_relative_url)
-        downloader = self.remote.get_downloader(url=blob_url)
+    async def download_config_blob(self, config_digest):
+        downloader = self.remote.get_downloader(url=self.get_blob_url(config_digest))
         response = await downloader.run()
 
         response.artifact_attributes["file"] = response.path
-        saved_artifact = await save_artifact(response.artifact_attributes)
-
-        config_blob = Blob(digest=config_digest)
-        try:
-            await config_blob.asave()
-        except IntegrityError:
-            config_blob = await Blob.objects.aget(digest=config_digest)
-            await sync_to_async(config_blob.touch)()
-
-        content_artifact = ContentArtifact(
-            content=config_blob,
-            artifact=saved_artifact,
-            relative_path=config_digest,
-        )
-        with suppress(IntegrityError):
-            await content_artifact.asave()
-
-        return config_blob
+        return await save_artifact(response.artifact_attributes)
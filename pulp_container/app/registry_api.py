@@ -10,6 +10,8 @@ import binascii
 import json
 import logging
 import hashlib
+import io
+import os
 import re
 
 from aiohttp.client_exceptions import ClientResponseError
@@ -20,12 +22,16 @@ from tempfile import NamedTemporaryFile
 from django.core.files.storage import default_storage as storage
 from django.core.files.base import ContentFile, File
 from django.db import IntegrityError, transaction
-from django.db.models import F, Value
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 
 from django.conf import settings
 
-from pulpcore.plugin.models import Artifact, ContentArtifact, UploadChunk
+from pulpcore.plugin.models import (
+    Artifact,
+    ContentArtifact,
+    UploadChunk,
+)
 from pulpcore.plugin.files import PulpTemporaryUploadedFile
 from pulpcore.plugin.tasking import add_and_remove, dispatch
 from pulpcore.plugin.util import get_objects_for_user, get_url
@@ -52,7 +58,11 @@ from pulp_container.app.authorization import AuthorizationService
 from pulp_container.app.cache import (
     find_base_path_cached,
     FlatpakIndexStaticCache,
+    LocalCache,
     RegistryApiCache,
+    invalidate_not_found_entries,
+    invalidate_resolved_distribution,
+    resolve_distribution,
 )
 from pulp_container.app.exceptions import (
     InvalidRequest,
@@ -62,6 +72,7 @@ from pulp_container.app.exceptions import (
     BlobInvalid,
     ManifestNotFound,
     ManifestInvalid,
+    ManifestTooLarge,
     ManifestSignatureInvalid,
 )
 from pulp_container.app.redirects import (
@@ -69,6 +80,12 @@ from pulp_container.app.redirects import (
     S3StorageRedirects,
     AzureStorageRedirects,
 )
+from pulp_container.app.tasks import add_pending_tags, commit_pending_tags
+from pulp_container.app.tasks.pending_tags import (
+    commit_window_resource,
+    dispatch_pending_tags_task,
+    is_commit_window_full,
+)
 from pulp_container.app.token_verification import (
     RegistryAuthentication,
     TokenAuthentication,
@@ -78,13 +95,17 @@ from pulp_container.app.token_verification import (
 from pulp_container.app.utils import (
     determine_media_type,
     extract_data_from_signature,
+    get_path_prefixes,
     has_task_completed,
+    init_hashers,
     validate_manifest,
+    write_stream,
 )
 from pulp_container.constants import (
     EMPTY_BLOB,
     SIGNATURE_API_EXTENSION_VERSION,
     SIGNATURE_HEADER,
+    MANIFEST_PAYLOAD_MAX_SIZE,
     SIGNATURE_PAYLOAD_MAX_SIZE,
     SIGNATURE_TYPE,
     V2_ACCEPT_HEADERS,
@@ -102,6 +123,17 @@ IGNORED_PULL_THROUGH_REMOTE_ATTRIBUTES = [
     "name",
 ]
 
+# chunked uploads are appended to staging files in the storage shared by all API workers
+STAGED_UPLOADS = settings.DEFAULT_FILE_STORAGE == "pulpcore.app.models.storage.FileSystem"
+
+# upload pk -> (number of hashed bytes, hashers) of the staging files appended by this worker
+upload_hashers = LocalCache(max_size=settings.UPLOAD_HASHERS_CACHE_SIZE)
+
+# user pk -> pks of the private distributions the user is allowed to list in the catalog
+accessible_distributions = LocalCache(
+    max_size=settings.CATALOG_CACHE_SIZE, ttl=settings.CATALOG_CACHE_TTL
+)
+
 
 class ContentRenderer(BaseRenderer):
     """
@@ -278,27 +310,50 @@ class ContainerRegistryApiMixin:
             log.error(detail)
         return response
 
+    def receive_artifact(self, stream, length=None):
+        """
+        Create an artifact from the data read from the stream.
+
+        The data is written to a temporary file in bounded blocks while its digests are computed,
+        so neither the whole body is held in memory nor the file is read again to validate it.
+        """
+        temp_file = NamedTemporaryFile("ab", dir=settings.FILE_UPLOAD_TEMP_DIR, delete=False)
+        try:
+            with temp_file:
+                hashers = init_hashers()
+                size = write_stream(stream, temp_file, hashers, length)
+            digests = {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+            artifact = Artifact(file=temp_file.name, size=size, **digests)
+            try:
+                with transaction.atomic():
+                    artifact.save()
+            except IntegrityError:
+                artifact = Artifact.objects.get(sha256=artifact.sha256)
+                artifact.touch()
+        finally:
+            # the storage moves files from the working directory instead of copying them
+            if os.path.exists(temp_file.name):
+                os.remove(temp_file.name)
+        return artifact
+
     def get_drv_pull(self, path):
         """
         Get distribution, repository and repository_version for pull access.
         """
-        try:
-            distribution = models.ContainerDistribution.objects.get(base_path=path)
-        except models.ContainerDistribution.DoesNotExist:
+        resolved = resolve_distribution(path)
+        if resolved is None:
             # get a pull-through cache distribution whose base_path is a substring of the path
             return self.get_pull_through_drv(path)
-        if distribution.repository:
-            repository_version = distribution.repository.latest_version()
-        elif distribution.repository_version:
-            repository_version = distribution.repository_version
-        else:
+        distribution, repository, repository_version = resolved
+        if repository_version is None:
             raise RepositoryNotFound(name=path)
-        return distribution, distribution.repository, repository_version
+        return distribution, repository, repository_version
 
     def get_pull_through_drv(self, path):
         pull_through_cache_distribution = (
-            models.ContainerPullThroughDistribution.objects.annotate(path=Value(path))
-            .filter(path__startswith=F("base_path"))
+            models.ContainerPullThroughDistribution.objects.filter(
+                base_path__in=get_path_prefixes(path)
+            )
             .order_by("-base_path")
             .first()
         )
@@ -334,6 +389,8 @@ class ContainerRegistryApiMixin:
             raise RepositoryNotFound(name=path)
         else:
             pull_through_cache_distribution.distributions.add(distribution)
+            # the distribution might have been resolved before it was linked
+            invalidate_resolved_distribution(path)
 
         return distribution, repository, repository.latest_version()
 
@@ -511,23 +568,42 @@ class CatalogView(ContainerRegistryApiMixin, ListAPIView):
     def get_queryset(self, *args, **kwargs):
         """Filter the queryset based on public repositories and assigned permissions."""
         queryset = super().get_queryset()
+        accessible_repositories = self.get_accessible_private_repositories()
+        if not accessible_repositories:
+            return queryset.filter(private=False)
+        return queryset.filter(Q(private=False) | Q(pk__in=accessible_repositories))
+
+    def get_accessible_private_repositories(self):
+        """
+        Return the pks of the private distributions the user is allowed to pull from.
+
+        The pks are kept for a short time so that paging through the catalog does not evaluate the
+        user's permissions for every page.
+        """
+        user = self.request.user
+        if not user.is_authenticated:
+            return []
+        if (accessible_repositories := accessible_distributions.get(user.pk)) is not None:
+            return accessible_repositories
 
         distribution_permission = "container.pull_containerdistribution"
         namespace_permission = "container.namespace_pull_containerdistribution"
 
-        public_repositories = queryset.filter(private=False)
+        private_repositories = models.ContainerDistribution.objects.filter(private=True)
         repositories_by_distribution = get_objects_for_user(
-            self.request.user, distribution_permission, queryset
+            user, distribution_permission, private_repositories
         )
 
         namespaces = models.ContainerNamespace.objects.all()
-        repositories_by_namespace = get_objects_for_user(
-            self.request.user, namespace_permission, namespaces
-        )
-        repositories_by_namespace = queryset.filter(namespace__in=repositories_by_namespace)
+        repositories_by_namespace = get_objects_for_user(user, namespace_permission, namespaces)
 
-        accessible_repositories = repositories_by_distribution & repositories_by_namespace
-        return (public_repositories | accessible_repositories).distinct()
+        accessible_repositories = list(
+            repositories_by_distribution.filter(
+                namespace__in=repositories_by_namespace
+            ).values_list("pk", flat=True)
+        )
+        accessible_distributions.set(user.pk, accessible_repositories)
+        return accessible_repositories
 
 
 class FlatpakIndexDynamicView(APIView):
@@ -725,8 +801,23 @@ class TagsListView(ContainerRegistryApiMixin, ListAPIView):
         Handles GET requests to the /v2/<repo>/tags/list endpoint
         """
         path = self.request.resolver_match.kwargs["path"]
-        _, _, repository_version = self.get_drv_pull(path)
-        return models.Tag.objects.filter(pk__in=repository_version.content).only("name")
+        _, repository, repository_version = self.get_drv_pull(path)
+        self.pending_tags = models.get_pending_tags(repository).only("name")
+        if models.has_indexed_tag_names(repository_version):
+            tags = models.RepositoryVersionTag.objects.filter(repository_version=repository_version)
+        else:
+            # only the latest version of a repository has its tag names materialized
+            tags = models.Tag.objects.filter(pk__in=repository_version.content)
+        return tags.only("name")
+
+    def paginate_queryset(self, queryset):
+        """
+        Merge the names of the tags pushed since the served version was created into the page.
+        """
+        page = super().paginate_queryset(queryset)
+        pending_page = super().paginate_queryset(self.pending_tags)
+        tag_names = sorted({tag.name for tag in chain(page, pending_page)})
+        return [{"name": name} for name in tag_names[: self.paginator.n]]
 
 
 class BlobUploads(ContainerRegistryApiMixin, ViewSet):
@@ -759,23 +850,10 @@ class BlobUploads(ContainerRegistryApiMixin, ViewSet):
             response = UploadResponse(upload=upload, path=path, request=request)
         return response
 
-    def create_single_chunk_artifact(self, chunk):
+    def create_single_chunk_artifact(self, chunk, length=None):
         with transaction.atomic():
             # 1 chunk, create artifact right away
-            with NamedTemporaryFile("ab") as temp_file:
-                temp_file.write(chunk.read())
-                temp_file.flush()
-
-                uploaded_file = PulpTemporaryUploadedFile.from_file(
-                    File(open(temp_file.name, "rb"))
-                )
-            try:
-                artifact = Artifact.init_and_validate(uploaded_file)
-                artifact.save()
-            except IntegrityError:
-                artifact = Artifact.objects.get(sha256=artifact.sha256)
-                artifact.touch()
-        return artifact
+            return self.receive_artifact(chunk, length or None)
 
     def create_blob(self, artifact, digest):
         with transaction.atomic():
@@ -804,6 +882,7 @@ class BlobUploads(ContainerRegistryApiMixin, ViewSet):
         artifact = self.create_single_chunk_artifact(chunk)
         blob = self.create_blob(artifact, digest)
         repository.pending_blobs.add(blob)
+        invalidate_not_found_entries(repository)
         return BlobResponse(blob, path, 201, request)
 
     @staticmethod
@@ -832,6 +911,7 @@ class BlobUploads(ContainerRegistryApiMixin, ViewSet):
             raise BlobNotFound(digest=digest)
 
         repository.pending_blobs.add(blob)
+        invalidate_not_found_entries(repository)
         return BlobResponse(blob, path, 201, request)
 
     def partial_update(self, request, path, pk=None):
@@ -839,7 +919,6 @@ class BlobUploads(ContainerRegistryApiMixin, ViewSet):
         Process a chunk that will be appended to an existing upload.
         """
         _, repository = self.get_dr_push(request, path)
-        upload = get_object_or_404(models.Upload, repository=repository, pk=pk)
         chunk = request.META["wsgi.input"]
         if range_header := request.headers.get("Content-Range"):
             found = self.content_range_pattern.match(range_header)
@@ -856,20 +935,25 @@ class BlobUploads(ContainerRegistryApiMixin, ViewSet):
             start = 0
 
         with transaction.atomic():
+            upload = get_object_or_404(
+                models.Upload.objects.select_for_update(), repository=repository, pk=pk
+            )
             if upload.size != start:
                 raise Exception
 
             # if more chunks
             if range_header:
-                chunk = ContentFile(chunk.read())
-                upload.append(chunk, upload.size)
+                if self.is_staged(upload):
+                    upload.size, _ = self.append_to_staging_file(upload, chunk, length)
+                else:
+                    chunk = ContentFile(chunk.read())
+                    upload.append(chunk, upload.size)
+                    upload.size += chunk.size
             else:
-                artifact = self.create_single_chunk_artifact(chunk)
+                artifact = self.create_single_chunk_artifact(chunk, length)
                 upload.artifact = artifact
-                if not length:
-                    length = artifact.size
+                upload.size += artifact.size
 
-            upload.size += length
             upload.save()
 
         return UploadResponse(upload=upload, path=path, request=request, status=204)
@@ -886,16 +970,22 @@ class BlobUploads(ContainerRegistryApiMixin, ViewSet):
 
         digest = request.query_params["digest"]
         chunk = request.META["wsgi.input"]
-        # last chunk (and the only one) from monolitic upload
-        # or last chunk from chunked upload
-        last_chunk = ContentFile(chunk.read())
         upload = get_object_or_404(models.Upload, pk=pk, repository=repository)
 
         if artifact := upload.artifact:
             if artifact.sha256 != digest[len("sha256:") :]:
                 raise Exception("The digest did not match")
             artifact.touch()
+        elif self.is_staged(upload):
+            # last chunk (and the only one) from monolitic upload
+            # or last chunk from chunked upload
+            with transaction.atomic():
+                upload = models.Upload.objects.select_for_update().get(pk=upload.pk)
+                upload.size, hashers = self.append_to_staging_file(upload, chunk)
+                upload.save()
+            artifact = self.create_staged_artifact(upload, hashers, digest)
         else:
+            last_chunk = ContentFile(chunk.read())
             chunks = UploadChunk.objects.filter(upload=upload).order_by("offset")
             with NamedTemporaryFile("ab") as temp_file:
                 for chunk in chunks:
@@ -923,8 +1013,95 @@ class BlobUploads(ContainerRegistryApiMixin, ViewSet):
         upload.delete()
 
         repository.pending_blobs.add(blob)
+        invalidate_not_found_entries(repository)
         return BlobResponse(blob, path, 201, request)
 
+    @staticmethod
+    def is_staged(upload):
+        """
+        Check if the chunks of the upload are appended to a staging file.
+
+        Staging files are used with the local filesystem storage, which is shared by all API
+        workers. Uploads started before, with their chunks stored separately, are completed as such.
+        """
+        return bool(upload.file) or (STAGED_UPLOADS and upload.size == 0)
+
+    def append_to_staging_file(self, upload, stream, length=None):
+        """
+        Append the data read from the stream to the staging file of the upload.
+
+        The digests of the staged data are computed while the data is written, so that the file
+        does not need to be read again once the upload is complete.
+
+        Returns:
+            tuple: The size of the staging file and the hashers of its data.
+
+        """
+        if not upload.file:
+            upload.file = models.generate_filename(upload, "")
+        path = upload.file.path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, "a+b") as staging_file:
+            # discard data left behind by an interrupted request
+            staging_file.truncate(upload.size)
+            hashers = self.get_staging_file_hashers(upload, staging_file)
+            size = upload.size + write_stream(stream, staging_file, hashers, length)
+
+        upload_hashers.set(upload.pk, (size, hashers))
+        return size, hashers
+
+    @staticmethod
+    def get_staging_file_hashers(upload, staging_file):
+        """
+        Return the hashers of the data in the staging file.
+
+        Every worker keeps the hashers of the staging files it appended to. Only the chunks
+        appended by other workers in the meantime are read back from the file.
+        """
+        hashed_size, hashers = upload_hashers.get(upload.pk, (0, None))
+        # the hashers are updated in place; drop them until the data is written
+        upload_hashers.delete(upload.pk)
+        if hashers is None or hashed_size > upload.size:
+            hashed_size, hashers = 0, init_hashers()
+
+        if hashed_size < upload.size:
+            staging_file.seek(hashed_size)
+            write_stream(staging_file, None, hashers, upload.size - hashed_size)
+        return hashers
+
+    def create_staged_artifact(self, upload, hashers, digest):
+        """
+        Promote the complete staging file of the upload to an artifact.
+
+        The artifact is created from the digests computed while the chunks were written; the file
+        is renamed to its place in the artifact storage instead of being copied there. The file
+        is renamed only once the artifact is saved, within the same transaction, so neither an
+        artifact without its file nor a file without its artifact is left behind on failure.
+        """
+        upload_hashers.delete(upload.pk)
+
+        digests = {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+        if digests["sha256"] != digest[len("sha256:") :]:
+            upload.delete()
+            raise Exception("The digest did not match")
+
+        artifact = Artifact(size=upload.size, **digests)
+        artifact_path = artifact.storage_path("")
+        full_path = storage.path(artifact_path)
+
+        # the file is put in place below, the artifact field does not move it
+        artifact.file = artifact_path
+        try:
+            with transaction.atomic():
+                artifact.save()
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(upload.file.path, full_path)
+        except IntegrityError:
+            artifact = Artifact.objects.get(sha256=artifact.sha256)
+            artifact.touch()
+        return artifact
+
 
 class RedirectsMixin:
     """
@@ -1020,6 +1197,8 @@ class Manifests(RedirectsMixin, ContainerRegistryApiMixin, ViewSet):
         redirects = self.redirects_class(distribution, path, request)
 
         if pk[:7] != "sha256:":
+            if pending_tag := models.get_pending_tag(repository, pk):
+                return redirects.issue_pending_tag_redirect(pending_tag)
             try:
                 tag = models.Tag.objects.get(name=pk, pk__in=repository_version.content)
             except models.Tag.DoesNotExist:
@@ -1128,14 +1307,15 @@ class Manifests(RedirectsMixin, ContainerRegistryApiMixin, ViewSet):
         """
         Responds with the actual manifest
         """
+        # the manifest is kept in memory, so it is not read back from the storage
+        raw_data = request.META["wsgi.input"].read(MANIFEST_PAYLOAD_MAX_SIZE + 1)
+        if len(raw_data) > MANIFEST_PAYLOAD_MAX_SIZE:
+            raise ManifestTooLarge(max_size=MANIFEST_PAYLOAD_MAX_SIZE)
+
         # iterate over all the layers and create
-        chunk = request.META["wsgi.input"]
-        artifact = self.receive_artifact(chunk)
+        artifact = self.receive_artifact(io.BytesIO(raw_data))
         manifest_digest = "sha256:{id}".format(id=artifact.sha256)
 
-        with storage.open(artifact.file.name) as artifact_file:
-            raw_data = artifact_file.read()
-
         content_data = json.loads(raw_data)
 
         media_type = determine_media_type(content_data, request)
@@ -1150,10 +1330,7 @@ class Manifests(RedirectsMixin, ContainerRegistryApiMixin, ViewSet):
         )
         _, repository = self.get_dr_push(request, path, create=is_manifest_list)
 
-        latest_version_content_pks = repository.latest_version().content.values_list("pk")
-        manifests_pks = repository.pending_manifests.values_list("pk")
-        blobs_pks = repository.pending_blobs.values_list("pk")
-        content_pks = latest_version_content_pks.union(manifests_pks).union(blobs_pks)
+        latest_version = repository.latest_version()
 
         found_manifests = models.Manifest.objects.none()
 
@@ -1164,7 +1341,11 @@ class Manifests(RedirectsMixin, ContainerRegistryApiMixin, ViewSet):
 
             digests = set(manifests.keys())
 
-            found_manifests = models.Manifest.objects.filter(digest__in=digests, pk__in=content_pks)
+            found_manifests = models.filter_pushed_content(
+                models.Manifest.objects.filter(digest__in=digests),
+                latest_version,
+                repository.pending_manifests,
+            )
 
             if (len(manifests) - found_manifests.count()) != 0:
                 ManifestInvalid(digest=manifest_digest)
@@ -1197,13 +1378,17 @@ class Manifests(RedirectsMixin, ContainerRegistryApiMixin, ViewSet):
             if manifest.init_manifest_list_nature():
                 manifest.save(update_fields=["is_bootable", "is_flatpak"])
 
-            found_blobs = models.Blob.objects.filter(
-                digest__in=found_manifests.values_list("blobs__digest"),
-                pk__in=content_pks,
+            found_blobs = models.filter_pushed_content(
+                models.Blob.objects.filter(digest__in=found_manifests.values_list("blobs__digest")),
+                latest_version,
+                repository.pending_blobs,
             )
-            found_config_blobs = models.Blob.objects.filter(
-                digest__in=found_manifests.values_list("config_blob__digest"),
-                pk__in=content_pks,
+            found_config_blobs = models.filter_pushed_content(
+                models.Blob.objects.filter(
+                    digest__in=found_manifests.values_list("config_blob__digest")
+                ),
+                latest_version,
+                repository.pending_blobs,
             )
         else:
             # both docker/oci format should contain config, digest, mediaType, size
@@ -1215,8 +1400,10 @@ class Manifests(RedirectsMixin, ContainerRegistryApiMixin, ViewSet):
                 )
 
             config_digest = config_layer.get("digest")
-            found_config_blobs = models.Blob.objects.filter(
-                digest=config_digest, pk__in=content_pks
+            found_config_blobs = models.filter_pushed_content(
+                models.Blob.objects.filter(digest=config_digest),
+                latest_version,
+                repository.pending_blobs,
             )
             if not found_config_blobs.exists():
                 raise BlobInvalid(digest=config_digest)
@@ -1245,7 +1432,11 @@ class Manifests(RedirectsMixin, ContainerRegistryApiMixin, ViewSet):
                 digest = layer.get("digest")
                 blobs.add(digest)
 
-            found_blobs = models.Blob.objects.filter(digest__in=blobs, pk__in=content_pks)
+            found_blobs = models.filter_pushed_content(
+                models.Blob.objects.filter(digest__in=blobs),
+                latest_version,
+                repository.pending_blobs,
+            )
             if (len(blobs) - found_blobs.count()) != 0:
                 raise ManifestInvalid(digest=manifest_digest)
 
@@ -1271,13 +1462,17 @@ class Manifests(RedirectsMixin, ContainerRegistryApiMixin, ViewSet):
                 tag = models.Tag.objects.get(name=tag.name, tagged_manifest=manifest)
                 tag.touch()
 
+            if settings.FINALIZE_PUSHES_ASYNC or repository.push_commit_window:
+                self.add_pending_tag(repository, tag)
+                return ManifestResponse(manifest, path, request, status=201)
+
             add_content_units = [str(tag.pk), str(manifest.pk)] + [
                 str(content.pk)
                 for content in chain(found_blobs, found_config_blobs, found_manifests)
             ]
 
-            tags_to_remove = models.Tag.objects.filter(
-                pk__in=repository.latest_version().content.all(), name=tag
+            tags_to_remove = models.filter_pushed_content(
+                models.Tag.objects.filter(name=tag), latest_version
             ).exclude(tagged_manifest=manifest)
             remove_content_units = [str(pk) for pk in tags_to_remove.values_list("pk")]
 
@@ -1305,8 +1500,33 @@ class Manifests(RedirectsMixin, ContainerRegistryApiMixin, ViewSet):
         else:
             # the client pushed a listed manifest
             repository.pending_manifests.add(manifest)
+            invalidate_not_found_entries(repository)
             return ManifestResponse(manifest, path, request, status=201)
 
+    @staticmethod
+    def add_pending_tag(repository, tag):
+        """
+        Record the pushed tag and leave adding it to the repository to a background task.
+
+        A task is dispatched only if there is none waiting for the repository yet because a task
+        adds all the tags pending by the time it runs. With a commit window, a task waiting for
+        the window to close is dispatched first; it reserves the repository only afterwards. The
+        push filling the window dispatches adding the tags right away.
+        """
+        with transaction.atomic():
+            models.PendingTag.objects.create(repository=repository, tag=tag)
+            repository.pending_manifests.add(tag.tagged_manifest)
+
+        if repository.push_commit_window and not is_commit_window_full(repository):
+            # the commit window is waited for without holding the lock of the repository
+            dispatch_pending_tags_task(
+                commit_pending_tags, commit_window_resource(repository), repository
+            )
+        else:
+            dispatch_pending_tags_task(add_pending_tags, repository, repository)
+        # the pending tag replaces the cached responses for the tag of the same name
+        repository.invalidate_cache()
+
     def _init_manifest(self, manifest_digest, media_type, config_blob=None):
         return models.Manifest(
             digest=manifest_digest,
@@ -1332,33 +1552,6 @@ class Manifests(RedirectsMixin, ContainerRegistryApiMixin, ViewSet):
                 ca.save(update_fields=["artifact"])
         return manifest
 
-    def receive_artifact(self, chunk):
-        """Handles assembling of Manifest as it's being uploaded."""
-        with NamedTemporaryFile("ab") as temp_file:
-            size = 0
-            hashers = {}
-            for algorithm in Artifact.DIGEST_FIELDS:
-                hashers[algorithm] = getattr(hashlib, algorithm)()
-            while True:
-                subchunk = chunk.read(2000000)
-                if not subchunk:
-                    break
-                temp_file.write(subchunk)
-                size += len(subchunk)
-                for algorithm in Artifact.DIGEST_FIELDS:
-                    hashers[algorithm].update(subchunk)
-            temp_file.flush()
-            digests = {}
-            for algorithm in Artifact.DIGEST_FIELDS:
-                digests[algorithm] = hashers[algorithm].hexdigest()
-            artifact = Artifact(file=temp_file.name, size=size, **digests)
-            try:
-                artifact.save()
-            except IntegrityError:
-                artifact = Artifact.objects.get(sha256=artifact.sha256)
-                artifact.touch()
-            return artifact
-
 
 class Signatures(ContainerRegistryApiMixin, ViewSet):
     """A ViewSet for image signatures."""
@@ -0,0 +1,153 @@
+from aiohttp import hdrs, web
+from aiohttp.helpers import ETAG_ANY
+from multidict import CIMultiDict
+
+from pulpcore.plugin.responses import ArtifactResponse
+
+CONDITIONAL_HEADERS = (
+    hdrs.IF_MATCH,
+    hdrs.IF_NONE_MATCH,
+    hdrs.IF_MODIFIED_SINCE,
+    hdrs.IF_UNMODIFIED_SINCE,
+    hdrs.IF_RANGE,
+)
+
+
+def _etag_matches(digest, etags, weak=True):
+    """Check if the digest matches any of the entity tags sent by a client."""
+    for etag in etags:
+        if etag.value == ETAG_ANY:
+            return True
+        if etag.value == digest and (weak or not etag.is_weak):
+            return True
+    return False
+
+
+def evaluate_conditional_request(request, digest):
+    """
+    Evaluate the conditional headers of a request for content identified by its digest.
+
+    The digest of a blob or manifest serves as its strong entity tag. Unmet conditions raise the
+    corresponding HTTP exception. Otherwise, a request stripped of the conditional headers is
+    returned; the Range header is removed as well when If-Range does not match the digest so that
+    the whole content is sent back.
+
+    Args:
+        request(:class:`~aiohttp.web.Request`): The request to evaluate.
+        digest (str): The digest of the requested content.
+
+    Raises:
+        :class:`aiohttp.web_exceptions.HTTPPreconditionFailed`: When If-Match does not match.
+        :class:`aiohttp.web_exceptions.HTTPNotModified`: When If-None-Match matches.
+
+    Returns:
+        :class:`~aiohttp.web.Request`: The request to prepare the response for.
+
+    """
+    headers = {hdrs.ETAG: f'"{digest}"', "Docker-Content-Digest": digest}
+
+    if_match = request.if_match
+    if if_match is not None and not _etag_matches(digest, if_match, weak=False):
+        raise web.HTTPPreconditionFailed(headers=headers)
+
+    if_none_match = request.if_none_match
+    if if_none_match is not None and _etag_matches(digest, if_none_match):
+        raise web.HTTPNotModified(headers=headers)
+
+    if not any(header in request.headers for header in CONDITIONAL_HEADERS):
+        return request
+
+    request_headers = CIMultiDict(request.headers)
+    for header in CONDITIONAL_HEADERS:
+        request_headers.popall(header, None)
+    # only entity tags are supported as validators; dates never match
+    if_range = request.headers.get(hdrs.IF_RANGE)
+    if if_range is not None and if_range.strip() != f'"{digest}"':
+        request_headers.popall(hdrs.RANGE, None)
+    return request.clone(headers=request_headers)
+
+
+class DigestConditionalMixin:
+    """
+    A mixin for responses that serve content identified by the Docker-Content-Digest header.
+
+    The digest is sent as the ETag of the response and conditional requests are evaluated
+    against it before the content is sent.
+    """
+
+    async def prepare(self, request):
+        """Evaluate the conditional headers of the request and prepare the response."""
+        digest = self.headers.get("Docker-Content-Digest")
+        if self.prepared or digest is None or self.status != 200:
+            return await super().prepare(request)
+
+        self.headers[hdrs.ETAG] = f'"{digest}"'
+        try:
+            request = evaluate_conditional_request(request, digest)
+        except (web.HTTPNotModified, web.HTTPPreconditionFailed) as exc:
+            self.set_status(exc.status)
+            # skip sending the content
+            return await web.StreamResponse.prepare(self, request)
+
+        return await super().prepare(request)
+
+
+class RegistryFileResponse(DigestConditionalMixin, web.FileResponse):
+    """A file response which uses the content digest as the ETag."""
+
+    @property
+    def etag(self):
+        """Return the ETag of the response."""
+        return web.FileResponse.etag.fget(self)
+
+    @etag.setter
+    def etag(self, value):
+        """Keep the digest as the ETag instead of the one derived from the file's metadata."""
+        if hdrs.ETAG not in self.headers:
+            web.FileResponse.etag.fset(self, value)
+
+
+class RegistryArtifactResponse(DigestConditionalMixin, ArtifactResponse):
+    """An artifact response which uses the content digest as the ETag."""
+
+
+class RegistryResponse(DigestConditionalMixin, web.Response):
+    """An in-memory response which uses the content digest as the ETag."""
+
+
+class StoringStreamResponse(web.StreamResponse):
+    """
+    A streamed response for content downloaded from a remote and stored at the same time.
+
+    Writes are discarded once the client disconnects so that the download runs to completion and
+    the downloaded content is still stored as an artifact.
+    """
+
+    client_disconnected = False
+
+    async def prepare(self, request):
+        """Send the headers unless the client disconnected."""
+        if self.client_disconnected:
+            return None
+        try:
+            return await super().prepare(request)
+        except ConnectionResetError:
+            self.client_disconnected = True
+
+    async def write(self, data):
+        """Send the data unless the client disconnected."""
+        if self.client_disconnected:
+            return
+        try:
+            await super().write(data)
+        except ConnectionResetError:
+            self.client_disconnected = True
+
+    async def write_eof(self, data=b""):
+        """Finish the response unless the client disconnected."""
+        if self.client_disconnected:
+            return
+        try:
+            await super().write_eof(data)
+        except ConnectionResetError:
+            self.client_disconnected = True
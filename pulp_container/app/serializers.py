@@ -233,10 +233,31 @@ class ContainerPushRepositorySerializer(RepositorySerializer, GetOrCreateSeriali
         required=False,
         allow_null=True,
     )
+    push_commit_window = serializers.IntegerField(
+        help_text=_(
+            "The number of milliseconds tags pushed to the repository are collected for before "
+            "they are added to a single repository version. Pushed tags are served in the "
+            "meantime. Defaults to 0, creating a repository version for every push."
+        ),
+        min_value=0,
+        required=False,
+    )
+    push_commit_size = serializers.IntegerField(
+        help_text=_(
+            "The number of pushed tags which closes the commit window early. "
+            "Defaults to 0, collecting the tags for the whole window."
+        ),
+        min_value=0,
+        required=False,
+    )
 
     class Meta:
         fields = tuple(
-            set(RepositorySerializer.Meta.fields + ("manifest_signing_service",)) - set(["remote"])
+            set(
+                RepositorySerializer.Meta.fields
+                + ("manifest_signing_service", "push_commit_window", "push_commit_size")
+            )
+            - set(["remote"])
         )
         model = models.ContainerPushRepository
 
@@ -442,6 +463,15 @@ class ContainerPullThroughDistributionSerializer(DistributionSerializer):
     description = serializers.CharField(
         help_text=_("An optional description."), required=False, allow_null=True
     )
+    tag_freshness_ttl = serializers.IntegerField(
+        help_text=_(
+            "The number of seconds a cached tag is served without checking the remote for "
+            "a newer manifest. Expired tags are served while being refreshed in the background. "
+            "Defaults to 0, checking the remote on every request."
+        ),
+        min_value=0,
+        required=False,
+    )
 
     def validate(self, data):
         validated_data = super().validate(data)
@@ -468,6 +498,7 @@ class ContainerPullThroughDistributionSerializer(DistributionSerializer):
             "namespace",
             "private",
             "description",
+            "tag_freshness_ttl",
         )
 
 
@@ -51,3 +51,47 @@ FLATPAK_INDEX = False
 
 # The number of allowed threads to sign manifests in parallel
 MAX_PARALLEL_SIGNING_TASKS = 10
+
+# The number of resolved tags every content app worker keeps in memory; 0 disables the cache
+TAG_RESOLUTION_CACHE_SIZE = 10000
+
+# The maximum size of manifests and blobs whose bodies are stored directly in the Redis cache
+# entries of the content app; 0 disables the inlining
+CACHE_INLINE_MAX_SIZE = 0
+
+# The number of seconds a content app worker waits for another worker downloading the same
+# manifest from a remote of a pull-through distribution; 0 disables the coordination between
+# workers while concurrent downloads within a single worker are still coalesced
+PULL_THROUGH_LOCK_TIMEOUT = 60
+
+# The number of seconds "not found" responses for tags, digests, and repositories are cached by
+# the registry; 0 disables the caching of these responses
+CACHE_NOT_FOUND_TTL = 30
+
+# The number of verified Bearer tokens every API worker keeps in memory until they expire;
+# 0 disables the cache
+TOKEN_CACHE_SIZE = 10000
+
+# The maximum number of seconds a verified Bearer token is kept in memory; deactivated and deleted
+# users lose access once the tokens verified for them are evicted
+TOKEN_CACHE_TTL = 60
+
+# The number of signed object storage URLs every API worker keeps in memory for redirects to
+# manifests and blobs; 0 disables the cache
+REDIRECT_URL_CACHE_SIZE = 10000
+
+# The fraction of the validity of signed object storage URLs during which they are reused
+REDIRECT_URL_CACHE_TTL_FRACTION = 0.5
+
+# The number of users whose accessible private distributions every API worker keeps in memory for
+# listing the catalog, and the number of seconds they are kept for; 0 disables the cache
+CATALOG_CACHE_SIZE = 1000
+CATALOG_CACHE_TTL = 30
+
+# The number of chunked uploads whose running digests every API worker keeps in memory so that
+# the staged chunks are not read again to compute the digests; 0 disables the cache
+UPLOAD_HASHERS_CACHE_SIZE = 1000
+
+# Whether tagged manifest pushes are recorded and added to the repository by a background task
+# batching all the tags pushed in the meantime, instead of waiting for a new repository version
+FINALIZE_PUSHES_ASYNC = False
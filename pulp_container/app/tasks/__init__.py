@@ -1,5 +1,6 @@
 from .download_image_data import download_image_data  # noqa
 from .builder import build_image_from_containerfile  # noqa
+from .pending_tags import add_pending_tags, commit_pending_tags  # noqa
 from .recursive_add import recursive_add_content  # noqa
 from .recursive_remove import recursive_remove_content  # noqa
 from .sign import sign  # noqa
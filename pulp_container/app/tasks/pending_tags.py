@@ -0,0 +1,139 @@
+import time
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from pulpcore.plugin.constants import TASK_STATES
+from pulpcore.plugin.models import Task
+from pulpcore.plugin.tasking import dispatch
+from pulpcore.plugin.util import get_url
+
+from pulp_container.app.models import (
+    Blob,
+    ContainerPushRepository,
+    Manifest,
+    Tag,
+    filter_pushed_content,
+)
+
+
+def add_pending_tags(repository_pk):
+    """
+    Create a new repository version out of the tags pushed since the last one.
+
+    All tags pushed to the repository in the meantime are added together with the manifests and
+    blobs they reference. When a tag name was pushed more than once, the last push wins, and the
+    tags of the same name in the latest version are removed.
+
+    The version is created and the pending tags are cleared in one transaction. If the task
+    fails, the tags stay pending, so the task dispatched for the next push adds them as well.
+
+    Args:
+        repository_pk (str): The primary key of the ContainerPushRepository the tags were pushed to.
+
+    """
+    repository = ContainerPushRepository.objects.get(pk=repository_pk)
+    pending_tags = list(
+        repository.pending_tags.order_by("pk").values_list("pk", "tag__name", "tag")
+    )
+    if not pending_tags:
+        # the tags were added by a task dispatched for an earlier push
+        return
+
+    tag_pks = list({name: tag_pk for _, name, tag_pk in pending_tags}.values())
+    tags_to_add = Tag.objects.filter(pk__in=tag_pks)
+
+    manifests_to_add = Manifest.objects.filter(pk__in=tags_to_add.values("tagged_manifest"))
+    manifests_to_add |= Manifest.objects.filter(pk__in=manifests_to_add.values("listed_manifests"))
+    blobs_to_add = Blob.objects.filter(
+        pk__in=manifests_to_add.values("blobs")
+    ) | Blob.objects.filter(pk__in=manifests_to_add.values("config_blob"))
+
+    tags_to_replace = filter_pushed_content(
+        Tag.objects.filter(name__in=tags_to_add.values("name")).exclude(pk__in=tag_pks),
+        repository.latest_version(),
+    )
+
+    with transaction.atomic():
+        with repository.new_version() as new_version:
+            new_version.remove_content(tags_to_replace)
+            new_version.add_content(tags_to_add)
+            new_version.add_content(manifests_to_add)
+            new_version.add_content(blobs_to_add)
+
+        # tags pushed while the version was created are left for the next task
+        repository.pending_tags.filter(pk__lte=pending_tags[-1][0]).delete()
+
+
+def commit_pending_tags(repository_pk):
+    """
+    Wait until the commit window of the repository closes and dispatch adding the pending tags.
+
+    The task reserves only the commit window of the repository, so the repository stays available
+    to other tasks while the pushes are collected.
+
+    Args:
+        repository_pk (str): The primary key of the ContainerPushRepository the tags were pushed to.
+
+    """
+    repository = ContainerPushRepository.objects.get(pk=repository_pk)
+    wait_for_commit_window(repository)
+    if repository.pending_tags.exists():
+        dispatch_pending_tags_task(add_pending_tags, repository, repository)
+
+
+def commit_window_resource(repository):
+    """Return the resource reserved by the tasks waiting for the commit window of the repository."""
+    return f"{get_url(repository)}commit-window/"
+
+
+def dispatch_pending_tags_task(task, resource, repository):
+    """
+    Dispatch a task handling the tags pending in the repository unless one is waiting already.
+
+    A waiting task handles all the tags pending by the time it runs.
+
+    Args:
+        task (function): The task to dispatch.
+        resource: The resource the task reserves exclusively, a string or a model instance.
+        repository (ContainerPushRepository): The repository the tags were pushed to.
+
+    """
+    waiting_tasks = Task.objects.filter(
+        name=f"{task.__module__}.{task.__name__}",
+        state=TASK_STATES.WAITING,
+        reserved_resources_record__contains=[
+            resource if isinstance(resource, str) else get_url(resource)
+        ],
+    )
+    if not waiting_tasks.exists():
+        dispatch(task, exclusive_resources=[resource], kwargs={"repository_pk": str(repository.pk)})
+
+
+def wait_for_commit_window(repository):
+    """
+    Sleep until the commit window opened by the oldest pending tag of the repository closes.
+
+    A push filling the commit window dispatches adding the pending tags right away, so the window
+    is checked only once before the sleep.
+    """
+    if not repository.push_commit_window or is_commit_window_full(repository):
+        return
+    first_pending_tag = repository.pending_tags.order_by("pk").first()
+    if first_pending_tag is None:
+        return
+
+    window_end = first_pending_tag.pushed_at + timedelta(milliseconds=repository.push_commit_window)
+    remaining = (window_end - timezone.now()).total_seconds()
+    if remaining > 0:
+        time.sleep(remaining)
+
+
+def is_commit_window_full(repository):
+    """Check whether the configured number of tags is pending in the repository."""
+    return bool(
+        repository.push_commit_size
+        and repository.pending_tags.count() >= repository.push_commit_size
+    )
@@ -41,6 +41,12 @@ from pulp_container.app.utils import (
 log = logging.getLogger(__name__)
 
 
+async def iterate_pages(pages):
+    """Yield the pages of a list which was downloaded in advance."""
+    for page in pages:
+        yield page
+
+
 class ContainerFirstStage(Stage):
     """
     The first stage of a pulp_container sync pipeline.
@@ -96,152 +102,208 @@ class ContainerFirstStage(Stage):
 
         return saved_artifact, content_data, raw_data, response
 
+    async def _fetch_tagged_manifest(self, tag_name):
+        relative_url = "/v2/{name}/manifests/{tag}".format(
+            name=self.remote.namespaced_upstream_name, tag=tag_name
+        )
+        tag_url = urljoin(self.remote.url, relative_url)
+        downloader = self.remote.get_downloader(url=tag_url)
+        download_tag = downloader.run(
+            extra_data={"headers": V2_ACCEPT_HEADERS, "http_method": "head"}
+        )
+        return await self._check_for_existing_manifest(download_tag)
+
+    async def fetch_tagged_manifests(self, tag_pages, pb_tag_list, pb_parsed_tags):
+        """
+        Fetch the manifests of the tags listed in the pages with a fixed number of workers.
+
+        The tags are fetched as soon as their page of the tag list is downloaded and the manifests
+        are yielded as soon as they are fetched. The tags and the manifests are passed through
+        bounded queues, so the memory does not grow with the number of tags.
+
+        Yields:
+            tuple: The tag name and the saved artifact, content data, raw data, and response of
+                the tagged manifest.
+
+        """
+        workers_count = self.remote.download_concurrency or Remote.DEFAULT_DOWNLOAD_CONCURRENCY
+        tag_names = asyncio.Queue(maxsize=workers_count)
+        fetched_manifests = asyncio.Queue(maxsize=workers_count)
+
+        async def list_tags():
+            try:
+                async for tag_page in tag_pages:
+                    tag_page = self.filter_tags(tag_page)
+                    pb_parsed_tags.total += len(tag_page)
+                    for tag_name in tag_page:
+                        await tag_names.put(tag_name)
+                await pb_tag_list.aincrement()
+            except Exception as exc:
+                await fetched_manifests.put(exc)
+            # a cancelled task does not wait for the queues to be consumed
+            for _ in range(workers_count):
+                await tag_names.put(None)
+
+        async def fetch_manifests():
+            try:
+                while (tag_name := await tag_names.get()) is not None:
+                    fetched_manifest = await self._fetch_tagged_manifest(tag_name)
+                    await fetched_manifests.put((tag_name, fetched_manifest))
+            except Exception as exc:
+                await fetched_manifests.put(exc)
+            await fetched_manifests.put(None)
+
+        tasks = [asyncio.ensure_future(list_tags())]
+        tasks.extend(asyncio.ensure_future(fetch_manifests()) for _ in range(workers_count))
+        try:
+            running_workers = workers_count
+            while running_workers:
+                fetched_manifest = await fetched_manifests.get()
+                if fetched_manifest is None:
+                    running_workers -= 1
+                elif isinstance(fetched_manifest, Exception):
+                    raise fetched_manifest
+                else:
+                    yield fetched_manifest
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     async def run(self):
         """
         ContainerFirstStage.
         """
 
-        to_download = []
         BATCH_SIZE = 500
 
         # it can be whether a separate sigstore location or registry with extended signatures API
         signature_source = await self.get_signature_source()
 
-        async with ProgressReport(
-            message="Downloading tag list", code="sync.downloading.tag_list", total=1
-        ) as pb:
-            repo_name = self.remote.namespaced_upstream_name
-            tag_list_url = "/v2/{name}/tags/list".format(name=repo_name)
-            tag_list = await self.get_paginated_tag_list(tag_list_url, repo_name)
-            tag_list = self.filter_tags(tag_list)
-            await pb.aincrement()
-
-        for tag_name in tag_list:
-            relative_url = "/v2/{name}/manifests/{tag}".format(
-                name=self.remote.namespaced_upstream_name, tag=tag_name
-            )
-            tag_url = urljoin(self.remote.url, relative_url)
-            downloader = self.remote.get_downloader(url=tag_url)
-            to_download.append(
-                downloader.run(extra_data={"headers": V2_ACCEPT_HEADERS, "http_method": "head"})
-            )
+        repo_name = self.remote.namespaced_upstream_name
+        tag_list_url = "/v2/{name}/tags/list".format(name=repo_name)
+        if self.signed_only and not signature_source:
+            # cosign signatures are looked up by their tag names, which requires the whole tag list
+            tag_list = self.filter_tags(await self.get_paginated_tag_list(tag_list_url, repo_name))
+            tag_pages = iterate_pages([tag_list])
+        else:
+            tag_pages = self.get_tag_list_pages(tag_list_url, repo_name)
 
         async with ProgressReport(
-            message="Processing Tags",
-            code="sync.processing.tag",
-            total=len(tag_list),
+            message="Downloading tag list", code="sync.downloading.tag_list", total=1
+        ) as pb, ProgressReport(
+            message="Processing Tags", code="sync.processing.tag", total=0
         ) as pb_parsed_tags:
-            to_download_artifact = [
-                self._check_for_existing_manifest(download_tag)
-                for download_tag in asyncio.as_completed(to_download)
-            ]
+            tagged_manifests = self.fetch_tagged_manifests(tag_pages, pb, pb_parsed_tags)
+            try:
+                async for tag_name, fetched_manifest in tagged_manifests:
+                    saved_artifact, content_data, raw_data, response = fetched_manifest
+                    digest = saved_artifact.sha256
+
+                    # Look for cosign signatures
+                    # cosign signature has a tag convention 'sha256-1234.sig'
+                    if self.signed_only and not signature_source:
+                        if (
+                            not (tag_name.endswith(".sig") and tag_name.startswith("sha256-"))
+                            and f"sha256-{digest}.sig" not in tag_list
+                        ):
+                            # skip this tag, there is no corresponding signature
+                            log.info(
+                                "The unsigned image {digest} can't be synced "
+                                "due to a requirement to sync signed content "
+                                "only.".format(digest=digest)
+                            )
+                            # Count the skipped tagks as parsed too.
+                            await pb_parsed_tags.aincrement()
+                            continue
 
-            for artifact in asyncio.as_completed(to_download_artifact):
-                saved_artifact, content_data, raw_data, response = await artifact
+                    media_type = determine_media_type(content_data, response)
+                    validate_manifest(content_data, media_type, digest)
 
-                digest = saved_artifact.sha256
+                    tag_dc = DeclarativeContent(Tag(name=tag_name))
 
-                # Look for cosign signatures
-                # cosign signature has a tag convention 'sha256-1234.sig'
-                if self.signed_only and not signature_source:
-                    if (
-                        not (tag_name.endswith(".sig") and tag_name.startswith("sha256-"))
-                        and f"sha256-{digest}.sig" not in tag_list
-                    ):
-                        # skip this tag, there is no corresponding signature
-                        log.info(
-                            "The unsigned image {digest} can't be synced "
-                            "due to a requirement to sync signed content "
-                            "only.".format(digest=digest)
+                    if media_type in (MEDIA_TYPE.MANIFEST_LIST, MEDIA_TYPE.INDEX_OCI):
+                        list_dc = self.create_tagged_manifest_list(
+                            tag_name, saved_artifact, content_data, media_type
                         )
-                        # Count the skipped tagks as parsed too.
-                        await pb_parsed_tags.aincrement()
-                        continue
-
-                media_type = determine_media_type(content_data, response)
-                validate_manifest(content_data, media_type, digest)
-
-                tag_name = response.url.split("/")[-1]
-                tag_dc = DeclarativeContent(Tag(name=tag_name))
-
-                if media_type in (MEDIA_TYPE.MANIFEST_LIST, MEDIA_TYPE.INDEX_OCI):
-                    list_dc = self.create_tagged_manifest_list(
-                        tag_name, saved_artifact, content_data, media_type
-                    )
-                    for listed_manifest_task in asyncio.as_completed(
-                        [
-                            self.create_listed_manifest(manifest_data)
-                            for manifest_data in content_data.get("manifests")
-                        ]
-                    ):
-                        listed_manifest = await listed_manifest_task
-                        man_dc = listed_manifest["manifest_dc"]
-                        if signature_source is not None:
-                            man_sig_dcs = await self.create_signatures(man_dc, signature_source)
-                            if self.signed_only and not man_sig_dcs:
-                                log.info(
-                                    "The unsigned image {img_digest} which is a part of the "
-                                    "manifest list {ml_digest} (tagged as `{tag}`) can't be "
-                                    "synced due to a requirement to sync signed content only. "
-                                    "The whole manifest list is skipped.".format(
-                                        img_digest=man_dc.content.digest,
-                                        ml_digest=list_dc.content.digest,
-                                        tag=tag_name,
+                        for listed_manifest_task in asyncio.as_completed(
+                            [
+                                self.create_listed_manifest(manifest_data)
+                                for manifest_data in content_data.get("manifests")
+                            ]
+                        ):
+                            listed_manifest = await listed_manifest_task
+                            man_dc = listed_manifest["manifest_dc"]
+                            if signature_source is not None:
+                                man_sig_dcs = await self.create_signatures(man_dc, signature_source)
+                                if self.signed_only and not man_sig_dcs:
+                                    log.info(
+                                        "The unsigned image {img_digest} which is a part of the "
+                                        "manifest list {ml_digest} (tagged as `{tag}`) can't be "
+                                        "synced due to a requirement to sync signed content only. "
+                                        "The whole manifest list is skipped.".format(
+                                            img_digest=man_dc.content.digest,
+                                            ml_digest=list_dc.content.digest,
+                                            tag=tag_name,
+                                        )
                                     )
+                                    # do not pass down the pipeline a manifest list with unsigned
+                                    # manifests.
+                                    break
+                                self.signature_dcs.extend(man_sig_dcs)
+                            list_dc.extra_data["listed_manifests"].append(listed_manifest)
+
+                        else:
+                            # Manifest indices can be signed too. It is not mandatory.
+                            # If signature is available mirror it.
+                            if signature_source is not None:
+                                list_sig_dcs = await self.create_signatures(
+                                    list_dc, signature_source
                                 )
-                                # do not pass down the pipeline a manifest list with unsigned
-                                # manifests.
-                                break
-                            self.signature_dcs.extend(man_sig_dcs)
-                        list_dc.extra_data["listed_manifests"].append(listed_manifest)
+                                if list_sig_dcs:
+                                    self.signature_dcs.extend(list_sig_dcs)
+                            # only pass the manifest list and tag down the pipeline if there were no
+                            # issues with signatures (no `break` in the `for` loop)
+                            tag_dc.extra_data["tagged_manifest_dc"] = list_dc
+                            for listed_manifest in list_dc.extra_data["listed_manifests"]:
+                                await self.handle_blobs(
+                                    listed_manifest["manifest_dc"], listed_manifest["content_data"]
+                                )
+                                self.manifest_dcs.append(listed_manifest["manifest_dc"])
+                            self.manifest_list_dcs.append(list_dc)
+                            self.tag_dcs.append(tag_dc)
 
                     else:
-                        # Manifest indices can be signed too. It is not mandatory.
-                        # If signature is available mirror it.
+                        # Simple tagged manifest
+                        man_dc = self.create_tagged_manifest(
+                            tag_name, saved_artifact, content_data, raw_data, media_type
+                        )
                         if signature_source is not None:
-                            list_sig_dcs = await self.create_signatures(list_dc, signature_source)
-                            if list_sig_dcs:
-                                self.signature_dcs.extend(list_sig_dcs)
-                        # only pass the manifest list and tag down the pipeline if there were no
-                        # issues with signatures (no `break` in the `for` loop)
-                        tag_dc.extra_data["tagged_manifest_dc"] = list_dc
-                        for listed_manifest in list_dc.extra_data["listed_manifests"]:
-                            await self.handle_blobs(
-                                listed_manifest["manifest_dc"], listed_manifest["content_data"]
-                            )
-                            self.manifest_dcs.append(listed_manifest["manifest_dc"])
-                        self.manifest_list_dcs.append(list_dc)
+                            man_sig_dcs = await self.create_signatures(man_dc, signature_source)
+                            if self.signed_only and not man_sig_dcs:
+                                # do not pass down the pipeline unsigned manifests
+                                continue
+                            self.signature_dcs.extend(man_sig_dcs)
+                        tag_dc.extra_data["tagged_manifest_dc"] = man_dc
+                        await self.handle_blobs(man_dc, content_data)
                         self.tag_dcs.append(tag_dc)
+                        self.manifest_dcs.append(man_dc)
 
-                else:
-                    # Simple tagged manifest
-                    man_dc = self.create_tagged_manifest(
-                        tag_name, saved_artifact, content_data, raw_data, media_type
-                    )
-                    if signature_source is not None:
-                        man_sig_dcs = await self.create_signatures(man_dc, signature_source)
-                        if self.signed_only and not man_sig_dcs:
-                            # do not pass down the pipeline unsigned manifests
-                            continue
-                        self.signature_dcs.extend(man_sig_dcs)
-                    tag_dc.extra_data["tagged_manifest_dc"] = man_dc
-                    await self.handle_blobs(man_dc, content_data)
-                    self.tag_dcs.append(tag_dc)
-                    self.manifest_dcs.append(man_dc)
-
-                # Count the skipped tasks as parsed too.
-                await pb_parsed_tags.aincrement()
+                    # Count the skipped tasks as parsed too.
+                    await pb_parsed_tags.aincrement()
 
-                # Flush the queues to prevent overly excessive memory usage.
-                # This will cap the number of in flight high level objects to about BATCH_SIZE.
-                if (
-                    len(self.tag_dcs)
-                    + len(self.signature_dcs)
-                    + len(self.manifest_dcs)
-                    + len(self.manifest_list_dcs)
-                    >= BATCH_SIZE
-                ):
-                    await self.resolve_flush()
+                    # Flush the queues to prevent overly excessive memory usage.
+                    # This will cap the number of in flight high level objects to about BATCH_SIZE.
+                    if (
+                        len(self.tag_dcs)
+                        + len(self.signature_dcs)
+                        + len(self.manifest_dcs)
+                        + len(self.manifest_list_dcs)
+                        >= BATCH_SIZE
+                    ):
+                        await self.resolve_flush()
+            finally:
+                await tagged_manifests.aclose()
 
         await self.resolve_flush()
 
@@ -325,6 +387,14 @@ class ContainerFirstStage(Stage):
         Handle registries that have pagination enabled.
         """
         tag_list = []
+        async for tag_page in self.get_tag_list_pages(rel_link, repo_name):
+            tag_list.extend(tag_page)
+        return tag_list
+
+    async def get_tag_list_pages(self, rel_link, repo_name):
+        """
+        Yield the pages of the tag list as they are downloaded.
+        """
         while True:
             link = urljoin(self.remote.url, rel_link)
             list_downloader = self.remote.get_downloader(url=link)
@@ -333,14 +403,13 @@ class ContainerFirstStage(Stage):
             await list_downloader.run(extra_data={"repo_name": repo_name, "headers": {}})
             with open(list_downloader.path) as tags_raw:
                 tags_dict = json.loads(tags_raw.read())
-                tag_list.extend(tags_dict["tags"])
+            yield tags_dict["tags"]
             link = list_downloader.response_headers.get("Link")
             if link is None:
                 break
             # according RFC5988 URI-reference can be relative or absolute
             _, _, path, params, query, fragm = urlparse(link.split(";")[0].strip(">, <"))
             rel_link = urlunparse(("", "", path, params, query, fragm))
-        return tag_list
 
     async def handle_blobs(self, manifest_dc, content_data):
         """
@@ -1,5 +1,8 @@
+import copy
+import hashlib
 import jwt
 import logging
+import time
 
 from collections import namedtuple
 
@@ -15,9 +18,16 @@ from rest_framework.authentication import (
 from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from pulp_container.app.cache import LocalCache
+from pulp_container.app.utils import load_key_file, load_public_key
+
 Scope = namedtuple("Scope", "resource_type, name, action")
 User = get_user_model()
 
+# (token hash, audience) -> (decoded token, user); entries expire together with the tokens or
+# after TOKEN_CACHE_TTL seconds, whichever comes first, so that changes to the users apply soon
+verified_tokens = LocalCache(max_size=settings.TOKEN_CACHE_SIZE)
+
 
 log = logging.getLogger(__name__)
 
@@ -34,9 +44,8 @@ def _decode_token(encoded_token, request):
         "issuer": settings.TOKEN_SERVER,
         "audience": request.get_host(),
     }
-    with open(settings.PUBLIC_KEY_PATH, "rb") as public_key:
-        decoded_token = jwt.decode(encoded_token, public_key.read(), **JWT_DECODER_CONFIG)
-    return decoded_token
+    public_key = load_key_file(settings.PUBLIC_KEY_PATH, load_public_key)
+    return jwt.decode(encoded_token, public_key, **JWT_DECODER_CONFIG)
 
 
 def _contains_accessible_actions(decoded_token, scopes):
@@ -119,6 +128,12 @@ class TokenAuthentication(BaseAuthentication):
             # Not our type of authorization
             return None
         token = authorization_header[len(self.keyword) + 1 :]
+        cache_key = (hashlib.sha256(token.encode()).hexdigest(), request.get_host())
+        if verified_token := verified_tokens.get(cache_key):
+            decoded_token, user = verified_token
+            # every request gets its own instance of the user
+            return (copy.copy(user), decoded_token)
+
         try:
             decoded_token = _decode_token(token, request)
         except jwt.exceptions.InvalidTokenError:
@@ -136,6 +151,10 @@ class TokenAuthentication(BaseAuthentication):
                 raise AuthenticationFailed("No such user")
         else:
             user = AnonymousUser()
+
+        if expires_at := decoded_token.get("exp"):
+            ttl = min(expires_at - time.time(), settings.TOKEN_CACHE_TTL)
+            verified_tokens.set(cache_key, (decoded_token, copy.copy(user)), ttl)
         return (user, decoded_token)
 
     def authenticate_header(self, request):
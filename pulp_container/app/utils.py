@@ -5,9 +5,11 @@ import subprocess
 import gnupg
 import json
 import logging
+import os
 import time
 
 from asgiref.sync import sync_to_async
+from cryptography.hazmat.primitives import serialization
 from jsonschema import Draft7Validator, validate, ValidationError
 from django.core.files.storage import default_storage as storage
 from django.db import IntegrityError
@@ -15,7 +17,12 @@ from rest_framework.exceptions import Throttled
 
 from pulpcore.plugin.models import Artifact, Task
 
-from pulp_container.constants import ALLOWED_ARTIFACT_TYPES, MANIFEST_MEDIA_TYPES, MEDIA_TYPE
+from pulp_container.constants import (
+    ALLOWED_ARTIFACT_TYPES,
+    MANIFEST_MEDIA_TYPES,
+    MEDIA_TYPE,
+    STREAM_CHUNK_SIZE,
+)
 from pulp_container.app.exceptions import ManifestInvalid
 from pulp_container.app.json_schemas import (
     OCI_INDEX_SCHEMA,
@@ -33,6 +40,9 @@ signature_validator = Draft7Validator(SIGNATURE_SCHEMA)
 
 log = logging.getLogger(__name__)
 
+# (path, parse function) -> (modification time, parsed key)
+_key_files = {}
+
 
 def get_accepted_media_types(headers):
     """
@@ -73,6 +83,28 @@ def urlpath_sanitize(*args):
     return "/".join(segments)
 
 
+def get_path_prefixes(path):
+    """
+    Return the prefixes of a repository path that end at the boundaries of its components.
+
+    A distribution serves the paths below its base path, which is therefore one of the returned
+    prefixes, with or without the trailing slash. The path itself is included as well.
+
+    Args:
+        path (str): The path of a repository, e.g., "library/busybox".
+
+    Returns:
+        list: The prefixes of the path, e.g., ["library", "library/", "library/busybox"].
+
+    """
+    prefixes = []
+    for index, char in enumerate(path):
+        if char == "/":
+            prefixes.extend((path[:index], path[: index + 1]))
+    prefixes.append(path)
+    return prefixes
+
+
 def extract_data_from_signature(signature_raw, man_digest):
     """
     Extract data from an "integrated" signature, aka a signed non-encrypted document.
@@ -304,8 +336,72 @@ async def save_artifact(artifact_attributes):
     return saved_artifact
 
 
+def init_hashers():
+    """Return new hashers for all the digests stored with artifacts."""
+    return {algorithm: getattr(hashlib, algorithm)() for algorithm in Artifact.DIGEST_FIELDS}
+
+
+def write_stream(stream, file, hashers, length=None):
+    """
+    Copy a stream into a file in bounded chunks and update the hashers with the copied data.
+
+    Args:
+        stream: A file-like object to read the data from, e.g., the body of a request.
+        file: A file-like object to write the data to; None to only hash the data.
+        hashers (dict): Hashers keyed by the name of their algorithm.
+        length (int): The number of bytes to copy; the whole stream is copied if not specified.
+
+    Returns:
+        int: The number of copied bytes.
+
+    """
+    size = 0
+    while length is None or size < length:
+        chunk_size = STREAM_CHUNK_SIZE if length is None else min(STREAM_CHUNK_SIZE, length - size)
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        if file is not None:
+            file.write(data)
+        for hasher in hashers.values():
+            hasher.update(data)
+        size += len(data)
+    return size
+
+
 def get_content_data(saved_artifact):
     with storage.open(saved_artifact.file.name) as file:
         raw_data = file.read()
     content_data = json.loads(raw_data)
     return content_data, raw_data
+
+
+def load_key_file(path, parse):
+    """
+    Load a key file and parse it, reusing the parsed key until the file is modified.
+
+    Args:
+        path (str): The path to the key file.
+        parse (function): A function converting the content of the file; its result is cached.
+
+    Returns:
+        The parsed key.
+
+    """
+    modified_at = os.stat(path).st_mtime_ns
+    cached = _key_files.get((path, parse))
+    if cached is None or cached[0] != modified_at:
+        with open(path, "rb") as key_file:
+            cached = (modified_at, parse(key_file.read()))
+        _key_files[(path, parse)] = cached
+    return cached[1]
+
+
+def load_private_key(pem_data):
+    """Parse a PEM encoded private key used for signing tokens."""
+    return serialization.load_pem_private_key(pem_data, password=None)
+
+
+def load_public_key(pem_data):
+    """Parse a PEM encoded public key used for verifying tokens."""
+    return serialization.load_pem_public_key(pem_data)
@@ -69,6 +69,9 @@ SIGNATURE_HEADER = "X-Registry-Supports-Signatures"
 
 MEGABYTE = 1_000_000
 SIGNATURE_PAYLOAD_MAX_SIZE = 4 * MEGABYTE
+MANIFEST_PAYLOAD_MAX_SIZE = 4 * MEGABYTE
+# the size of the buffer used for streaming uploaded data to files
+STREAM_CHUNK_SIZE = 2 * MEGABYTE
 
 SIGNATURE_API_EXTENSION_VERSION = 2
 
@@ -0,0 +1,198 @@
+import os
+import tempfile
+
+from unittest import mock
+
+import jwt
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from pulpcore.plugin.models import Domain, Group
+from pulpcore.plugin.util import assign_role
+
+from pulp_container.app.authorization import (
+    PREFETCHED_BACKENDS,
+    AuthorizationService,
+    PrefetchedPermissions,
+)
+from pulp_container.app.models import ContainerDistribution, ContainerNamespace
+
+User = get_user_model()
+
+
+class TestGenerateToken(SimpleTestCase):
+    """Test issuing Bearer tokens signed with the configured key pair."""
+
+    def setUp(self):
+        """Generate the key pair the tokens are signed with."""
+        self.key_dir = tempfile.TemporaryDirectory()
+        self.private_key = ec.generate_private_key(ec.SECP256R1())
+        private_key_path = os.path.join(self.key_dir.name, "private.pem")
+        with open(private_key_path, "wb") as key_file:
+            key_file.write(
+                self.private_key.private_bytes(
+                    serialization.Encoding.PEM,
+                    serialization.PrivateFormat.PKCS8,
+                    serialization.NoEncryption(),
+                )
+            )
+        public_key_path = os.path.join(self.key_dir.name, "public.pem")
+        with open(public_key_path, "wb") as key_file:
+            key_file.write(
+                self.private_key.public_key().public_bytes(
+                    serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+                )
+            )
+        self.settings_override = self.settings(
+            PRIVATE_KEY_PATH=private_key_path,
+            PUBLIC_KEY_PATH=public_key_path,
+            TOKEN_SERVER="https://registry.example.com/token/",
+            TOKEN_SIGNATURE_ALGORITHM="ES256",
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        """Restore the settings and remove the key pair."""
+        self.settings_override.disable()
+        self.key_dir.cleanup()
+
+    def test_kid_header_is_generated_once(self):
+        """Check that the kid header is computed once per key and the tokens are signed."""
+        with mock.patch.object(
+            AuthorizationService,
+            "generate_kid_header",
+            wraps=AuthorizationService.generate_kid_header,
+        ) as generate_kid_header:
+            service = AuthorizationService(AnonymousUser(), "registry.example.com", [])
+            tokens = [service.generate_token()["token"] for _ in range(3)]
+
+        (public_key,), _ = generate_kid_header.call_args
+        kid = AuthorizationService.generate_kid_header(public_key)
+        generate_kid_header.assert_called_once()
+        for token in tokens:
+            self.assertEqual(jwt.get_unverified_header(token)["kid"], kid)
+            claims = jwt.decode(
+                token,
+                self.private_key.public_key(),
+                algorithms=["ES256"],
+                audience="registry.example.com",
+            )
+            self.assertEqual(claims["access"], [])
+
+
+class TestDetermineAccess(TestCase):
+    """Test the evaluation of permissions for scopes requested within a single token."""
+
+    def setUp(self):
+        """Create private distributions and grant the user roles on some of them."""
+        self.user = User.objects.create(username="consumer")
+        namespace = ContainerNamespace.objects.create(name="scopes")
+        self.distributions = [
+            ContainerDistribution.objects.create(
+                name=f"scopes-{i}", base_path=f"scopes/{i}", namespace=namespace, private=True
+            )
+            for i in range(5)
+        ]
+        assign_role("container.containerdistribution_consumer", self.user, self.distributions[0])
+        assign_role(
+            "container.containerdistribution_collaborator", self.user, self.distributions[1]
+        )
+
+    def determine_access(self, scopes):
+        """Determine the access granted for the scopes and count the executed queries."""
+        with CaptureQueriesContext(connection) as context:
+            access = AuthorizationService(self.user, "localhost", scopes).determine_access()
+        return access, len(context.captured_queries)
+
+    def test_permitted_actions(self):
+        """Check that only the actions allowed by the user's roles are granted."""
+        access, _ = self.determine_access(
+            ["repository:scopes/0:pull,push", "repository:scopes/1:pull,push"]
+        )
+        self.assertEqual(access[0]["actions"], ["pull"])
+        self.assertEqual(sorted(access[1]["actions"]), ["pull", "push"])
+
+    def test_queries_do_not_grow_with_scopes(self):
+        """Check that the number of queries does not depend on the number of scopes."""
+        missing = ["repository:scopes/missing:pull", "repository:scopes-missing/repo:pull"]
+        _, few_scopes_queries = self.determine_access(["repository:scopes/0:pull,push"] + missing)
+        access, queries = self.determine_access(
+            [f"repository:{d.base_path}:pull,push" for d in self.distributions] + missing
+        )
+
+        self.assertEqual(len(access), len(self.distributions) + 2)
+        self.assertFalse(access[-1]["actions"])
+        self.assertEqual(queries, few_scopes_queries)
+
+
+class GrantingBackend:
+    """An authentication backend granting the pull permission on all distributions."""
+
+    def authenticate(self, request, **credentials):
+        """Authenticate nobody."""
+        return None
+
+    def has_perm(self, user, perm, obj=None):
+        """Grant the pull permission."""
+        return perm == "container.pull_containerdistribution"
+
+
+class TestPrefetchedPermissions(TestCase):
+    """Test that the prefetched permissions match the ones checked by the backends."""
+
+    def setUp(self):
+        """Create a private distribution and a user."""
+        self.user = User.objects.create(username="prefetched")
+        self.namespace = ContainerNamespace.objects.create(name="prefetched")
+        self.distribution = ContainerDistribution.objects.create(
+            name="prefetched", base_path="prefetched/0", namespace=self.namespace, private=True
+        )
+
+    def assert_same_permission(self, perm, obj=None):
+        """Check that the prefetched permission equals the one of the backends and return it."""
+        permissions = PrefetchedPermissions(self.user, [self.distribution, self.namespace])
+        has_perm = permissions.has_perm(perm, obj)
+        self.assertEqual(has_perm, self.user.has_perm(perm, obj))
+        return has_perm
+
+    def test_group_roles(self):
+        """Check that the roles of the user's groups are taken into account."""
+        group = Group.objects.create(name="prefetched")
+        group.user_set.add(self.user)
+        assign_role("container.containerdistribution_consumer", group, self.distribution)
+
+        self.assertTrue(
+            self.assert_same_permission("container.pull_containerdistribution", self.distribution)
+        )
+        self.assertFalse(self.assert_same_permission("container.pull_containerdistribution"))
+
+    def test_domain_roles(self):
+        """Check that the roles assigned within a domain are not global roles."""
+        domain = Domain.objects.get(name="default")
+        assign_role("container.containerdistribution_consumer", self.user, domain=domain)
+
+        self.assertFalse(self.assert_same_permission("container.pull_containerdistribution"))
+        self.assertTrue(self.assert_same_permission("container.pull_containerdistribution", domain))
+
+    def test_permission_of_other_model(self):
+        """Check that a permission for another model raises an error like the backend does."""
+        permissions = PrefetchedPermissions(self.user, [self.distribution, self.namespace])
+
+        with self.assertRaises(RuntimeError):
+            permissions.has_perm("container.pull_containerdistribution", self.namespace)
+
+    def test_extra_backend(self):
+        """Check that the permissions granted by other backends are not bypassed."""
+        backends = sorted(PREFETCHED_BACKENDS) + [f"{__name__}.GrantingBackend"]
+        with override_settings(AUTHENTICATION_BACKENDS=backends):
+            access = AuthorizationService(
+                self.user, "localhost", ["repository:prefetched/0:pull"]
+            ).determine_access()
+
+        self.assertEqual(access[0]["actions"], ["pull"])
@@ -0,0 +1,326 @@
+import asyncio
+import json
+import tempfile
+import uuid
+
+from unittest import mock
+
+from aiohttp.web import FileResponse, Response
+from django.test import SimpleTestCase, override_settings
+
+from pulpcore.plugin.models import Repository, RepositoryVersion
+
+from pulp_container.app.cache import (
+    RESOLVED_DISTRIBUTION_KEY,
+    LocalCache,
+    RegistryApiCache,
+    RegistryContentCache,
+    SharedCache,
+    SingleFlight,
+    _dump_instance,
+    invalidate_not_found_entries,
+    resolve_distribution,
+)
+from pulp_container.app.exceptions import BlobNotFound
+from pulp_container.app.models import (
+    ContainerDistribution,
+    ContainerPullThroughDistribution,
+    invalidate_deleted_version_cache,
+)
+from pulp_container.app.registry import Registry
+
+
+class TestLocalCache(SimpleTestCase):
+    """A test case for the per-process cache."""
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Check that the least recently used entry is dropped when the cache is full."""
+        cache = LocalCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+
+        cache.set("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_expired_entry_is_missed(self):
+        """Check that entries are not returned after their TTL elapses."""
+        cache = LocalCache(max_size=10, ttl=5)
+        with mock.patch("pulp_container.app.cache.time.monotonic", return_value=100):
+            cache.set("a", 1)
+            cache.set("b", 2, ttl=60)
+        with mock.patch("pulp_container.app.cache.time.monotonic", return_value=106):
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual(cache.get("b"), 2)
+
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_disabled_cache_stores_nothing(self):
+        """Check that a cache with zero size never stores entries."""
+        cache = LocalCache(max_size=0)
+        cache.set("a", 1)
+        self.assertIsNone(cache.get("a"))
+
+
+class TestInlineBody(SimpleTestCase):
+    """A test case for storing small files directly in the content cache entries."""
+
+    def setUp(self):
+        """Create a file mimicking a small manifest."""
+        self.file = tempfile.NamedTemporaryFile()
+        self.file.write(b'{"schemaVersion": 2}')
+        self.file.flush()
+        self.headers = {"Content-Type": "application/json", "Docker-Content-Digest": "sha256:0"}
+
+    def tearDown(self):
+        """Remove the file."""
+        self.file.close()
+
+    @override_settings(CACHE_INLINE_MAX_SIZE=1024)
+    def test_small_file_is_inlined(self):
+        """Check that a file response is converted to an in-memory response."""
+        response = FileResponse(self.file.name, headers=self.headers)
+        inlined = asyncio.run(RegistryContentCache.inline_body(response))
+
+        self.assertIsInstance(inlined, Response)
+        self.assertEqual(inlined.body, b'{"schemaVersion": 2}')
+        self.assertEqual(inlined.headers["Docker-Content-Digest"], "sha256:0")
+        self.assertEqual(inlined.content_type, "application/json")
+
+    @override_settings(CACHE_INLINE_MAX_SIZE=10)
+    def test_large_file_is_not_inlined(self):
+        """Check that a file response exceeding the limit is kept untouched."""
+        response = FileResponse(self.file.name, headers=self.headers)
+        self.assertIs(asyncio.run(RegistryContentCache.inline_body(response)), response)
+
+
+@override_settings(CACHE_ENABLED=False)
+class TestSingleFlight(SimpleTestCase):
+    """A test case for coalescing concurrent calls."""
+
+    def test_concurrent_calls_are_coalesced(self):
+        """Check that concurrent calls with the same key share one execution."""
+        calls = []
+
+        async def download(identifier):
+            calls.append(identifier)
+            await asyncio.sleep(0.01)
+            return identifier
+
+        async def run_calls():
+            single_flight = SingleFlight(namespace="test")
+            return await asyncio.gather(
+                *(single_flight.run("latest", lambda: download("latest")) for _ in range(10)),
+                single_flight.run("other", lambda: download("other")),
+            )
+
+        results = asyncio.run(run_calls())
+
+        self.assertEqual(results, ["latest"] * 10 + ["other"])
+        self.assertEqual(sorted(calls), ["latest", "other"])
+
+    def test_finished_calls_are_forgotten(self):
+        """Check that a call is executed again once the previous one finished."""
+        calls = []
+
+        async def download():
+            calls.append(None)
+            return len(calls)
+
+        async def run_calls():
+            single_flight = SingleFlight(namespace="test")
+            first = await single_flight.run("latest", download)
+            second = await single_flight.run("latest", download)
+            return first, second
+
+        self.assertEqual(asyncio.run(run_calls()), (1, 2))
+
+
+class TestSharedCache(SimpleTestCase):
+    """A test case for the values shared by the workers."""
+
+    @override_settings(CACHE_ENABLED=True)
+    def test_values_are_stored_in_redis(self):
+        """Check that the values are stored in Redis so that other workers can read them."""
+        values = {}
+        redis = mock.Mock(
+            get=mock.AsyncMock(side_effect=lambda key: values.get(key)),
+            set=mock.AsyncMock(side_effect=lambda key, value, ex: values.update({key: value})),
+        )
+        cache = SharedCache(namespace="test", max_size=10, ttl=60)
+        cache._redis = redis
+
+        async def store_and_read():
+            await cache.set("tag", 1.5)
+            return await cache.get("tag"), await cache.get("missing", 0)
+
+        self.assertEqual(asyncio.run(store_and_read()), (1.5, 0))
+        redis.set.assert_called_once_with("test:tag", "1.5", ex=60)
+        self.assertEqual(len(cache._local), 0)
+
+    @override_settings(CACHE_ENABLED=False)
+    def test_values_are_kept_locally_without_redis(self):
+        """Check that the values are kept by the worker when the Redis cache is disabled."""
+        cache = SharedCache(namespace="test", max_size=10, ttl=60)
+
+        async def store_and_delete():
+            await cache.set("tag", 1.5)
+            stored = await cache.get("tag")
+            await cache.delete("tag")
+            return stored, await cache.get("tag")
+
+        self.assertEqual(asyncio.run(store_and_delete()), (1.5, None))
+
+
+@override_settings(CACHE_NOT_FOUND_TTL=30)
+class TestNotFoundCache(SimpleTestCase):
+    """A test case for caching "not found" responses of the registry API."""
+
+    def test_not_found_response_is_cached(self):
+        """Check that a "not found" error is stored and served as a cached response."""
+        cache = RegistryApiCache(base_key="test")
+        cache.redis = mock.Mock(ttl=mock.Mock(return_value=-1))
+        entries = {}
+
+        def handler():
+            raise BlobNotFound(digest="sha256:0")
+
+        with mock.patch.object(
+            cache, "set", side_effect=lambda key, entry, **kw: entries.update({key: entry})
+        ):
+            with self.assertRaises(BlobNotFound):
+                cache.make_entry("key", "test", handler, (), {})
+        cache.redis.sadd.assert_called_once_with("not_found_keys:test", "key")
+        # the other entries of the base path do not expire with the "not found" entry
+        cache.redis.expire.assert_any_call("not_found_keys:test", 30)
+        self.assertNotIn(mock.call("test", 30), cache.redis.expire.call_args_list)
+
+        with mock.patch.object(cache, "get", side_effect=lambda key, base_key: entries.get(key)):
+            response = cache.make_response("key", "test")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content)["errors"][0]["code"], "BLOB_UNKNOWN")
+
+    @override_settings(CACHE_ENABLED=True)
+    @mock.patch("pulp_container.app.cache.transaction")
+    @mock.patch("pulp_container.app.cache.SyncContentCache")
+    def test_only_not_found_entries_are_invalidated(self, cache_class, transaction):
+        """Check that only the tracked "not found" entries are deleted after the commit."""
+        transaction.on_commit.side_effect = lambda function: function()
+        pipeline = cache_class.return_value.redis.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [{b"key"}, 1, set(), 0]
+        repository = mock.Mock()
+        repository.distributions.values_list.return_value = ["test", "other"]
+
+        invalidate_not_found_entries(repository)
+
+        pipeline.smembers.assert_any_call("not_found_keys:test")
+        pipeline.smembers.assert_any_call("not_found_keys:other")
+        pipeline.hdel.assert_called_once_with("test", b"key")
+        repository.invalidate_cache.assert_not_called()
+
+
+class TestResolveDistribution(SimpleTestCase):
+    """A test case for resolving distributions from the cache."""
+
+    def test_cached_distribution_is_resolved_without_queries(self):
+        """Check that the distribution, repository, and version are loaded from the cache."""
+        domain_id = uuid.uuid4()
+        repository = Repository(
+            pulp_id=uuid.uuid4(), pulp_domain_id=domain_id, name="test", pulp_type="container"
+        )
+        repository_version = RepositoryVersion(
+            pulp_id=uuid.uuid4(), repository=repository, number=3, complete=True
+        )
+        distribution = ContainerDistribution(
+            pulp_id=uuid.uuid4(),
+            pulp_domain_id=domain_id,
+            name="test",
+            base_path="test",
+            repository=repository,
+        )
+        distribution.distribution_ptr_id = distribution.pulp_id
+        resolved = {
+            "distribution": _dump_instance(distribution),
+            "repository": _dump_instance(repository),
+            "repository_version": _dump_instance(repository_version),
+            "pull_through_distribution": None,
+        }
+        cache = mock.Mock(get=mock.Mock(return_value=json.dumps(resolved).encode()))
+
+        # database queries are not allowed in this test case
+        cached_distribution, cached_repository, cached_version = resolve_distribution("test", cache)
+
+        cache.get.assert_called_once_with(RESOLVED_DISTRIBUTION_KEY, base_key="test")
+        self.assertEqual(cached_distribution.pk, distribution.pulp_id)
+        self.assertEqual(cached_distribution.base_path, "test")
+        self.assertFalse(cached_distribution._state.adding)
+        self.assertEqual(cached_repository.pk, repository.pk)
+        self.assertIs(cached_distribution.repository, cached_repository)
+        self.assertEqual(cached_version.number, 3)
+        self.assertIs(cached_version.repository, cached_repository)
+
+    def test_cached_pull_through_distribution_carries_tag_freshness(self):
+        """Check that the freshness of the tags is resolved together with the distribution."""
+        domain_id = uuid.uuid4()
+        pull_through_distribution = ContainerPullThroughDistribution(
+            pulp_id=uuid.uuid4(), pulp_domain_id=domain_id, tag_freshness_ttl=300
+        )
+        pull_through_distribution.distribution_ptr_id = pull_through_distribution.pulp_id
+        distribution = ContainerDistribution(
+            pulp_id=uuid.uuid4(),
+            pulp_domain_id=domain_id,
+            base_path="cached/test",
+            pull_through_distribution=pull_through_distribution,
+        )
+        distribution.distribution_ptr_id = distribution.pulp_id
+        resolved = {
+            "distribution": _dump_instance(distribution),
+            "repository": None,
+            "repository_version": None,
+            "pull_through_distribution": _dump_instance(pull_through_distribution),
+        }
+        cache = mock.Mock(get=mock.Mock(return_value=json.dumps(resolved).encode()))
+
+        # database queries are not allowed in this test case
+        cached_distribution, _, _ = resolve_distribution("cached/test", cache)
+
+        self.assertEqual(
+            cached_distribution.pull_through_distribution_id, pull_through_distribution.pulp_id
+        )
+        self.assertEqual(cached_distribution.pull_through_distribution.tag_freshness_ttl, 300)
+
+    @override_settings(CACHE_ENABLED=True)
+    @mock.patch("pulp_container.app.models.transaction")
+    @mock.patch("pulp_container.app.models.Repository")
+    def test_deleted_version_invalidates_resolved_distribution(self, repository_class, transaction):
+        """Check that the distributions of the repository are invalidated on a version delete."""
+        transaction.on_commit.side_effect = lambda function: function()
+        repository_version = RepositoryVersion(repository_id=uuid.uuid4(), number=3)
+
+        invalidate_deleted_version_cache(RepositoryVersion, repository_version)
+
+        _, kwargs = repository_class.objects.filter.call_args
+        self.assertEqual(kwargs["pk"], repository_version.repository_id)
+        repository = repository_class.objects.filter.return_value.first.return_value
+        repository.invalidate_cache.assert_called_once_with()
+
+    @mock.patch("pulp_container.app.registry.resolve_distribution")
+    def test_tag_distribution_is_matched_from_the_cache(self, resolve):
+        """Check that the content app does not query the distribution of a cached resolution."""
+        distribution = ContainerDistribution(pulp_domain_id=uuid.uuid4(), base_path="test")
+        repository_version = RepositoryVersion(number=3)
+        resolve.return_value = (distribution, None, repository_version)
+        registry = Registry()
+
+        with mock.patch.object(Registry, "_match_distribution") as match_distribution:
+            with mock.patch.object(Registry, "_permit") as permit:
+                matched = asyncio.run(registry._match_tag_distribution("request", "test"))
+
+        self.assertEqual(matched, (distribution, None, repository_version))
+        match_distribution.assert_not_called()
+        permit.assert_called_once_with("request", distribution)
@@ -0,0 +1,47 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from pulpcore.plugin.util import assign_role
+
+from pulp_container.app.models import ContainerDistribution, ContainerNamespace
+from pulp_container.app.registry_api import CatalogView, accessible_distributions
+
+User = get_user_model()
+
+
+class TestCatalogView(TestCase):
+    """Test listing the repositories in the catalog."""
+
+    def setUp(self):
+        """Create public and private distributions and grant the user access to one of them."""
+        accessible_distributions.clear()
+        self.user = User.objects.create(username="catalog")
+        namespace = ContainerNamespace.objects.create(name="catalog")
+        assign_role("container.containernamespace_consumer", self.user, namespace)
+        for base_path, private in (("catalog/a", False), ("catalog/b", True), ("catalog/c", True)):
+            distribution = ContainerDistribution.objects.create(
+                name=base_path, base_path=base_path, namespace=namespace, private=private
+            )
+        assign_role("container.containerdistribution_consumer", self.user, distribution)
+
+    def list_catalog(self, user):
+        """List the base paths of the distributions in the catalog for the user."""
+        view = CatalogView()
+        view.request = mock.Mock(user=user)
+        return sorted(view.get_queryset().values_list("base_path", flat=True))
+
+    def test_private_repositories_are_filtered(self):
+        """Check that only public and accessible private repositories are listed."""
+        self.assertEqual(self.list_catalog(self.user), ["catalog/a", "catalog/c"])
+
+    def test_accessible_repositories_are_cached(self):
+        """Check that the permissions are evaluated once for consecutive pages."""
+        self.list_catalog(self.user)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.list_catalog(self.user), ["catalog/a", "catalog/c"])
+
+        self.assertEqual(len(context.captured_queries), 1)
@@ -0,0 +1,357 @@
+import json
+import os
+import tempfile
+
+from collections import Counter
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, InMemoryStorage
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from pulpcore.plugin.models import Artifact, ContentArtifact
+
+from pulp_container.app.exceptions import ManifestTooLarge
+from pulp_container.app.models import (
+    MEDIA_TYPE,
+    Blob,
+    BlobManifest,
+    ContainerDistribution,
+    ContainerPushRepository,
+    Manifest,
+    PendingTag,
+    Tag,
+    filter_pushed_content,
+    get_pending_tag,
+    get_pending_tags,
+)
+from pulp_container.app.registry_api import Manifests, TagsListView
+from pulp_container.app.tasks import add_pending_tags, commit_pending_tags
+from pulp_container.constants import MANIFEST_PAYLOAD_MAX_SIZE
+
+# storage operation -> number of calls
+operations = Counter()
+
+
+class CountingStorageMixin:
+    """Count the operations performed on a storage."""
+
+    def _open(self, name, mode="rb"):
+        operations["open"] += 1
+        return super()._open(name, mode)
+
+    def _save(self, name, content):
+        operations["save"] += 1
+        return super()._save(name, content)
+
+    def exists(self, name):
+        operations["exists"] += 1
+        return super().exists(name)
+
+    def delete(self, name):
+        operations["delete"] += 1
+        return super().delete(name)
+
+
+class CountingFileSystemStorage(CountingStorageMixin, FileSystemStorage):
+    """A filesystem storage counting its operations."""
+
+
+class CountingObjectStorage(CountingStorageMixin, InMemoryStorage):
+    """A stand-in for an object storage, which does not provide local paths to the files."""
+
+
+class TestFilterPushedContent(TestCase):
+    """Test resolving the content referenced by a pushed manifest."""
+
+    def setUp(self):
+        """Create a repository with blobs in its versions and pending blobs."""
+        self.repository = ContainerPushRepository.objects.create(name="push")
+        self.blobs = {
+            name: Blob.objects.create(digest=f"sha256:{name * 64}") for name in ("a", "b", "c", "d")
+        }
+        with self.repository.new_version() as new_version:
+            new_version.add_content(
+                Blob.objects.filter(pk__in=[self.blobs["a"].pk, self.blobs["c"].pk])
+            )
+        with self.repository.new_version() as new_version:
+            new_version.remove_content(Blob.objects.filter(pk=self.blobs["c"].pk))
+        self.repository.pending_blobs.add(self.blobs["b"])
+
+    def filter_digests(self, repository_version, pending=None):
+        """Return the digests of the blobs present in the version or pending."""
+        queryset = Blob.objects.filter(digest__in=[blob.digest for blob in self.blobs.values()])
+        found = filter_pushed_content(queryset, repository_version, pending)
+        return sorted(blob.digest[-1] for blob in found)
+
+    def test_latest_and_pending_content_is_found(self):
+        """Check that removed and unrelated blobs are not found."""
+        latest_version = self.repository.latest_version()
+        self.assertEqual(
+            self.filter_digests(latest_version, self.repository.pending_blobs), ["a", "b"]
+        )
+        self.assertEqual(self.filter_digests(latest_version), ["a"])
+
+    def test_older_version_content_is_found(self):
+        """Check that the content is resolved against the given version."""
+        first_version = self.repository.versions.get(number=1)
+        self.assertEqual(self.filter_digests(first_version), ["a", "c"])
+
+
+class TestManifestPush(TestCase):
+    """Test the storage operations performed per pushed manifest."""
+
+    def setUp(self):
+        """Store the artifacts and temporary files in a temporary directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.settings_override = self.settings(
+            MEDIA_ROOT=self.temp_dir.name,
+            WORKING_DIRECTORY=self.temp_dir.name,
+            FILE_UPLOAD_TEMP_DIR=self.temp_dir.name,
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        """Restore the settings and remove the directory."""
+        self.settings_override.disable()
+        self.temp_dir.cleanup()
+
+    def push_manifests(self, backend, count=3):
+        """Push tagged manifests to a repository stored in the given backend."""
+        storages = {**settings.STORAGES, "default": {"BACKEND": backend}}
+        with self.settings(STORAGES=storages):
+            repository = ContainerPushRepository.objects.create(name=backend)
+            ContainerDistribution.objects.create(
+                name=backend, base_path="push", repository=repository
+            )
+
+            config_data = json.dumps({"config": {"Labels": {"push": "test"}}}).encode()
+            with tempfile.NamedTemporaryFile(dir=self.temp_dir.name, delete=False) as temp_file:
+                temp_file.write(config_data)
+            config_artifact = Artifact.init_and_validate(temp_file.name)
+            config_artifact.save()
+            config_blob = Blob.objects.create(digest=f"sha256:{config_artifact.sha256}")
+            ContentArtifact.objects.create(
+                artifact=config_artifact, content=config_blob, relative_path=config_blob.digest
+            )
+            layer_blob = Blob.objects.create(digest=f"sha256:{os.urandom(32).hex()}")
+            repository.pending_blobs.add(config_blob, layer_blob)
+
+            operations.clear()
+            completed_task = mock.Mock(state="completed")
+            with mock.patch(
+                "pulp_container.app.registry_api.dispatch", return_value=completed_task
+            ):
+                for i in range(count):
+                    manifest = {
+                        "schemaVersion": 2,
+                        "mediaType": MEDIA_TYPE.MANIFEST_OCI,
+                        "config": {
+                            "mediaType": "application/vnd.oci.image.config.v1+json",
+                            "digest": config_blob.digest,
+                            "size": len(config_data),
+                        },
+                        "layers": [
+                            {
+                                "mediaType": "application/vnd.oci.image.layer.v1.tar+gzip",
+                                "digest": layer_blob.digest,
+                                "size": 1024,
+                            }
+                        ],
+                        "annotations": {"build": str(i)},
+                    }
+                    request = RequestFactory().put(
+                        f"/v2/push/manifests/{i}",
+                        data=json.dumps(manifest),
+                        content_type=MEDIA_TYPE.MANIFEST_OCI,
+                    )
+                    response = Manifests().put(request, "push", pk=f"build-{i}")
+                    self.assertEqual(response.status_code, 201)
+
+        return {operation: calls / count for operation, calls in operations.items()}
+
+    def test_filesystem_push(self):
+        """Check that a pushed manifest is not read back from the filesystem storage."""
+        operations_per_manifest = self.push_manifests(f"{__name__}.CountingFileSystemStorage")
+
+        # the manifest is saved; only the config blob is read to extract the labels
+        self.assertEqual(operations_per_manifest["save"], 1)
+        self.assertEqual(operations_per_manifest["open"], 1)
+
+    def test_object_storage_push(self):
+        """Check that a pushed manifest is not read back from the object storage."""
+        operations_per_manifest = self.push_manifests(f"{__name__}.CountingObjectStorage")
+
+        self.assertEqual(operations_per_manifest["save"], 1)
+        self.assertEqual(operations_per_manifest["open"], 1)
+
+
+class TestManifestSize(SimpleTestCase):
+    """Test the limit of the size of pushed manifests."""
+
+    def test_large_manifest_is_rejected(self):
+        """Check that a manifest over the limit is rejected before anything is stored."""
+        request = RequestFactory().put(
+            "/v2/push/manifests/latest",
+            data=b" " * (MANIFEST_PAYLOAD_MAX_SIZE + 1),
+            content_type=MEDIA_TYPE.MANIFEST_OCI,
+        )
+
+        with mock.patch.object(Manifests, "receive_artifact") as receive_artifact:
+            with self.assertRaises(ManifestTooLarge) as context:
+                Manifests().put(request, "push", pk="latest")
+
+        receive_artifact.assert_not_called()
+        self.assertEqual(context.exception.status_code, 413)
+        self.assertEqual(context.exception.detail["errors"][0]["code"], "MANIFEST_INVALID")
+
+
+class TestAddPendingTags(TestCase):
+    """Test adding the tags pushed to a repository in a batch."""
+
+    def setUp(self):
+        """Create a repository with a tagged manifest and manifests pushed afterwards."""
+        self.repository = ContainerPushRepository.objects.create(name="pending")
+        self.manifests = []
+        for i in range(3):
+            blob = Blob.objects.create(digest=f"sha256:{str(i) * 64}")
+            manifest = Manifest.objects.create(
+                digest=f"sha256:{str(i + 5) * 64}",
+                schema_version=2,
+                media_type=MEDIA_TYPE.MANIFEST_OCI,
+                config_blob=blob,
+            )
+            BlobManifest.objects.create(manifest=manifest, manifest_blob=blob)
+            self.manifests.append(manifest)
+
+        tag = Tag.objects.create(name="latest", tagged_manifest=self.manifests[0])
+        with self.repository.new_version() as new_version:
+            new_version.add_content(Tag.objects.filter(pk=tag.pk))
+
+    def push(self, name, manifest):
+        """Record a pushed tag."""
+        tag = Tag.objects.create(name=name, tagged_manifest=manifest)
+        PendingTag.objects.create(repository=self.repository, tag=tag)
+        self.repository.pending_manifests.add(manifest)
+
+    def test_pushes_are_folded_into_one_version(self):
+        """Check that the last push of every tag name is added in a single version."""
+        self.push("latest", self.manifests[1])
+        self.push("stable", self.manifests[1])
+        self.push("latest", self.manifests[2])
+
+        add_pending_tags(str(self.repository.pk))
+
+        latest_version = self.repository.latest_version()
+        self.assertEqual(latest_version.number, 2)
+        tags = Tag.objects.filter(pk__in=latest_version.content)
+        self.assertEqual(
+            sorted((tag.name, tag.tagged_manifest.digest) for tag in tags),
+            [("latest", self.manifests[2].digest), ("stable", self.manifests[1].digest)],
+        )
+        self.assertEqual(Blob.objects.filter(pk__in=latest_version.content).count(), 2)
+        self.assertFalse(self.repository.pending_tags.exists())
+        self.assertFalse(self.repository.pending_manifests.exists())
+
+    @mock.patch("pulp_container.app.registry_api.dispatch_pending_tags_task")
+    def test_failed_tags_are_added_with_next_push(self, dispatch_pending_tags_task):
+        """Check that the tags of a failed task are added by the task of the next push."""
+        self.push("latest", self.manifests[1])
+        with mock.patch.object(
+            ContainerPushRepository, "new_version", side_effect=RuntimeError("failed")
+        ):
+            with self.assertRaises(RuntimeError):
+                add_pending_tags(str(self.repository.pk))
+        self.assertEqual(self.repository.latest_version().number, 1)
+        self.assertEqual(self.repository.pending_tags.count(), 1)
+
+        tag = Tag.objects.create(name="stable", tagged_manifest=self.manifests[2])
+        with mock.patch.object(self.repository, "invalidate_cache"):
+            Manifests.add_pending_tag(self.repository, tag)
+        dispatch_pending_tags_task.assert_called_once_with(
+            add_pending_tags, self.repository, self.repository
+        )
+        add_pending_tags(str(self.repository.pk))
+
+        tags = Tag.objects.filter(pk__in=self.repository.latest_version().content)
+        self.assertEqual(
+            sorted((tag.name, tag.tagged_manifest.digest) for tag in tags),
+            [("latest", self.manifests[1].digest), ("stable", self.manifests[2].digest)],
+        )
+        self.assertFalse(self.repository.pending_tags.exists())
+
+    def test_no_version_without_pending_tags(self):
+        """Check that a task dispatched for already added tags does not create a version."""
+        add_pending_tags(str(self.repository.pk))
+
+        self.assertEqual(self.repository.latest_version().number, 1)
+
+    def test_pending_tag_is_served(self):
+        """Check that the last pushed tag of a name is served before it is added to a version."""
+        self.assertIsNone(get_pending_tag(self.repository, "latest"))
+
+        self.push("latest", self.manifests[1])
+        self.push("latest", self.manifests[2])
+
+        pending_tag = get_pending_tag(self.repository, "latest")
+        self.assertEqual(pending_tag.tagged_manifest, self.manifests[2])
+
+    @mock.patch("pulp_container.app.tasks.pending_tags.dispatch")
+    @mock.patch("pulp_container.app.tasks.pending_tags.time.sleep")
+    def test_full_commit_window_closes_early(self, sleep, dispatch):
+        """Check that adding the pushes is dispatched without waiting once the window is full."""
+        self.repository.push_commit_window = 60000
+        self.repository.push_commit_size = 2
+        self.repository.save()
+        self.push("latest", self.manifests[1])
+        self.push("stable", self.manifests[2])
+
+        commit_pending_tags(str(self.repository.pk))
+
+        sleep.assert_not_called()
+        dispatch.assert_called_once_with(
+            add_pending_tags,
+            exclusive_resources=[self.repository],
+            kwargs={"repository_pk": str(self.repository.pk)},
+        )
+
+    def list_tags(self, query=""):
+        """List the tags of the latest version and the pending tags of the repository."""
+        request = APIRequestFactory().get(f"/v2/pending/tags/list/{query}")
+        request.resolver_match = mock.Mock(kwargs={"path": "pending"})
+        view = TagsListView()
+        view.request = Request(request)
+        view.format_kwarg = None
+        served = (None, self.repository, self.repository.latest_version())
+        with mock.patch.object(TagsListView, "get_drv_pull", return_value=served):
+            page = view.paginate_queryset(view.get_queryset())
+        return [tag["name"] for tag in page]
+
+    def test_pending_tags_are_listed(self):
+        """Check that the names of the pushed tags are listed before they are added."""
+        self.push("stable", self.manifests[1])
+        self.push("latest", self.manifests[2])
+        self.push("stable", self.manifests[2])
+
+        self.assertEqual(self.list_tags(), ["latest", "stable"])
+        self.assertEqual(self.list_tags("?n=1"), ["latest"])
+        self.assertEqual(self.list_tags("?n=1&last=latest"), ["stable"])
+        self.assertFalse(get_pending_tags(None).exists())
+
+    @mock.patch("pulp_container.app.registry_api.dispatch_pending_tags_task")
+    def test_push_filling_commit_window_is_added_right_away(self, dispatch_pending_tags_task):
+        """Check that the push filling the commit window does not wait for the window."""
+        self.repository.push_commit_window = 60000
+        self.repository.push_commit_size = 2
+        self.repository.save()
+        self.push("stable", self.manifests[1])
+        tag = Tag.objects.create(name="latest", tagged_manifest=self.manifests[2])
+
+        with mock.patch.object(self.repository, "invalidate_cache"):
+            Manifests.add_pending_tag(self.repository, tag)
+
+        dispatch_pending_tags_task.assert_called_once_with(
+            add_pending_tags, self.repository, self.repository
+        )
@@ -0,0 +1,142 @@
+import io
+import tempfile
+
+from unittest import mock
+
+from django.test import TestCase
+
+from pulpcore.plugin.models import ContentArtifact, RemoteArtifact
+
+from pulp_container.app.models import (
+    MEDIA_TYPE,
+    Blob,
+    BlobManifest,
+    ContainerRemote,
+    ContainerRepository,
+    Manifest,
+)
+from pulp_container.app.registry import PullThroughDownloader
+from pulp_container.app.registry_api import BlobUploads
+
+
+class TestSavePendingContent(TestCase):
+    """A test case for storing the content downloaded by a pull-through distribution."""
+
+    def setUp(self):
+        """Create a remote, a repository, and an artifact of the downloaded manifest."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.settings_override = self.settings(
+            MEDIA_ROOT=self.temp_dir.name,
+            WORKING_DIRECTORY=self.temp_dir.name,
+            FILE_UPLOAD_TEMP_DIR=self.temp_dir.name,
+        )
+        self.settings_override.enable()
+
+        self.remote = ContainerRemote.objects.create(
+            name="pull-through", url="https://registry.example.com", upstream_name="library/test"
+        )
+        self.repository = ContainerRepository.objects.create(name="pull-through")
+        self.artifact = BlobUploads().receive_artifact(io.BytesIO(b"manifest"))
+
+        self.digest = f"sha256:{'0' * 64}"
+        self.config_digest = f"sha256:{'1' * 64}"
+        self.layer_digests = [f"sha256:{'2' * 64}", f"sha256:{'3' * 64}"]
+        self.manifest_data = {
+            "mediaType": MEDIA_TYPE.MANIFEST_V2,
+            "config": {"digest": self.config_digest},
+            "layers": [{"digest": digest} for digest in self.layer_digests],
+        }
+
+    def tearDown(self):
+        """Restore the settings and remove the directory."""
+        self.settings_override.disable()
+        self.temp_dir.cleanup()
+
+    def save_pending_content(self, repository=None):
+        """Store the manifest as the downloader of a pull-through distribution would."""
+        downloader = PullThroughDownloader(
+            mock.Mock(),
+            self.remote,
+            repository or self.repository,
+            mock.Mock(),
+            "test",
+            "latest",
+        )
+        return downloader.save_pending_content(
+            self.digest, self.manifest_data, MEDIA_TYPE.MANIFEST_V2, self.artifact
+        )
+
+    def assert_remote_artifacts(self, digests):
+        """Check that every blob can be streamed from the remote."""
+        for digest in digests:
+            remote_artifact = RemoteArtifact.objects.get(
+                content_artifact__content__in=Blob.objects.filter(digest=digest),
+                content_artifact__relative_path=digest,
+            )
+            self.assertEqual(remote_artifact.remote.pk, self.remote.pk)
+            self.assertEqual(
+                remote_artifact.url,
+                f"https://registry.example.com/v2/library/test/blobs/{digest}",
+            )
+            self.assertIsNone(remote_artifact.content_artifact.artifact)
+
+    def test_new_manifest(self):
+        """Check that the manifest and its blobs are stored as pending content."""
+        manifest = self.save_pending_content()
+
+        self.assertEqual(manifest.schema_version, 2)
+        self.assertEqual(manifest.config_blob.digest, self.config_digest)
+        self.assertEqual(
+            ContentArtifact.objects.get(content=manifest, relative_path=self.digest).artifact,
+            self.artifact,
+        )
+        self.assertCountEqual(
+            BlobManifest.objects.filter(manifest=manifest).values_list(
+                "manifest_blob__digest", flat=True
+            ),
+            self.layer_digests,
+        )
+        self.assertCountEqual(self.repository.pending_manifests.all(), [manifest])
+        self.assertCountEqual(
+            self.repository.pending_blobs.values_list("digest", flat=True),
+            [self.config_digest, *self.layer_digests],
+        )
+        self.assert_remote_artifacts([self.config_digest, *self.layer_digests])
+
+    def test_existing_content_is_reused(self):
+        """Check that the records created by a concurrent request are looked up and reused."""
+        layer = Blob.objects.create(digest=self.layer_digests[0])
+        manifest = self.save_pending_content()
+        other_repository = ContainerRepository.objects.create(name="other")
+
+        other_manifest = self.save_pending_content(other_repository)
+
+        self.assertEqual(other_manifest.pk, manifest.pk)
+        self.assertEqual(Manifest.objects.filter(digest=self.digest).count(), 1)
+        self.assertEqual(Blob.objects.get(digest=self.layer_digests[0]).pk, layer.pk)
+        self.assertEqual(
+            Blob.objects.filter(digest__in=[self.config_digest, *self.layer_digests]).count(), 3
+        )
+        self.assertEqual(BlobManifest.objects.filter(manifest=manifest).count(), 2)
+        self.assertEqual(ContentArtifact.objects.filter(content=manifest).count(), 1)
+        self.assertEqual(
+            RemoteArtifact.objects.filter(
+                content_artifact__relative_path__in=[self.config_digest, *self.layer_digests]
+            ).count(),
+            3,
+        )
+        self.assertCountEqual(other_repository.pending_manifests.all(), [manifest])
+        self.assertEqual(other_repository.pending_blobs.count(), 3)
+
+    def test_manifest_without_config_blob(self):
+        """Check that only the layers are stored for a manifest without a config blob."""
+        del self.manifest_data["config"]
+
+        manifest = self.save_pending_content()
+
+        self.assertIsNone(manifest.config_blob)
+        self.assertCountEqual(
+            self.repository.pending_blobs.values_list("digest", flat=True), self.layer_digests
+        )
+        self.assertFalse(Blob.objects.filter(digest=self.config_digest).exists())
+        self.assert_remote_artifacts(self.layer_digests)
@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from pulp_container.app.redirects import S3StorageRedirects, signed_urls
+from pulp_container.constants import BLOB_CONTENT_TYPE
+
+
+@override_settings(AWS_QUERYSTRING_EXPIRE=100, REDIRECT_URL_CACHE_TTL_FRACTION=0.5)
+class TestSignedUrlCache(SimpleTestCase):
+    """A test case for reusing signed URLs of redirects to the object storage."""
+
+    def setUp(self):
+        """Create a blob with an artifact stored in a mocked storage."""
+        signed_urls.clear()
+        self.artifact = mock.Mock(sha256="0" * 64)
+        self.artifact.file.storage.url.return_value = "https://bucket/signed"
+        self.blob = mock.Mock(pk="blob-pk", digest=f"sha256:{'0' * 64}")
+        self.blob._artifacts.get.return_value = self.artifact
+        self.redirects = S3StorageRedirects(mock.Mock(), "test", mock.Mock(method="GET"))
+
+    def test_signed_url_is_reused(self):
+        """Check that the artifact is queried and the URL signed once for repeated redirects."""
+        hits = signed_urls.hits
+        with mock.patch("pulp_container.app.cache.time.monotonic", return_value=1000):
+            for _ in range(3):
+                response = self.redirects.issue_blob_redirect(self.blob)
+
+        self.assertEqual(response.url, "https://bucket/signed")
+        self.blob._artifacts.get.assert_called_once_with()
+        self.artifact.file.storage.url.assert_called_once()
+        self.assertEqual(
+            self.artifact.file.storage.url.call_args.kwargs["parameters"]["ResponseContentType"],
+            BLOB_CONTENT_TYPE,
+        )
+        self.assertEqual(signed_urls.hits - hits, 2)
+
+    def test_signed_url_expires_before_its_validity(self):
+        """Check that the URL is signed again after the configured fraction of its validity."""
+        with mock.patch("pulp_container.app.cache.time.monotonic", return_value=1000):
+            self.redirects.issue_blob_redirect(self.blob)
+        with mock.patch("pulp_container.app.cache.time.monotonic", return_value=1051):
+            self.redirects.issue_blob_redirect(self.blob)
+
+        self.assertEqual(self.artifact.file.storage.url.call_count, 2)
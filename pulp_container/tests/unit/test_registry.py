@@ -0,0 +1,217 @@
+import asyncio
+import os
+import tempfile
+
+from unittest import mock
+
+from aiohttp.client_exceptions import ClientResponseError
+from asgiref.sync import async_to_sync
+from django.core.exceptions import ObjectDoesNotExist
+from django.test import SimpleTestCase, TestCase
+
+from pulpcore.plugin.models import Artifact, ContentArtifact, RepositoryVersion
+
+from pulp_container.app.models import Blob, ContainerPushRepository, Manifest
+from pulp_container.app.registry import PullThroughDownloader, Registry, background_tasks
+from pulp_container.constants import MEDIA_TYPE
+
+
+class TestGetTag(SimpleTestCase):
+    """A test case for serving tags by the content app."""
+
+    def setUp(self):
+        """Prepare a request for a tag of a distribution serving a push repository."""
+        self.request = mock.Mock(
+            match_info={"path": "test", "tag_name": "latest"},
+            headers={"Accept": MEDIA_TYPE.MANIFEST_V2},
+        )
+        self.distribution = mock.Mock(base_path="test", remote_id=None)
+        self.repository = mock.Mock()
+        self.repository_version = mock.Mock(pk=1)
+
+    @mock.patch("pulp_container.app.registry.get_pending_tag")
+    def test_pending_tag_is_served(self, get_pending_tag):
+        """Check that a pushed tag is served before it is added to a repository version."""
+        pending_tag = get_pending_tag.return_value
+        pending_tag.tagged_manifest.media_type = MEDIA_TYPE.MANIFEST_V2
+        pending_tag.tagged_manifest.digest = "sha256:0"
+        registry = Registry()
+
+        with mock.patch.object(
+            Registry,
+            "_match_tag_distribution",
+            mock.AsyncMock(
+                return_value=(self.distribution, self.repository, self.repository_version)
+            ),
+        ):
+            with mock.patch.object(Registry, "dispatch_tag", mock.AsyncMock()) as dispatch_tag:
+                asyncio.run(registry.get_tag(self.request))
+
+        get_pending_tag.assert_called_once_with(self.repository, "latest")
+        dispatch_tag.assert_awaited_once_with(
+            self.request,
+            pending_tag,
+            {"Content-Type": MEDIA_TYPE.MANIFEST_V2, "Docker-Content-Digest": "sha256:0"},
+        )
+
+
+class TestGetContentArtifactByDigest(TestCase):
+    """A test case for resolving blobs and manifests by their digests."""
+
+    def setUp(self):
+        """Create a repository with a stored blob, a stored manifest, and a pending blob."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.settings_override = self.settings(MEDIA_ROOT=self.temp_dir.name)
+        self.settings_override.enable()
+
+        self.repository = ContainerPushRepository.objects.create(name="digest")
+        self.blob = self.create_content(Blob)
+        self.manifest = self.create_content(
+            Manifest, schema_version=2, media_type=MEDIA_TYPE.MANIFEST_OCI
+        )
+        with self.repository.new_version() as new_version:
+            new_version.add_content(Blob.objects.filter(pk=self.blob.pk))
+            new_version.add_content(Manifest.objects.filter(pk=self.manifest.pk))
+        self.pending_blob = self.create_content(Blob)
+        self.repository.pending_blobs.add(self.pending_blob)
+
+    def tearDown(self):
+        """Restore the settings and remove the directory."""
+        self.settings_override.disable()
+        self.temp_dir.cleanup()
+
+    def create_content(self, model, **fields):
+        """Create a blob or a manifest with an artifact stored locally."""
+        with tempfile.NamedTemporaryFile(dir=self.temp_dir.name, delete=False) as temp_file:
+            temp_file.write(os.urandom(1024))
+        artifact = Artifact.init_and_validate(temp_file.name)
+        artifact.save()
+        content = model.objects.create(digest=f"sha256:{artifact.sha256}", **fields)
+        ContentArtifact.objects.create(
+            artifact=artifact, content=content, relative_path=content.digest
+        )
+        return content
+
+    def get_content_artifact(self, digest):
+        """Resolve the digest against the latest version with its repository loaded."""
+        repository_version = RepositoryVersion.objects.select_related("repository").get(
+            pk=self.repository.latest_version().pk
+        )
+        with self.assertNumQueries(1):
+            return async_to_sync(Registry._get_content_artifact_by_digest)(
+                repository_version, digest
+            )
+
+    def test_blob_is_resolved(self):
+        """Check that a blob and its artifact are resolved with a single query."""
+        ca = self.get_content_artifact(self.blob.digest)
+
+        self.assertEqual(ca.content_id, self.blob.pk)
+        self.assertIsNone(ca.manifest_media_type)
+        with self.assertNumQueries(0):
+            self.assertEqual(ca.artifact.sha256, self.blob.digest[len("sha256:") :])
+
+    def test_manifest_is_resolved(self):
+        """Check that the media type of a manifest is resolved together with its artifact."""
+        ca = self.get_content_artifact(self.manifest.digest)
+
+        self.assertEqual(ca.content_id, self.manifest.pk)
+        self.assertEqual(ca.manifest_media_type, MEDIA_TYPE.MANIFEST_OCI)
+
+    def test_pending_blob_is_resolved(self):
+        """Check that the pending content of the repository is considered."""
+        ca = self.get_content_artifact(self.pending_blob.digest)
+
+        self.assertEqual(ca.content_id, self.pending_blob.pk)
+
+    def test_missing_blob(self):
+        """Check that an unknown digest is not resolved."""
+        with self.assertRaises(ObjectDoesNotExist):
+            self.get_content_artifact(f"sha256:{'0' * 64}")
+
+
+class TestInitPendingContent(SimpleTestCase):
+    """A test case for storing the content downloaded by a pull-through distribution."""
+
+    def setUp(self):
+        """Prepare a downloader and a manifest referencing a config blob."""
+        self.downloader = PullThroughDownloader(
+            mock.Mock(), mock.Mock(), mock.Mock(), mock.Mock(), "test", "latest"
+        )
+        self.manifest_data = {
+            "mediaType": MEDIA_TYPE.MANIFEST_V2,
+            "config": {"digest": "sha256:1"},
+            "layers": [],
+        }
+        self.manifest = mock.Mock(
+            digest="sha256:0", media_type=MEDIA_TYPE.MANIFEST_V2, config_blob_id=1
+        )
+
+    async def init_pending_content(self):
+        await self.downloader.init_pending_content(
+            "sha256:0", self.manifest_data, MEDIA_TYPE.MANIFEST_V2, mock.Mock()
+        )
+
+    async def wait_for_background_tasks(self, coroutine):
+        try:
+            await coroutine
+        finally:
+            await asyncio.gather(*background_tasks, return_exceptions=True)
+
+    @mock.patch("pulp_container.app.registry.ContentArtifact")
+    @mock.patch.object(PullThroughDownloader, "save_manifest_metadata")
+    @mock.patch.object(PullThroughDownloader, "save_pending_content")
+    @mock.patch.object(PullThroughDownloader, "download_config_blob")
+    def test_config_blob_is_attached(
+        self, download_config_blob, save_pending_content, save_metadata, content_artifact
+    ):
+        """Check that the downloaded config blob is attached before initializing metadata."""
+        save_pending_content.return_value = self.manifest
+        aupdate = content_artifact.objects.filter.return_value.aupdate = mock.AsyncMock()
+
+        asyncio.run(self.wait_for_background_tasks(self.init_pending_content()))
+
+        download_config_blob.assert_awaited_once_with("sha256:1")
+        aupdate.assert_awaited_once_with(artifact=download_config_blob.return_value)
+        save_metadata.assert_called_once_with(self.manifest, self.manifest_data)
+
+    @mock.patch.object(PullThroughDownloader, "save_manifest_metadata")
+    @mock.patch.object(PullThroughDownloader, "save_pending_content")
+    @mock.patch.object(PullThroughDownloader, "download_config_blob")
+    def test_failed_download_skips_metadata(
+        self, download_config_blob, save_pending_content, save_metadata
+    ):
+        """Check that a failed download of the config blob is only logged."""
+        download_config_blob.side_effect = ClientResponseError(mock.Mock(), ())
+        save_pending_content.return_value = self.manifest
+
+        with self.assertLogs("pulp_container.app.registry", level="WARNING") as logs:
+            asyncio.run(self.wait_for_background_tasks(self.init_pending_content()))
+
+        save_metadata.assert_not_called()
+        self.assertIn("sha256:0", logs.output[0])
+
+    @mock.patch.object(PullThroughDownloader, "save_manifest_metadata")
+    @mock.patch.object(PullThroughDownloader, "save_pending_content")
+    @mock.patch.object(PullThroughDownloader, "download_config_blob")
+    def test_failed_save_cancels_download(
+        self, download_config_blob, save_pending_content, save_metadata
+    ):
+        """Check that the download of the config blob is cancelled when the content is not saved."""
+        cancelled = []
+
+        async def download(config_digest):
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(config_digest)
+                raise
+
+        download_config_blob.side_effect = download
+        save_pending_content.side_effect = RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(self.wait_for_background_tasks(self.init_pending_content()))
+
+        self.assertEqual(cancelled, ["sha256:1"])
+        save_metadata.assert_not_called()
@@ -0,0 +1,83 @@
+import asyncio
+
+from unittest import mock
+
+from aiohttp import web
+from aiohttp.test_utils import make_mocked_request
+from django.test import SimpleTestCase
+
+from pulp_container.app.responses import (
+    RegistryResponse,
+    StoringStreamResponse,
+    evaluate_conditional_request,
+)
+
+DIGEST = "sha256:" + "a" * 64
+ETAG = f'"{DIGEST}"'
+
+
+class TestConditionalRequests(SimpleTestCase):
+    """A test case for conditional and range requests evaluated against the content digest."""
+
+    def make_request(self, **headers):
+        """Create a request for a blob with the passed headers."""
+        return make_mocked_request("GET", f"/v2/test/blobs/{DIGEST}", headers=headers)
+
+    def test_if_none_match_not_modified(self):
+        """Check that a matching If-None-Match results in the 304 status code."""
+        with self.assertRaises(web.HTTPNotModified) as context:
+            evaluate_conditional_request(self.make_request(**{"If-None-Match": ETAG}), DIGEST)
+        self.assertEqual(context.exception.headers["ETag"], ETAG)
+
+        request = self.make_request(**{"If-None-Match": '"sha256:other"'})
+        self.assertNotIn("If-None-Match", evaluate_conditional_request(request, DIGEST).headers)
+
+    def test_if_match_precondition_failed(self):
+        """Check that a non-matching If-Match results in the 412 status code."""
+        with self.assertRaises(web.HTTPPreconditionFailed):
+            evaluate_conditional_request(self.make_request(**{"If-Match": '"other"'}), DIGEST)
+
+    def test_if_range(self):
+        """Check that the Range header is kept only if If-Range matches the digest."""
+        request = self.make_request(**{"Range": "bytes=0-9", "If-Range": ETAG})
+        request = evaluate_conditional_request(request, DIGEST)
+        self.assertEqual(request.headers["Range"], "bytes=0-9")
+        self.assertNotIn("If-Range", request.headers)
+
+        request = self.make_request(**{"Range": "bytes=0-9", "If-Range": '"sha256:other"'})
+        self.assertNotIn("Range", evaluate_conditional_request(request, DIGEST).headers)
+
+    def test_unconditional_request_is_kept(self):
+        """Check that requests without conditional headers are not copied."""
+        request = self.make_request(**{"Range": "bytes=0-9"})
+        self.assertIs(evaluate_conditional_request(request, DIGEST), request)
+
+    def test_response_not_modified(self):
+        """Check that a response carries the digest as the ETag and skips the matching body."""
+        response = RegistryResponse(body=b"{}", headers={"Docker-Content-Digest": DIGEST})
+        asyncio.run(response.prepare(self.make_request(**{"If-None-Match": ETAG})))
+
+        self.assertEqual(response.status, 304)
+        self.assertEqual(response.headers["ETag"], ETAG)
+
+
+class TestStoringStreamResponse(SimpleTestCase):
+    """A test case for responses streaming content which is stored at the same time."""
+
+    def test_disconnected_client(self):
+        """Check that writes do not fail after the client disconnects."""
+        response = StoringStreamResponse()
+        request = make_mocked_request("GET", f"/v2/test/blobs/{DIGEST}")
+
+        async def stream():
+            await response.prepare(request)
+            with mock.patch(
+                "aiohttp.web.StreamResponse.write", side_effect=ConnectionResetError
+            ) as write:
+                await response.write(b"first chunk")
+                await response.write(b"second chunk")
+            await response.write_eof()
+            return write.call_count
+
+        self.assertEqual(asyncio.run(stream()), 1)
+        self.assertTrue(response.client_disconnected)
@@ -0,0 +1,86 @@
+import asyncio
+
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from pulp_container.app.tasks.sync_stages import ContainerFirstStage
+
+PAGES = 5
+PAGE_SIZE = 100
+
+
+class TestFetchTaggedManifests(SimpleTestCase):
+    """A test case for fetching the tagged manifests within the first stage of a sync."""
+
+    def setUp(self):
+        """Initialize the stage with a remote limiting the number of concurrent downloads."""
+        remote = mock.Mock(
+            policy="immediate", download_concurrency=3, include_tags=None, exclude_tags=None
+        )
+        with mock.patch("pulpcore.plugin.stages.api.get_domain"):
+            self.stage = ContainerFirstStage(remote, signed_only=False)
+        self.listed_pages = 0
+        self.running = 0
+        self.max_running = 0
+
+    async def tag_pages(self):
+        """Yield pages of tag names as a paginated tag list does."""
+        for page in range(PAGES):
+            self.listed_pages += 1
+            yield [f"{page}-{i}" for i in range(PAGE_SIZE)]
+
+    async def fetch_tagged_manifest(self, tag_name):
+        """Mimic fetching a manifest and track the number of concurrent fetches."""
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0)
+        self.running -= 1
+        if tag_name == "failing":
+            raise ValueError(tag_name)
+        return tag_name
+
+    async def fetch_tags(self, tag_pages):
+        """Collect the fetched manifests and the number of pages listed before the first one."""
+        pb_tag_list, pb_parsed_tags = mock.AsyncMock(), mock.AsyncMock(total=0)
+        fetched, listed_pages = [], None
+        with mock.patch.object(self.stage, "_fetch_tagged_manifest", self.fetch_tagged_manifest):
+            async for tag_name, manifest in self.stage.fetch_tagged_manifests(
+                tag_pages, pb_tag_list, pb_parsed_tags
+            ):
+                if listed_pages is None:
+                    listed_pages = self.listed_pages
+                fetched.append(manifest)
+        return fetched, listed_pages, pb_parsed_tags.total
+
+    def test_manifests_are_fetched_by_bounded_workers(self):
+        """Check that all tags are fetched concurrently by a fixed number of workers."""
+        fetched, listed_pages, total = asyncio.run(self.fetch_tags(self.tag_pages()))
+
+        self.assertEqual(len(fetched), PAGES * PAGE_SIZE)
+        self.assertEqual(total, PAGES * PAGE_SIZE)
+        self.assertEqual(self.max_running, 3)
+        # the manifests flow before the whole tag list is downloaded
+        self.assertLess(listed_pages, PAGES)
+
+    def test_failure_is_raised(self):
+        """Check that a failed fetch stops the iteration with the error."""
+
+        async def tag_pages():
+            yield ["latest", "failing", "stable"]
+
+        with self.assertRaises(ValueError):
+            asyncio.run(self.fetch_tags(tag_pages()))
+
+    def test_workers_are_finished_after_failure(self):
+        """Check that no worker is left running once the iteration stops."""
+
+        async def tag_pages():
+            yield ["failing"] + [f"tag-{i}" for i in range(PAGE_SIZE)]
+
+        async def fetch_failing_tags():
+            with self.assertRaises(ValueError):
+                await self.fetch_tags(tag_pages())
+            return asyncio.all_tasks() - {asyncio.current_task()}
+
+        self.assertEqual(asyncio.run(fetch_failing_tags()), set())
@@ -0,0 +1,110 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from pulp_container.app.models import (
+    ContainerPushRepository,
+    Manifest,
+    RepositoryVersionTag,
+    Tag,
+    has_indexed_tag_names,
+    index_tag_names,
+)
+from pulp_container.app.registry_api import TagsListView
+from pulp_container.constants import MEDIA_TYPE
+
+
+class TestRepositoryVersionTags(TestCase):
+    """Test the materialized tag names of repository versions."""
+
+    def setUp(self):
+        """Create a repository with a version containing a few tags."""
+        manifest = Manifest.objects.create(
+            digest="sha256:" + "0" * 64, schema_version=2, media_type=MEDIA_TYPE.MANIFEST_V2
+        )
+        self.tags = [
+            Tag.objects.create(name=name, tagged_manifest=manifest) for name in ("c", "a", "b")
+        ]
+        self.repository = ContainerPushRepository.objects.create(name="tags")
+        with self.repository.new_version() as new_version:
+            new_version.add_content(Manifest.objects.filter(pk=manifest.pk))
+            new_version.add_content(Tag.objects.filter(pk__in=[tag.pk for tag in self.tags]))
+        self.version = self.repository.latest_version()
+
+    def tag_names(self, repository_version):
+        """Return the materialized tag names of the repository version in order."""
+        return list(
+            RepositoryVersionTag.objects.filter(repository_version=repository_version)
+            .order_by("name")
+            .values_list("name", flat=True)
+        )
+
+    def test_tag_names_are_materialized_on_finalize(self):
+        """Check that the tag names are indexed when a new version is created."""
+        self.assertEqual(self.tag_names(self.version), ["a", "b", "c"])
+
+    def test_new_version_replaces_older_tag_names(self):
+        """Check that the names of older versions are dropped and can be materialized again."""
+        with self.repository.new_version() as new_version:
+            new_version.remove_content(Tag.objects.filter(name="b"))
+        latest_version = self.repository.latest_version()
+
+        self.assertEqual(self.tag_names(latest_version), ["a", "c"])
+        self.assertEqual(self.tag_names(self.version), [])
+
+        index_tag_names(self.version)
+        self.assertEqual(self.tag_names(self.version), ["a", "b", "c"])
+
+    def test_added_and_removed_tags_are_applied(self):
+        """Check that a new version applies its changes to the names of the previous version."""
+        manifest = Manifest.objects.create(
+            digest="sha256:" + "1" * 64, schema_version=2, media_type=MEDIA_TYPE.MANIFEST_V2
+        )
+        retagged = Tag.objects.create(name="a", tagged_manifest=manifest)
+        added = Tag.objects.create(name="d", tagged_manifest=manifest)
+        with self.repository.new_version() as new_version:
+            new_version.add_content(Manifest.objects.filter(pk=manifest.pk))
+            new_version.remove_content(Tag.objects.filter(pk=self.tags[0].pk))
+            new_version.add_content(Tag.objects.filter(pk__in=[retagged.pk, added.pk]))
+        latest_version = self.repository.latest_version()
+
+        self.assertEqual(self.tag_names(latest_version), ["a", "b", "d"])
+        self.assertFalse(has_indexed_tag_names(self.version))
+
+    def test_version_without_tags_is_indexed_once(self):
+        """Check that a version without tags is not indexed again on every listing."""
+        with self.repository.new_version() as new_version:
+            new_version.remove_content(Tag.objects.all())
+        latest_version = self.repository.latest_version()
+
+        self.assertEqual(self.tag_names(latest_version), [])
+        self.assertTrue(has_indexed_tag_names(latest_version))
+
+    def list_tags(self, repository_version, query=""):
+        """List the tags of the repository version."""
+        request = APIRequestFactory().get(f"/v2/tags/tags/list/{query}")
+        request.resolver_match = mock.Mock(kwargs={"path": "tags"})
+        view = TagsListView()
+        view.request = Request(request)
+        view.format_kwarg = None
+        served = (None, self.repository, repository_version)
+        with mock.patch.object(TagsListView, "get_drv_pull", return_value=served):
+            page = view.paginate_queryset(view.get_queryset())
+        return [tag["name"] for tag in page]
+
+    def test_tags_of_indexed_version_are_listed(self):
+        """Check that the tags of the latest version are listed from the materialized names."""
+        RepositoryVersionTag.objects.filter(repository_version=self.version, name="b").delete()
+
+        self.assertEqual(self.list_tags(self.version), ["a", "c"])
+
+    def test_tags_of_older_version_are_listed(self):
+        """Check that the tags of a version without materialized names are listed without them."""
+        with self.repository.new_version() as new_version:
+            new_version.remove_content(Tag.objects.filter(name="b"))
+
+        self.assertEqual(self.list_tags(self.version), ["a", "b", "c"])
+        self.assertEqual(self.list_tags(self.version, "?n=1&last=a"), ["b"])
+        self.assertFalse(has_indexed_tag_names(self.version))
@@ -0,0 +1,61 @@
+import time
+
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from pulp_container.app.token_verification import TokenAuthentication, verified_tokens
+
+
+class TestTokenAuthentication(SimpleTestCase):
+    """A test case for the authentication with Bearer tokens."""
+
+    def setUp(self):
+        """Create a request carrying a Bearer token."""
+        verified_tokens.clear()
+        self.request = RequestFactory().get(
+            "/v2/", HTTP_AUTHORIZATION="Bearer token", HTTP_HOST="registry.example.com"
+        )
+
+    def test_verified_token_is_cached(self):
+        """Check that a token is verified only once until it expires."""
+        decoded_token = {"sub": "", "access": [], "exp": time.time() + 300}
+        with mock.patch(
+            "pulp_container.app.token_verification._decode_token", return_value=decoded_token
+        ) as decode_token:
+            for _ in range(3):
+                user, auth = TokenAuthentication().authenticate(self.request)
+
+        self.assertEqual(decode_token.call_count, 1)
+        self.assertIsInstance(user, AnonymousUser)
+        self.assertEqual(auth, decoded_token)
+
+    def test_expired_token_is_evicted(self):
+        """Check that a token is verified again once it expires."""
+        decoded_token = {"sub": "", "access": [], "exp": time.time() + 300}
+        with mock.patch(
+            "pulp_container.app.token_verification._decode_token", return_value=decoded_token
+        ) as decode_token:
+            TokenAuthentication().authenticate(self.request)
+            with mock.patch(
+                "pulp_container.app.cache.time.monotonic", return_value=time.monotonic() + 301
+            ):
+                TokenAuthentication().authenticate(self.request)
+
+        self.assertEqual(decode_token.call_count, 2)
+
+    @override_settings(TOKEN_CACHE_TTL=60)
+    def test_long_lived_token_is_verified_again(self):
+        """Check that a token is verified again after a while, so that changed users apply."""
+        decoded_token = {"sub": "", "access": [], "exp": time.time() + 3600}
+        with mock.patch(
+            "pulp_container.app.token_verification._decode_token", return_value=decoded_token
+        ) as decode_token:
+            TokenAuthentication().authenticate(self.request)
+            with mock.patch(
+                "pulp_container.app.cache.time.monotonic", return_value=time.monotonic() + 61
+            ):
+                TokenAuthentication().authenticate(self.request)
+
+        self.assertEqual(decode_token.call_count, 2)
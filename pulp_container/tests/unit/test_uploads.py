@@ -0,0 +1,169 @@
+import hashlib
+import io
+import os
+import tempfile
+import tracemalloc
+
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+
+from pulpcore.plugin.models import Artifact
+
+from pulp_container.app.models import ContainerPushRepository, Upload
+from pulp_container.app.registry_api import BlobUploads
+from pulp_container.constants import MEGABYTE, STREAM_CHUNK_SIZE
+
+
+class SyntheticBody:
+    """A request body generating its data on the fly, like a socket does."""
+
+    def __init__(self, size):
+        """Set the number of bytes the body is made of."""
+        self.remaining = size
+        self.hasher = hashlib.sha256()
+
+    def read(self, size=-1):
+        """Return the next block of the body."""
+        if size < 0:
+            size = self.remaining
+        data = bytes(min(size, self.remaining))
+        self.remaining -= len(data)
+        self.hasher.update(data)
+        return data
+
+
+class TestMonolithicUpload(SimpleTestCase):
+    """A test case for receiving blobs uploaded within a single request."""
+
+    @mock.patch("pulp_container.app.registry_api.transaction")
+    @mock.patch("pulp_container.app.registry_api.Artifact")
+    def test_memory_does_not_grow_with_body(self, artifact_class, transaction):
+        """Check that a large body is received with a bounded amount of memory."""
+        size = 64 * MEGABYTE
+        body = SyntheticBody(size)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            tracemalloc.start()
+            try:
+                with self.settings(FILE_UPLOAD_TEMP_DIR=temp_dir):
+                    BlobUploads().receive_artifact(body, size)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        self.assertLess(peak, 3 * STREAM_CHUNK_SIZE)
+        self.assertEqual(body.remaining, 0)
+        _, kwargs = artifact_class.call_args
+        self.assertEqual(kwargs["size"], size)
+        self.assertEqual(kwargs["sha256"], body.hasher.hexdigest())
+        artifact_class.return_value.save.assert_called_once_with()
+
+
+class TestReceiveArtifact(TestCase):
+    """A test case for saving received data as artifacts."""
+
+    def setUp(self):
+        """Use the same directory for uploaded files as the working directory, like pulpcore."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.settings_override = self.settings(
+            WORKING_DIRECTORY=self.temp_dir.name, FILE_UPLOAD_TEMP_DIR=self.temp_dir.name
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        """Restore the settings and remove the directory."""
+        self.settings_override.disable()
+        self.temp_dir.cleanup()
+
+    def test_artifact_is_saved_and_reused(self):
+        """Check that the received data is saved once and no temporary file is left behind."""
+        data = b"layer" * 1000
+
+        artifact = BlobUploads().receive_artifact(io.BytesIO(data))
+        # the same layer pushed again, e.g. to another repository
+        existing_artifact = BlobUploads().receive_artifact(io.BytesIO(data))
+
+        self.assertEqual(artifact.sha256, hashlib.sha256(data).hexdigest())
+        self.assertEqual(existing_artifact.pk, artifact.pk)
+        with artifact.file.open("rb") as artifact_file:
+            self.assertEqual(artifact_file.read(), data)
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+
+class TestStagedUpload(TestCase):
+    """A test case for promoting staging files to artifacts."""
+
+    def setUp(self):
+        """Store the staging files and artifacts in a temporary media root."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.settings_override = self.settings(MEDIA_ROOT=self.temp_dir.name)
+        self.settings_override.enable()
+        self.repository = ContainerPushRepository.objects.create(name="staged")
+
+    def tearDown(self):
+        """Restore the settings and remove the directory."""
+        self.settings_override.disable()
+        self.temp_dir.cleanup()
+
+    def upload_chunks(self, *chunks):
+        """Append the chunks to the staging file of a new upload."""
+        upload = Upload.objects.create(repository=self.repository, size=0)
+        for chunk in chunks:
+            upload.size, hashers = BlobUploads().append_to_staging_file(upload, io.BytesIO(chunk))
+            upload.save()
+        return upload, hashers
+
+    def test_staging_file_is_renamed(self):
+        """Check that the staging file becomes the artifact file."""
+        data = b"layer" * 1000
+        upload, hashers = self.upload_chunks(data[:1000], data[1000:])
+        staging_path = upload.file.path
+        digest = f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+        artifact = BlobUploads().create_staged_artifact(upload, hashers, digest)
+
+        self.assertEqual(artifact.size, len(data))
+        self.assertFalse(os.path.exists(staging_path))
+        with artifact.file.open("rb") as artifact_file:
+            self.assertEqual(artifact_file.read(), data)
+
+    def test_digest_mismatch(self):
+        """Check that an upload with a wrong digest is removed together with its staging file."""
+        upload, hashers = self.upload_chunks(b"layer")
+        staging_path = upload.file.path
+
+        with self.assertRaises(Exception):
+            BlobUploads().create_staged_artifact(upload, hashers, f"sha256:{'0' * 64}")
+
+        self.assertFalse(Upload.objects.filter(pk=upload.pk).exists())
+        self.assertFalse(os.path.exists(staging_path))
+
+    def test_failed_save_keeps_staging_file(self):
+        """Check that the staging file is not moved when the artifact is not saved."""
+        data = b"layer" * 1000
+        upload, hashers = self.upload_chunks(data)
+        staging_path = upload.file.path
+        digest = f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+        with mock.patch.object(Artifact, "save", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                BlobUploads().create_staged_artifact(upload, hashers, digest)
+
+        self.assertTrue(os.path.exists(staging_path))
+        artifact_path = Artifact(sha256=digest[len("sha256:") :]).storage_path("")
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, artifact_path)))
+
+    def test_failed_rename_saves_no_artifact(self):
+        """Check that no artifact without its file is left behind when the file is not renamed."""
+        data = b"layer" * 1000
+        upload, hashers = self.upload_chunks(data)
+        digest = f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+        with mock.patch("pulp_container.app.registry_api.os.replace", side_effect=OSError):
+            with self.assertRaises(OSError):
+                BlobUploads().create_staged_artifact(upload, hashers, digest)
+
+        self.assertFalse(Artifact.objects.filter(sha256=digest[len("sha256:") :]).exists())
+        self.assertTrue(os.path.exists(upload.file.path))
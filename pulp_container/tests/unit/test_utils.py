@@ -0,0 +1,80 @@
+import hashlib
+import io
+import os
+import tempfile
+
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from pulp_container.app.utils import get_path_prefixes, init_hashers, load_key_file, write_stream
+
+
+class TestGetPathPrefixes(SimpleTestCase):
+    """A test case for enumerating the base paths a repository path can be served from."""
+
+    def test_prefixes_end_at_path_components(self):
+        """Check that every component boundary yields a prefix, with and without the slash."""
+        self.assertEqual(
+            get_path_prefixes("docker/library/busybox"),
+            ["docker", "docker/", "docker/library", "docker/library/", "docker/library/busybox"],
+        )
+
+    def test_single_component_path(self):
+        """Check that a path without slashes is its own only prefix."""
+        self.assertEqual(get_path_prefixes("busybox"), ["busybox"])
+
+
+class TestWriteStream(SimpleTestCase):
+    """A test case for copying request bodies while computing their digests."""
+
+    def test_stream_is_copied_and_hashed(self):
+        """Check that the whole stream is copied and its digests are computed."""
+        data = b"layer" * 1000
+        file, hashers = io.BytesIO(), init_hashers()
+
+        self.assertEqual(write_stream(io.BytesIO(data), file, hashers), len(data))
+        self.assertEqual(file.getvalue(), data)
+        self.assertEqual(hashers["sha256"].hexdigest(), hashlib.sha256(data).hexdigest())
+
+    def test_only_requested_length_is_read(self):
+        """Check that the data following the requested length is left in the stream."""
+        stream, hashers = io.BytesIO(b"chunknext"), init_hashers()
+
+        self.assertEqual(write_stream(stream, None, hashers, length=5), 5)
+        self.assertEqual(stream.read(), b"next")
+        self.assertEqual(hashers["sha256"].hexdigest(), hashlib.sha256(b"chunk").hexdigest())
+
+
+class TestLoadKeyFile(SimpleTestCase):
+    """A test case for loading the keys the tokens are signed and verified with."""
+
+    def setUp(self):
+        """Write a key file."""
+        with tempfile.NamedTemporaryFile(delete=False) as key_file:
+            key_file.write(b"key")
+        self.path = key_file.name
+        self.parse = mock.Mock(side_effect=bytes.decode)
+
+    def tearDown(self):
+        """Remove the key file."""
+        os.remove(self.path)
+
+    def test_key_is_parsed_once(self):
+        """Check that the key is not read again while the file is not modified."""
+        for _ in range(3):
+            self.assertEqual(load_key_file(self.path, self.parse), "key")
+
+        self.parse.assert_called_once_with(b"key")
+
+    def test_modified_key_is_parsed_again(self):
+        """Check that a rotated key is read once the modification time of the file changes."""
+        load_key_file(self.path, self.parse)
+        with open(self.path, "wb") as key_file:
+            key_file.write(b"rotated key")
+        modified_at = os.stat(self.path).st_mtime_ns + 1_000_000_000
+        os.utime(self.path, ns=(modified_at, modified_at))
+
+        self.assertEqual(load_key_file(self.path, self.parse), "rotated key")
+        self.assertEqual(load_key_file(self.path, self.parse), "rotated key")
+        self.assertEqual(self.parse.call_count, 2)